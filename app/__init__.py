@@ -1,11 +1,21 @@
 """
 应用工厂函数
 """
+import os
 from flask import Flask
 from app.config import Config
 from app.extensions import init_extensions
 from app.routes import register_blueprints
-from app.database import init_db_connection
+from app.commands import register_commands
+from app.database import init_db_connection, migrate_database
+from app.services.view_counter import init_view_counter
+from app.services.search_service import init_search_cache, init_search_index
+from app.services.fragment_cache import init_fragment_cache
+from app.services.tag_index import init_tag_index
+from app.services.tag_postings import init_tag_postings
+from app.services.semantic_service import init_semantic_index
+from app.services.related_service import init_related_prompts
+from app.services.home_snapshot import init_home_snapshot
 
 
 def create_app(config_class=Config):
@@ -22,16 +32,47 @@ def create_app(config_class=Config):
     # 初始化扩展
     init_extensions(app)
     
+    # 执行数据库迁移（仅在启动时执行一次）
+    migrate_database(app)
+    
+    # 确保头像上传目录存在
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
     # 初始化数据库连接
     init_db_connection(app)
     
+    # 初始化浏览计数写缓冲
+    init_view_counter(app)
+    
+    # 初始化搜索/列表结果缓存
+    init_search_cache(app)
+    
+    # 补上外部连接写入后尚未进入全文搜索索引的提示词
+    init_search_index(app)
+    
+    # 初始化提示词卡片片段缓存
+    init_fragment_cache(app)
+    
+    # 初始化标签自动补全索引
+    init_tag_index(app)
+    
+    # 初始化多标签筛选倒排索引
+    init_tag_postings(app)
+    
+    # 初始化语义搜索索引
+    init_semantic_index(app)
+    
+    # 初始化相关提示词计算使用的词频缓存
+    init_related_prompts(app)
+    
+    # 初始化首页快照（后台线程定期重新计算）
+    init_home_snapshot(app)
+    
     # 注册蓝图
     register_blueprints(app)
     
-    # 初始化数据库表（在应用上下文中）
-    with app.app_context():
-        from app.routes.prompts import ensure_favorites_table
-        ensure_favorites_table()
+    # 注册命令行命令
+    register_commands(app)
     
     return app
 
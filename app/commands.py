@@ -0,0 +1,48 @@
+"""
+命令行命令（flask --app run <命令>）
+"""
+import click
+from app.database import get_write_db
+from app.services.search_service import rebuild_search_index
+from app.services.semantic_service import semantic_available, rebuild_semantic_index
+from app.services.related_service import rebuild_related_prompts
+from app.services.duplicate_service import cluster_duplicates
+
+
+def register_commands(app):
+    """注册所有命令行命令"""
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(rebuild_semantic_index_command)
+    app.cli.add_command(rebuild_related_prompts_command)
+    app.cli.add_command(find_duplicates_command)
+
+
+@click.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """重建全文搜索索引"""
+    count = rebuild_search_index(get_write_db())
+    click.echo(f'✓ 全文搜索索引已重建，共 {count} 条提示词')
+
+
+@click.command('rebuild-semantic-index')
+def rebuild_semantic_index_command():
+    """重建语义搜索向量（重新计算 IDF，清除已删除的行）"""
+    if not semantic_available():
+        raise click.ClickException('语义搜索需要安装 NumPy')
+    count = rebuild_semantic_index(get_write_db())
+    click.echo(f'✓ 语义索引已重建，共 {count} 条提示词')
+
+
+@click.command('rebuild-related-prompts')
+def rebuild_related_prompts_command():
+    """重新计算全部提示词的相关列表"""
+    count = rebuild_related_prompts(get_write_db())
+    click.echo(f'✓ 相关提示词已重建，共 {count} 条提示词')
+
+
+@click.command('find-duplicates')
+@click.option('--threshold', type=float, default=None, help='相似度阈值（默认为 DUPLICATE_THRESHOLD）')
+def find_duplicates_command(threshold):
+    """补齐重复检测签名并对全部提示词聚类近似重复（结果在管理后台查看）"""
+    clusters, prompts = cluster_duplicates(get_write_db(), threshold)
+    click.echo(f'✓ 发现 {clusters} 组近似重复，共 {prompts} 条提示词')
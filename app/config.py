@@ -13,6 +13,80 @@ class Config:
     
     # 数据库配置
     DATABASE = str(BASE_DIR / 'instance' / 'prompts.db')
+    MIGRATIONS_DIR = str(BASE_DIR / 'migrations')
+    
+    # 数据库连接池配置（每个进程一个只读连接池和一个写连接池）
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 4))
+    DB_WRITE_POOL_SIZE = 1  # 写连接串行使用
+    DB_POOL_MAX_IDLE = int(os.environ.get('DB_POOL_MAX_IDLE', 300))  # 秒
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # 秒
+    DB_POOL_HEALTH_CHECK_INTERVAL = 30  # 秒
+    
+    # SQLite 性能参数（每个新连接执行一次）
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -8000,  # 负数表示 KiB，约 8MB
+        'mmap_size': 128 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # 毫秒
+    }
+    
+    # 浏览计数写缓冲：每隔 N 秒或累计 M 次浏览批量写入一次
+    VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 5))
+    VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD', 100))
+    
+    # 首页快照：后台重新计算的间隔（秒），超过最长时间仍未刷新时在请求中同步计算（秒）
+    HOME_SNAPSHOT_INTERVAL = int(os.environ.get('HOME_SNAPSHOT_INTERVAL', 60))
+    HOME_SNAPSHOT_MAX_AGE = int(os.environ.get('HOME_SNAPSHOT_MAX_AGE', 600))
+    
+    # WAL 检查点：请求结束时按间隔执行，避免 WAL 文件在持续读负载下无限增长
+    WAL_CHECKPOINT_INTERVAL = int(os.environ.get('WAL_CHECKPOINT_INTERVAL', 300))  # 秒，0 表示禁用
+    WAL_CHECKPOINT_MODE = 'PASSIVE'
+    
+    # 全文搜索：BM25 字段权重（标题、描述、内容、标签名），每页结果数，最多翻页数
+    SEARCH_BM25_WEIGHTS = (10.0, 4.0, 1.0, 6.0)
+    SEARCH_PER_PAGE = int(os.environ.get('SEARCH_PER_PAGE', 12))
+    SEARCH_MAX_PAGES = int(os.environ.get('SEARCH_MAX_PAGES', 50))
+    # 结果摘要的长度（字符）
+    SEARCH_SNIPPET_LENGTH = 80
+    # 搜索/列表结果缓存（每个进程）：最多缓存的页数，有效期（秒）
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 1024))
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 60))
+    
+    # 提示词卡片片段缓存（每个进程）：最多缓存的片段数，片段总大小上限（字节）
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 50000))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    
+    # 标签分面：搜索结果和列表页展示的标签数
+    FACET_LIMIT = 20
+    
+    # 标签自动补全：内存索引检查其他进程写入的间隔（秒），创建/编辑页面展示的常用标签数，每次补全返回的标签数
+    TAG_INDEX_REFRESH_INTERVAL = int(os.environ.get('TAG_INDEX_REFRESH_INTERVAL', 300))
+    TAG_SUGGESTION_COUNT = 20
+    TAG_AUTOCOMPLETE_LIMIT = 10
+    
+    # 多标签筛选：内存倒排索引检查其他进程写入的间隔（秒）
+    TAG_POSTINGS_REFRESH_INTERVAL = int(os.environ.get('TAG_POSTINGS_REFRESH_INTERVAL', 30))
+    
+    # 语义搜索（需要 NumPy）：向量文件目录（默认为数据库所在目录下的 semantic/），向量维度（修改后需要重建），
+    # 结果的最低余弦相似度
+    SEMANTIC_INDEX_DIR = os.environ.get('SEMANTIC_INDEX_DIR')
+    SEMANTIC_DIMENSIONS = int(os.environ.get('SEMANTIC_DIMENSIONS', 512))
+    SEMANTIC_MIN_SCORE = 0.1
+    
+    # 相关提示词：查看页显示的数量，标签相似度与文本相似度的权重
+    RELATED_PROMPTS_LIMIT = 6
+    RELATED_PROMPTS_WEIGHTS = (0.6, 0.4)
+    
+    # 近似重复检测：估计的 Jaccard 相似度不低于此值时视为重复
+    DUPLICATE_THRESHOLD = 0.8
+    
+    # SQL 执行统计
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    # 在响应头中返回 X-SQL-Count / X-SQL-Time-Ms / X-SQL-N-Plus-One
+    SQL_DEBUG_HEADERS = os.environ.get('SQL_DEBUG_HEADERS', 'False').lower() == 'true'
     
     # 日志配置
     LOG_DIR = str(BASE_DIR / 'logs')
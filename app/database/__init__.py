@@ -1,7 +1,16 @@
 """
 数据库模块
 """
-from app.database.db import get_db, close_db, init_db_connection
+from app.database.db import (
+    get_db, get_write_db, get_pool, get_write_pool, close_db, init_db_connection,
+    get_pragma_settings, get_wal_status
+)
+from app.database.migrations import migrate_database, MigrationError
+from app.database.functions import register_functions
 
-__all__ = ['get_db', 'close_db', 'init_db_connection']
+__all__ = [
+    'get_db', 'get_write_db', 'get_pool', 'get_write_pool', 'close_db', 'init_db_connection',
+    'get_pragma_settings', 'get_wal_status', 'migrate_database', 'MigrationError',
+    'register_functions'
+]
 
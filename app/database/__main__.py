@@ -0,0 +1,7 @@
+"""
+命令行执行数据库迁移: python -m app.database [数据库路径]
+"""
+import sys
+from app.database.migrations import main
+
+sys.exit(0 if main() else 1)
@@ -1,51 +1,157 @@
 """
 数据库连接和工具函数
+
+连接分为两条通道：
+- 读通道 get_db()：只读连接（mode=ro + query_only），用于所有查询
+- 写通道 get_write_db()：每个进程只有一个写连接，仅由修改数据的业务函数使用，
+  同一进程内的写操作因此串行执行，读请求不再与写请求争用写锁
 """
-import os
 import sqlite3
+import threading
+import time
+from urllib.parse import quote
 from flask import g, current_app
+from app.database.pool import ConnectionPool
+from app.database.instrumentation import instrument, init_instrumentation
+from app.database.functions import register_functions
 
 
 def get_db():
-    """获取数据库连接"""
-    # 确保头像目录存在
-    avatars_dir = current_app.config.get('UPLOAD_FOLDER')
-    if avatars_dir and not os.path.exists(avatars_dir):
-        os.makedirs(avatars_dir, exist_ok=True)
-    
+    """获取只读数据库连接"""
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(current_app.config['DATABASE'])
-        db.row_factory = sqlite3.Row
-        
-        # 检查并添加avatar_url字段（如果不存在）
-        _ensure_avatar_field(db)
+        db = g._database = instrument(get_pool().acquire())
     
     return db
 
 
-def _ensure_avatar_field(db):
-    """确保users表有avatar_url字段"""
-    cursor = db.cursor()
-    result = cursor.execute("PRAGMA table_info(users)").fetchall()
-    has_avatar_field = any(row[1] == 'avatar_url' for row in result)
+def get_write_db():
+    """获取写连接（仅供修改数据的业务函数使用）"""
+    db = getattr(g, '_write_database', None)
+    if db is None:
+        db = g._write_database = instrument(get_write_pool().acquire())
     
-    if not has_avatar_field:
-        try:
-            cursor.execute('ALTER TABLE users ADD COLUMN avatar_url TEXT')
-            db.commit()
-            current_app.logger.info("已添加avatar_url字段到users表")
-        except sqlite3.Error as e:
-            current_app.logger.error(f"添加avatar_url字段时出错: {e}")
+    return db
+
+
+def get_pool(app=None):
+    """获取当前进程的只读连接池"""
+    app = app or current_app
+    return app.extensions['db_pool']
+
+
+def get_write_pool(app=None):
+    """获取当前进程的写连接池"""
+    app = app or current_app
+    return app.extensions['db_write_pool']
+
+
+def _connect(database, pragmas, read_only=False):
+    """创建新的数据库连接"""
+    # 连接会在请求线程之间复用，由连接池保证同一时刻只有一个线程使用
+    if read_only:
+        db = sqlite3.connect(f'file:{quote(database)}?mode=ro', uri=True, check_same_thread=False)
+        # 日志模式是数据库级别的设置，由写连接负责
+        pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    else:
+        db = sqlite3.connect(database, check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    register_functions(db)
+    _apply_pragmas(db, pragmas)
+    if read_only:
+        db.execute('PRAGMA query_only = 1')
+    return db
+
+
+def _apply_pragmas(db, pragmas):
+    """应用性能相关的 PRAGMA 设置"""
+    for name, value in pragmas.items():
+        # journal_mode 等 PRAGMA 会返回结果行，需要取出才算执行完成
+        db.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+def get_pragma_settings(db, pragmas):
+    """读取连接上实际生效的 PRAGMA 值"""
+    settings = {}
+    for name in pragmas:
+        row = db.execute(f'PRAGMA {name}').fetchone()
+        settings[name] = row[0] if row else None
+    return settings
+
+
+def maybe_checkpoint(db, app=None):
+    """距离上次检查点超过配置间隔时执行一次 WAL 检查点"""
+    app = app or current_app
+    interval = app.config['WAL_CHECKPOINT_INTERVAL']
+    state = app.extensions['db_wal']
+    if not interval or time.monotonic() - state['last_run'] < interval:
+        return
+    
+    # 同一进程内只需要一个线程执行
+    if not state['lock'].acquire(blocking=False):
+        return
+    try:
+        if time.monotonic() - state['last_run'] < interval:
+            return
+        mode = app.config['WAL_CHECKPOINT_MODE']
+        busy, log_pages, checkpointed = db.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        state['last_run'] = time.monotonic()
+        state['last_result'] = {
+            'mode': mode,
+            'busy': busy,
+            'log_pages': log_pages,
+            'checkpointed_pages': checkpointed,
+            'at': time.time(),
+        }
+    except sqlite3.Error as e:
+        app.logger.warning(f"WAL检查点执行失败: {e}")
+    finally:
+        state['lock'].release()
+
+
+def get_wal_status(app=None):
+    """返回最近一次 WAL 检查点结果"""
+    app = app or current_app
+    return app.extensions['db_wal']['last_result']
 
 
 def close_db(error):
-    """关闭数据库连接"""
-    if hasattr(g, '_database'):
-        g._database.close()
+    """归还数据库连接到连接池"""
+    write_db = g.pop('_write_database', None)
+    if write_db is not None:
+        if error is None:
+            maybe_checkpoint(write_db)
+        # 出现异常时连接状态不可信，直接丢弃
+        get_write_pool().release(write_db.raw, discard=error is not None)
+    
+    db = g.pop('_database', None)
+    if db is not None:
+        get_pool().release(db.raw, discard=error is not None)
 
 
 def init_db_connection(app):
-    """初始化数据库连接（注册teardown处理器）"""
+    """初始化数据库连接池（注册teardown处理器）"""
+    database = app.config['DATABASE']
+    pragmas = app.config['SQLITE_PRAGMAS']
+    app.extensions['db_pool'] = ConnectionPool(
+        lambda: _connect(database, pragmas, read_only=True),
+        max_size=app.config['DB_POOL_SIZE'],
+        max_idle=app.config['DB_POOL_MAX_IDLE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        health_check_interval=app.config['DB_POOL_HEALTH_CHECK_INTERVAL'],
+    )
+    app.extensions['db_write_pool'] = ConnectionPool(
+        lambda: _connect(database, pragmas),
+        max_size=app.config['DB_WRITE_POOL_SIZE'],
+        max_idle=app.config['DB_POOL_MAX_IDLE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        health_check_interval=app.config['DB_POOL_HEALTH_CHECK_INTERVAL'],
+    )
+    app.extensions['db_wal'] = {
+        'lock': threading.Lock(),
+        'last_run': time.monotonic(),
+        'last_result': None,
+    }
+    init_instrumentation(app)
     app.teardown_appcontext(close_db)
 
@@ -0,0 +1,20 @@
+"""
+自定义 SQL 函数
+
+应用连接和迁移连接（包括 init_db.py）在打开时注册。触发器不调用这些函数
+（全文索引和收藏的热度由应用写入，见迁移 0013、0014），没有注册的外部连接也可以写入提示词、标签和收藏。
+"""
+
+
+def register_functions(db):
+    """在连接上注册自定义 SQL 函数"""
+    # app.utils 包初始化时会导入 app.database，这里延迟导入避免循环依赖
+    from app.utils.text import segment_text, make_snippet
+    from app.utils.trending import trending_add
+    
+    # 全文搜索索引端分词（只在迁移 0006 初始化索引时使用，之后由 search_service 在应用中分词写入索引）
+    db.create_function('search_tokens', 1, segment_text, deterministic=True)
+    # 搜索结果摘要（只对当前页的结果计算）
+    db.create_function('search_snippet', 3, make_snippet, deterministic=True)
+    # 热度分数累加（浏览数批量写入、收藏事件；取当前时间，不是确定性函数）
+    db.create_function('trending_add', 4, trending_add)
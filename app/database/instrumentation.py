@@ -0,0 +1,105 @@
+"""
+SQL 执行统计
+
+get_db() 返回的连接经过包装，每条语句的执行耗时和次数按请求记录：
+- 超过阈值的慢查询写入日志（附带参数类型，不记录参数值）
+- 同一请求内重复执行同一语句模板超过阈值时视为 N+1 查询并告警
+- 开启调试统计时在响应头中返回计数
+"""
+import time
+from collections import Counter
+from flask import g, current_app, request
+
+
+class QueryStats:
+    """单个请求的 SQL 执行统计"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.templates = Counter()
+        self.slow_queries = []
+    
+    def record(self, sql, params, elapsed_ms, slow_ms):
+        template = ' '.join(sql.split())
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.templates[template] += 1
+        if elapsed_ms >= slow_ms:
+            self.slow_queries.append((template, param_shape(params), elapsed_ms))
+    
+    def n_plus_one_suspects(self, threshold):
+        """返回重复执行次数达到阈值的语句模板 [(模板, 次数)]"""
+        return [(sql, n) for sql, n in self.templates.most_common() if n >= threshold]
+
+
+def param_shape(params):
+    """参数的类型结构，例如 (int, str)"""
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return tuple(type(value).__name__ for value in params)
+
+
+class InstrumentedConnection:
+    """记录执行统计的连接包装，其余属性直接转发给原始连接"""
+    
+    def __init__(self, connection, stats, slow_ms):
+        self.raw = connection
+        self._stats = stats
+        self._slow_ms = slow_ms
+    
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        try:
+            return self.raw.execute(sql, params)
+        finally:
+            self._stats.record(sql, params, (time.perf_counter() - start) * 1000, self._slow_ms)
+    
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        try:
+            return self.raw.executemany(sql, seq_of_params)
+        finally:
+            self._stats.record(sql, None, (time.perf_counter() - start) * 1000, self._slow_ms)
+    
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def get_query_stats():
+    """获取当前请求的 SQL 统计"""
+    stats = getattr(g, '_query_stats', None)
+    if stats is None:
+        stats = g._query_stats = QueryStats()
+    return stats
+
+
+def instrument(connection):
+    """包装连接，统计写入当前请求"""
+    return InstrumentedConnection(
+        connection, get_query_stats(), current_app.config['SQL_SLOW_QUERY_MS']
+    )
+
+
+def init_instrumentation(app):
+    """注册请求结束时的日志和响应头处理"""
+    @app.after_request
+    def report_query_stats(response):
+        stats = getattr(g, '_query_stats', None)
+        if stats is None:
+            return response
+        
+        for template, shape, elapsed_ms in stats.slow_queries:
+            app.logger.warning(f"慢查询 {elapsed_ms:.1f}ms 参数类型{shape}: {template}")
+        
+        suspects = stats.n_plus_one_suspects(app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+        for template, count in suspects:
+            app.logger.warning(f"疑似N+1查询 {count}次 [{request.path}]: {template}")
+        
+        if app.config['SQL_DEBUG_HEADERS']:
+            response.headers['X-SQL-Count'] = str(stats.count)
+            response.headers['X-SQL-Time-Ms'] = f'{stats.total_ms:.2f}'
+            response.headers['X-SQL-N-Plus-One'] = str(len(suspects))
+        return response
@@ -0,0 +1,198 @@
+"""
+数据库版本迁移
+
+迁移脚本位于 migrations/ 目录，文件名格式为 NNNN_说明.sql，按编号顺序执行。
+已执行的迁移及其校验和记录在 schema_version 表中；应用启动时执行一次，
+请求处理过程中不再做任何表结构检查。
+
+命令行执行: python -m app.database [数据库路径]
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+from collections import namedtuple
+from app.database.functions import register_functions
+
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# 旧版本数据库可能已在请求中按需添加过字段，重复执行时忽略这类错误
+IGNORABLE_ERRORS = ('duplicate column name',)
+
+# 执行过之后又有意改写的迁移 {版本号: 改写前的校验和}：数据库中记录的是这些校验和时同样视为一致
+# 0005 原来创建 trigram 全文索引（需要 SQLite 3.34+），随即被 0006 替换，现已合并到 0006
+SUPERSEDED_CHECKSUMS = {
+    5: ('1e9ba2c8b7e9c23a496460e4245c571f7a2548126a4878de54acdb7652750aae',),
+}
+
+Migration = namedtuple('Migration', ['version', 'name', 'sql', 'checksum'])
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    """迁移执行失败或校验和不一致"""
+
+
+def load_migrations(directory):
+    """读取迁移目录中的全部迁移，按版本号排序"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            sql = f.read().replace('\r\n', '\n')
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode('utf-8')).hexdigest()
+        ))
+    
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f'迁移版本号重复: {versions}')
+    return migrations
+
+
+def split_statements(sql):
+    """将迁移脚本拆分为单条语句（支持触发器等包含分号的语句）"""
+    statements = []
+    buffer = ''
+    for line in sql.splitlines(keepends=True):
+        if not buffer and (not line.strip() or line.strip().startswith('--')):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    if buffer.strip():
+        raise MigrationError(f'迁移脚本中存在不完整的语句: {buffer.strip()[:80]}')
+    return statements
+
+
+def get_applied_migrations(db):
+    """返回已执行的迁移 {版本号: 校验和}"""
+    rows = db.execute('SELECT version, checksum FROM schema_version').fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def run_migrations(db, directory):
+    """执行所有未执行的迁移，返回本次执行的迁移列表"""
+    migrations = load_migrations(directory)
+    # 迁移脚本中的触发器和数据初始化会调用自定义函数
+    register_functions(db)
+    
+    previous_isolation = db.isolation_level
+    # 手动管理事务，避免 sqlite3 模块在 DDL 前后隐式提交
+    db.isolation_level = None
+    try:
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        _verify_checksums(get_applied_migrations(db), migrations)
+        
+        applied = []
+        for migration in migrations:
+            # 多个工作进程同时启动时，由写锁保证每个迁移只执行一次
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                if migration.version in get_applied_migrations(db):
+                    db.execute('COMMIT')
+                    continue
+                _apply(db, migration)
+                db.execute(
+                    'INSERT INTO schema_version (version, name, checksum) VALUES (?, ?, ?)',
+                    (migration.version, migration.name, migration.checksum)
+                )
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            applied.append(migration)
+            logger.info(f"已执行数据库迁移 {migration.version:04d}_{migration.name}")
+        
+        return applied
+    finally:
+        db.isolation_level = previous_isolation
+
+
+def _verify_checksums(applied, migrations):
+    """已执行的迁移脚本不允许再被修改"""
+    known = {m.version: m for m in migrations}
+    for version, checksum in applied.items():
+        migration = known.get(version)
+        if migration is None:
+            logger.warning(f"数据库中记录的迁移 {version:04d} 在迁移目录中不存在")
+        elif migration.checksum != checksum and checksum not in SUPERSEDED_CHECKSUMS.get(version, ()):
+            raise MigrationError(
+                f'迁移 {version:04d}_{migration.name} 在执行后被修改（校验和不一致），'
+                '请新增迁移脚本而不是修改已执行的脚本'
+            )
+
+
+def _apply(db, migration):
+    """逐条执行迁移语句"""
+    for statement in split_statements(migration.sql):
+        try:
+            db.execute(statement)
+        except sqlite3.OperationalError as e:
+            if any(message in str(e) for message in IGNORABLE_ERRORS):
+                logger.info(f"迁移 {migration.version:04d} 跳过已存在的变更: {e}")
+                continue
+            raise MigrationError(
+                f'迁移 {migration.version:04d}_{migration.name} 执行失败: {e}'
+            ) from e
+
+
+def migrate_database(app):
+    """应用启动时执行数据库迁移"""
+    from app.database.db import _connect
+    
+    database = app.config['DATABASE']
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    db = _connect(database, app.config['SQLITE_PRAGMAS'])
+    try:
+        applied = run_migrations(db, app.config['MIGRATIONS_DIR'])
+    finally:
+        db.close()
+    
+    if applied:
+        app.logger.info(f"数据库迁移完成，共执行 {len(applied)} 个迁移")
+    return applied
+
+
+def main(argv=None):
+    """命令行入口"""
+    from app.config import Config
+    from app.database.db import _connect
+    
+    argv = sys.argv[1:] if argv is None else argv
+    database = argv[0] if argv else Config.DATABASE
+    if not os.path.exists(database):
+        print(f"错误：数据库文件不存在: {database}")
+        print("请先运行 python init_db.py 初始化数据库")
+        return False
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    db = _connect(database, Config.SQLITE_PRAGMAS)
+    try:
+        applied = run_migrations(db, Config.MIGRATIONS_DIR)
+    except MigrationError as e:
+        print(f"✗ 迁移失败: {e}")
+        return False
+    finally:
+        db.close()
+    
+    print(f"✓ 数据库已是最新版本（本次执行 {len(applied)} 个迁移）")
+    return True
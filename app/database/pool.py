@@ -0,0 +1,162 @@
+"""
+SQLite 连接池
+
+每个进程持有一个有界连接池，请求结束时归还连接而不是关闭，
+以复用已预热的连接和页缓存。
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """等待空闲连接超时"""
+
+
+class ConnectionPool:
+    """有界、线程安全的 SQLite 连接池"""
+    
+    def __init__(self, connect, max_size=4, max_idle=300, timeout=10, health_check_interval=30):
+        """
+        :param connect: 创建新连接的工厂函数
+        :param max_size: 池中最多同时存在的连接数（含已借出的）
+        :param max_idle: 空闲超过该秒数的连接会被淘汰
+        :param timeout: 借用连接时最长等待秒数
+        :param health_check_interval: 空闲超过该秒数的连接在借出前执行健康检查
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        
+        self._idle = deque()  # (连接, 归还时间)
+        self._size = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._pid = os.getpid()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'evicted_idle': 0,
+            'evicted_unhealthy': 0,
+            'timeouts': 0,
+            'waits': 0,
+        }
+    
+    def acquire(self):
+        """借出一个连接，池满时阻塞等待"""
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+        
+        with self._cond:
+            while True:
+                self._evict_idle_locked()
+                
+                while self._idle:
+                    conn, released_at = self._idle.pop()
+                    if self._is_healthy(conn, released_at):
+                        self._stats['reused'] += 1
+                        return conn
+                    self._discard_locked(conn)
+                    self._stats['evicted_unhealthy'] += 1
+                
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(f'等待数据库连接超时（{self.timeout}秒）')
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+        
+        # 在锁外创建连接，避免阻塞其他线程
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+    
+    def release(self, conn, discard=False):
+        """归还连接；未提交的事务会被回滚"""
+        if os.getpid() != self._pid:
+            # fork 前借出的连接不属于当前进程的池
+            return
+        
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        
+        with self._cond:
+            if discard:
+                self._discard_locked(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard_locked(conn)
+            self._cond.notify_all()
+    
+    def stats(self):
+        """返回连接池统计信息"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            })
+        return stats
+    
+    def _is_healthy(self, conn, released_at):
+        """空闲较久的连接在借出前执行一次轻量检查"""
+        if time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _evict_idle_locked(self):
+        """淘汰空闲过久的连接（最久未用的在队首）"""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._discard_locked(conn)
+            self._stats['evicted_idle'] += 1
+    
+    def _discard_locked(self, conn):
+        self._size -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def _check_fork(self):
+        """fork 后子进程不能复用父进程的连接，重置连接池"""
+        if os.getpid() == self._pid:
+            return
+        with self._cond:
+            if os.getpid() != self._pid:
+                self._idle.clear()
+                self._size = 0
+                self._pid = os.getpid()
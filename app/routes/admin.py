@@ -2,8 +2,11 @@
 管理员相关路由
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
-from app.database import get_db
+from app.database import get_db, get_write_db
 from app.utils.decorators import admin_required
+from app.services.prompt_service import remove_prompts_from_indexes, sync_removed_prompts
+from app.services.tag_service import get_user_tag_names
+from app.services.duplicate_service import get_duplicate_clusters
 import random
 import string
 from flask import current_app
@@ -24,14 +27,15 @@ def invite_codes():
             quantity = int(request.form.get('quantity', 1))
             
             # 生成邀请码
+            write_db = get_write_db()
             for _ in range(quantity):
                 code = ''.join(random.choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(8))
-                db.execute(
+                write_db.execute(
                     'INSERT INTO invite_codes (code, creator_id) VALUES (?, ?)',
                     (code, session['user_id'])
                 )
             
-            db.commit()
+            write_db.commit()
             flash(f'成功生成 {quantity} 个邀请码', 'success')
     
     # 获取所有邀请码
@@ -50,7 +54,7 @@ def invite_codes():
 @admin_required
 def delete_invite_codes():
     """删除邀请码"""
-    db = get_db()
+    db = get_write_db()
     
     code_ids = request.form.getlist('code_ids')
     
@@ -84,6 +88,15 @@ def users():
     return render_template('admin/users.html', users=users)
 
 
+@bp.route('/duplicates')
+@admin_required
+def duplicates():
+    """近似重复的提示词（由 flask find-duplicates 生成）"""
+    clusters = get_duplicate_clusters(get_db())
+    
+    return render_template('admin/duplicates.html', clusters=clusters)
+
+
 @bp.route('/users/ban/<int:id>', methods=['POST'])
 @admin_required
 def ban_user(id):
@@ -101,12 +114,9 @@ def ban_user(id):
     
     is_banned = request.form.get('is_banned') == '1'
     
-    # 检查字段是否存在
-    if 'is_banned' not in [column[1] for column in db.execute('PRAGMA table_info(users)').fetchall()]:
-        db.execute('ALTER TABLE users ADD COLUMN is_banned BOOLEAN DEFAULT 0')
-    
-    db.execute('UPDATE users SET is_banned = ? WHERE id = ?', (is_banned, id))
-    db.commit()
+    write_db = get_write_db()
+    write_db.execute('UPDATE users SET is_banned = ? WHERE id = ?', (is_banned, id))
+    write_db.commit()
     
     if is_banned:
         flash(f'用户 {user["username"]} 已被封禁', 'success')
@@ -131,20 +141,23 @@ def delete_user(id):
         flash('不能删除管理员账号', 'danger')
         return redirect(url_for('admin.users'))
     
+    write_db = get_write_db()
     try:
         # 删除用户创建的提示词
-        prompts = db.execute('SELECT id FROM prompts WHERE user_id = ?', (id,)).fetchall()
-        for prompt in prompts:
-            db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (prompt['id'],))
+        prompt_ids = [row['id'] for row in write_db.execute('SELECT id FROM prompts WHERE user_id = ?', (id,))]
+        previous_tags = get_user_tag_names(write_db, id)
+        write_db.execute('DELETE FROM tags_prompts WHERE prompt_id IN (SELECT id FROM prompts WHERE user_id = ?)', (id,))
         
-        db.execute('DELETE FROM prompts WHERE user_id = ?', (id,))
-        db.execute('UPDATE invite_codes SET used_by = NULL WHERE used_by = ?', (id,))
-        db.execute('DELETE FROM users WHERE id = ?', (id,))
-        db.commit()
+        write_db.execute('DELETE FROM prompts WHERE user_id = ?', (id,))
+        write_db.execute('UPDATE invite_codes SET used_by = NULL WHERE used_by = ?', (id,))
+        write_db.execute('DELETE FROM users WHERE id = ?', (id,))
+        remove_prompts_from_indexes(write_db, prompt_ids)
+        write_db.commit()
+        sync_removed_prompts(write_db, prompt_ids, previous_tags)
         
         flash(f'用户 {user["username"]} 及其所有内容已被删除', 'success')
     except Exception as e:
-        db.rollback()
+        write_db.rollback()
         current_app.logger.error(f'删除用户时出错: {str(e)}')
         flash(f'删除用户时出错: {str(e)}', 'danger')
     
@@ -3,7 +3,7 @@
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.database import get_db
+from app.database import get_db, get_write_db
 from flask import current_app
 import datetime
 
@@ -107,23 +107,24 @@ def register():
             is_admin = db.execute('SELECT COUNT(*) as count FROM users').fetchone()['count'] == 0
             password_hash = generate_password_hash(password, method='pbkdf2:sha256')
             
+            write_db = get_write_db()
             try:
-                db.execute(
+                write_db.execute(
                     'INSERT INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)',
                     (username, email, password_hash, is_admin)
                 )
-                user_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+                user_id = write_db.execute('SELECT last_insert_rowid()').fetchone()[0]
                 
-                db.execute(
+                write_db.execute(
                     'UPDATE invite_codes SET is_used = 1, used_at = CURRENT_TIMESTAMP, used_by = ? WHERE code = ?',
                     (user_id, invite_code)
                 )
                 
-                db.commit()
+                write_db.commit()
                 flash('注册成功！现在您可以登录了', 'success')
                 return redirect(url_for('auth.login'))
             except Exception as e:
-                db.rollback()
+                write_db.rollback()
                 current_app.logger.error(f"注册用户时出错: {str(e)}")
                 flash('注册过程中出现错误', 'danger')
     
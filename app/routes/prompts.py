@@ -2,32 +2,25 @@
 提示词相关路由
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
-from app.database import get_db
+from app.database import get_db, get_write_db
 from app.utils.decorators import login_required
 from app.utils.helpers import format_datetime
-from app.services.tag_service import link_tags_to_prompt
+from app.services.tag_service import link_tags_to_prompt, get_prompt_tag_names
+from app.services.prompt_service import get_user_prompts, get_public_prompts, sync_prompt_indexes, PROMPT_ORDERINGS
+from app.services.search_service import search_prompts, get_tag_facets
+from app.services.semantic_service import semantic_available, semantic_index_ready, semantic_search
+from app.services.related_service import get_related_prompts
+from app.services.duplicate_service import find_duplicates, format_duplicate_warning
+from app.services.tag_index import get_tag_index, resolve_tag_filter
+from app.services.tag_postings import parse_tag_filter
+from app.services.view_counter import record_view, add_pending_views
+from app.utils.conditional import conditional_response
+from app.utils.trending import apply_trending_events
 from flask import current_app
 
 bp = Blueprint('prompts', __name__)
 
 
-def ensure_favorites_table():
-    """确保收藏表存在"""
-    db = get_db()
-    db.execute('''
-    CREATE TABLE IF NOT EXISTS favorites (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        prompt_id INTEGER NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        FOREIGN KEY (prompt_id) REFERENCES prompts (id),
-        UNIQUE(user_id, prompt_id)
-    )
-    ''')
-    db.commit()
-
-
 @bp.route('/create-prompt', methods=['GET', 'POST'])
 @bp.route('/prompts/create', methods=['GET', 'POST'])
 @login_required
@@ -50,7 +43,7 @@ def create():
         if error:
             flash(error, 'danger')
         else:
-            db = get_db()
+            db = get_write_db()
             
             # 插入提示词
             db.execute(
@@ -63,71 +56,34 @@ def create():
             link_tags_to_prompt(db, prompt_id, tag_names)
             
             db.commit()
+            sync_prompt_indexes(db, prompt_id)
             flash('提示词创建成功', 'success')
+            duplicates = find_duplicates(db, prompt_id, session['user_id'])
+            if duplicates:
+                flash(format_duplicate_warning(duplicates), 'warning')
             return redirect(url_for('prompts.my_prompts'))
     
-    # 获取所有标签，用于标签选择器
-    db = get_db()
-    tags = db.execute('SELECT name FROM tags ORDER BY name').fetchall()
+    # 常用标签，其余标签通过自动补全接口查询
+    popular_tags = get_tag_index(get_db()).top(current_app.config['TAG_SUGGESTION_COUNT'])
     
-    return render_template('prompts/create.html', tags=tags)
+    return render_template('prompts/create.html', popular_tags=popular_tags)
 
 
 @bp.route('/my-prompts')
 @login_required
 def my_prompts():
     """我的提示词列表"""
+    not_modified = conditional_response()
+    if not_modified:
+        return not_modified
+    
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 9
     
-    db = get_db()
-    
-    # 计算总数
-    total_count = db.execute(
-        'SELECT COUNT(*) as count FROM prompts WHERE user_id = ?',
-        (session['user_id'],)
-    ).fetchone()['count']
-    
-    # 计算总页数
-    total_pages = (total_count + per_page - 1) // per_page
-    
-    # 确保page在有效范围内
-    if page < 1:
-        page = 1
-    elif page > total_pages and total_pages > 0:
-        page = total_pages
-    
-    # 获取提示词数据
-    prompt_rows = db.execute(
-        'SELECT p.*, u.username FROM prompts p JOIN users u ON p.user_id = u.id WHERE p.user_id = ? ORDER BY p.created_at DESC LIMIT ? OFFSET ?',
-        (session['user_id'], per_page, (page - 1) * per_page)
-    ).fetchall()
-    
-    prompts = [dict(row) for row in prompt_rows]
-    
-    # 获取所有提示词的标签
-    for prompt in prompts:
-        tags = db.execute(
-            'SELECT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'WHERE tp.prompt_id = ?',
-            (prompt['id'],)
-        ).fetchall()
-        prompt['tags'] = tags
-        
-        # 格式化日期时间
-        if 'created_at' in prompt and prompt['created_at']:
-            prompt['created_at'] = format_datetime(prompt['created_at'])
-        if 'updated_at' in prompt and prompt['updated_at']:
-            prompt['updated_at'] = format_datetime(prompt['updated_at'])
+    result = get_user_prompts(session['user_id'], page=page, per_page=per_page, cursor=cursor)
     
-    return render_template(
-        'prompts/my_prompts.html', 
-        prompts=prompts,
-        current_page=page, 
-        total_pages=total_pages,
-        total_count=total_count
-    )
+    return render_template('prompts/my_prompts.html', per_page=per_page, **result)
 
 
 @bp.route('/prompts/<int:id>')
@@ -145,27 +101,11 @@ def view(id):
     
     prompt = dict(prompt)
     
-    # 格式化日期时间
-    if 'created_at' in prompt and prompt['created_at']:
-        prompt['created_at'] = format_datetime(prompt['created_at'])
-    if 'updated_at' in prompt and prompt['updated_at']:
-        prompt['updated_at'] = format_datetime(prompt['updated_at'])
-    
     # 检查权限
     if not prompt['is_public'] and ('user_id' not in session or session['user_id'] != prompt['user_id']):
         flash('您没有权限查看此提示词', 'danger')
         return redirect(url_for('main.index'))
     
-    # 获取标签
-    tags = db.execute(
-        'SELECT t.* FROM tags t JOIN tags_prompts tp ON t.id = tp.tag_id WHERE tp.prompt_id = ?',
-        (id,)
-    ).fetchall()
-    
-    # 更新浏览计数
-    db.execute('UPDATE prompts SET view_count = view_count + 1 WHERE id = ?', (id,))
-    db.commit()
-    
     # 检查当前用户是否已收藏该提示词
     is_favorited = False
     if 'user_id' in session:
@@ -175,7 +115,33 @@ def view(id):
         ).fetchone()
         is_favorited = favorite is not None
     
-    return render_template('prompts/view.html', prompt=prompt, tags=tags, is_favorited=is_favorited)
+    # 客户端缓存的页面仍然有效时直接返回 304（仍然记录浏览）
+    not_modified = conditional_response(prompt['updated_at'], is_favorited)
+    if not_modified:
+        record_view(id)
+        return not_modified
+    
+    # 格式化日期时间
+    if 'created_at' in prompt and prompt['created_at']:
+        prompt['created_at'] = format_datetime(prompt['created_at'])
+    if 'updated_at' in prompt and prompt['updated_at']:
+        prompt['updated_at'] = format_datetime(prompt['updated_at'])
+    
+    # 获取标签
+    tags = db.execute(
+        'SELECT t.* FROM tags t JOIN tags_prompts tp ON t.id = tp.tag_id WHERE tp.prompt_id = ?',
+        (id,)
+    ).fetchall()
+    
+    # 记录浏览（缓冲后批量写入）
+    record_view(id)
+    add_pending_views([prompt])
+    
+    # 相关提示词（预先计算，一次主键前缀查询）
+    related_prompts = get_related_prompts(db, id)
+    
+    return render_template('prompts/view.html', prompt=prompt, tags=tags, is_favorited=is_favorited,
+                           related_prompts=related_prompts)
 
 
 @bp.route('/edit-prompt/<int:id>', methods=['GET', 'POST'])
@@ -223,26 +189,35 @@ def edit(id):
         if error:
             flash(error, 'danger')
         else:
+            write_db = get_write_db()
+            
             # 更新提示词
-            db.execute(
+            write_db.execute(
                 'UPDATE prompts SET title = ?, content = ?, description = ?, version = ?, is_public = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
                 (title, content, description, version, is_public, id)
             )
             
             # 删除旧的标签关联
-            db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (id,))
+            previous_tags = get_prompt_tag_names(write_db, id)
+            write_db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (id,))
             
             # 添加新的标签关联
-            link_tags_to_prompt(db, id, tag_names)
+            link_tags_to_prompt(write_db, id, tag_names)
             
-            db.commit()
+            write_db.commit()
+            sync_prompt_indexes(write_db, id, previous_tags)
             flash('提示词更新成功', 'success')
+            duplicates = find_duplicates(write_db, id, session['user_id'])
+            if duplicates:
+                flash(format_duplicate_warning(duplicates), 'warning')
             return redirect(url_for('prompts.my_prompts'))
     
-    # 获取所有标签，用于标签选择器
-    all_tags = db.execute('SELECT name FROM tags ORDER BY name').fetchall()
+    # 常用标签，其余标签通过自动补全接口查询
+    popular_tags = get_tag_index(db).top(current_app.config['TAG_SUGGESTION_COUNT'])
     
-    return render_template('prompts/edit.html', prompt=prompt, current_tags=','.join(current_tag_names), all_tags=all_tags)
+    return render_template(
+        'prompts/edit.html', prompt=prompt, current_tags=','.join(current_tag_names), popular_tags=popular_tags
+    )
 
 
 @bp.route('/delete-prompt/<int:id>')
@@ -262,111 +237,91 @@ def delete(id):
         flash('您没有权限删除此提示词', 'danger')
         return redirect(url_for('prompts.my_prompts'))
     
+    write_db = get_write_db()
     try:
         # 删除提示词相关的标签关联
-        db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (id,))
+        previous_tags = get_prompt_tag_names(write_db, id)
+        write_db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (id,))
         
         # 删除提示词的收藏记录
-        db.execute('DELETE FROM favorites WHERE prompt_id = ?', (id,))
+        write_db.execute('DELETE FROM favorites WHERE prompt_id = ?', (id,))
         
         # 删除提示词
-        db.execute('DELETE FROM prompts WHERE id = ?', (id,))
+        write_db.execute('DELETE FROM prompts WHERE id = ?', (id,))
         
-        db.commit()
+        write_db.commit()
+        sync_prompt_indexes(write_db, id, previous_tags)
         flash('提示词已成功删除', 'success')
     except Exception as e:
-        db.rollback()
+        write_db.rollback()
         current_app.logger.error(f'删除提示词时出错: {str(e)}')
         flash(f'删除提示词时出错: {str(e)}', 'danger')
     
     return redirect(url_for('prompts.my_prompts'))
 
 
+def _tag_filter_url(tag_filter, **url_args):
+    """当前页面换成另一组筛选条件的地址（保留其他参数，从第一页开始）"""
+    args = request.args.to_dict(flat=False)
+    args.pop('page', None)
+    args.pop('cursor', None)
+    args.update(tag_filter.url_args(**url_args))
+    return url_for(request.endpoint, **args)
+
+
+def _redirect_corrected(tag_filter, corrections):
+    """标签名被模糊匹配纠正后重定向到使用正确标签名的地址（从第一页开始）"""
+    for name, resolved in corrections:
+        flash(f'没有找到标签“{name}”，已显示“{resolved}”的结果', 'info')
+    return redirect(_tag_filter_url(tag_filter))
+
+
+def _tag_suggestions(tag_filter, suggestions):
+    """不存在的标签的建议及替换后的地址 [(输入的标签名, [(建议的标签名, 地址)])]"""
+    return [
+        (name, [(candidate, _tag_filter_url(tag_filter, rename=(name, candidate))) for candidate in candidates])
+        for name, candidates in suggestions
+    ]
+
+
 @bp.route('/prompts/all')
 def all_prompts():
     """所有公开提示词"""
+    # 排序：latest 最新（默认）、trending 热度、popular 浏览最多
+    sort = request.args.get('sort', 'latest')
+    if sort not in PROMPT_ORDERINGS:
+        sort = 'latest'
+    # 热度和浏览数排序随浏览数批量写入变化（不改变页面版本号），验证器按写入间隔分段
+    interval = current_app.config['VIEW_COUNT_FLUSH_INTERVAL'] if sort != 'latest' else None
+    not_modified = conditional_response(interval=interval)
+    if not_modified:
+        return not_modified
+    
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     per_page = 12
-    tag_filter = request.args.get('tag', '')
+    # 标签筛选：tag 可重复（全部包含），any_tag 任一包含，not_tag 排除
+    tag_filter, corrections, suggestions = resolve_tag_filter(get_db(), parse_tag_filter(request.args))
+    if corrections:
+        return _redirect_corrected(tag_filter, corrections)
     
-    db = get_db()
+    result = get_public_prompts(
+        page=page, per_page=per_page, tag_filter=tag_filter, order_by=sort, cursor=cursor
+    )
     
-    if tag_filter:
-        total_count = db.execute(
-            'SELECT COUNT(DISTINCT p.id) as count FROM prompts p '
-            'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-            'JOIN tags t ON tp.tag_id = t.id '
-            'WHERE p.is_public = 1 AND t.name = ?',
-            (tag_filter,)
-        ).fetchone()['count']
-        
-        prompt_rows = db.execute(
-            'SELECT DISTINCT p.*, u.username FROM prompts p '
-            'JOIN users u ON p.user_id = u.id '
-            'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-            'JOIN tags t ON tp.tag_id = t.id '
-            'WHERE p.is_public = 1 AND t.name = ? '
-            'ORDER BY p.created_at DESC '
-            'LIMIT ? OFFSET ?',
-            (tag_filter, per_page, (page - 1) * per_page)
-        ).fetchall()
-    else:
-        total_count = db.execute(
-            'SELECT COUNT(*) as count FROM prompts WHERE is_public = 1'
-        ).fetchone()['count']
-        
-        prompt_rows = db.execute(
-            'SELECT p.*, u.username FROM prompts p '
-            'JOIN users u ON p.user_id = u.id '
-            'WHERE p.is_public = 1 '
-            'ORDER BY p.created_at DESC '
-            'LIMIT ? OFFSET ?',
-            (per_page, (page - 1) * per_page)
-        ).fetchall()
-    
-    total_pages = (total_count + per_page - 1) // per_page
-    
-    if page < 1:
-        page = 1
-    elif page > total_pages and total_pages > 0:
-        page = total_pages
-    
-    prompts = [dict(row) for row in prompt_rows]
-    
-    # 获取所有提示词的标签
-    for prompt in prompts:
-        tags = db.execute(
-            'SELECT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'WHERE tp.prompt_id = ?',
-            (prompt['id'],)
-        ).fetchall()
-        prompt['tags'] = tags
-        
-        # 格式化日期时间
-        if 'created_at' in prompt and prompt['created_at']:
-            prompt['created_at'] = format_datetime(prompt['created_at'])
-        if 'updated_at' in prompt and prompt['updated_at']:
-            prompt['updated_at'] = format_datetime(prompt['updated_at'])
-    
-    # 获取所有标签，用于筛选
-    all_tags = db.execute(
-        'SELECT t.*, COUNT(tp.prompt_id) as count FROM tags t '
-        'JOIN tags_prompts tp ON t.id = tp.tag_id '
-        'JOIN prompts p ON tp.prompt_id = p.id '
-        'WHERE p.is_public = 1 '
-        'GROUP BY t.id '
-        'ORDER BY count DESC'
-    ).fetchall()
+    # 当前筛选条件下的标签分面（没有筛选时为热门标签）
+    facets = get_tag_facets(tag_filter=tag_filter)
     
     return render_template(
         'prompts/all.html', 
-        prompts=prompts,
-        tags=all_tags,
-        current_page=page, 
-        total_pages=total_pages,
-        total_count=total_count,
-        current_tag=tag_filter
+        facets=facets,
+        tag_filter=tag_filter,
+        tag_suggestions=_tag_suggestions(tag_filter, suggestions),
+        sort=sort,
+        # 默认排序不出现在链接中
+        sort_arg=None if sort == 'latest' else sort,
+        per_page=per_page,
+        **result
     )
 
 
@@ -386,148 +341,93 @@ def toggle_favorite(id):
     if not prompt['is_public'] and prompt['user_id'] != user_id:
         return jsonify({'success': False, 'message': '无法收藏私有提示词'}), 403
     
-    # 检查是否已收藏
-    existing = db.execute(
+    # 检查是否已收藏（在写连接上读取，保证与后续写入一致）
+    write_db = get_write_db()
+    existing = write_db.execute(
         'SELECT * FROM favorites WHERE user_id = ? AND prompt_id = ?',
         (user_id, id)
     ).fetchone()
     
     try:
         if existing:
-            db.execute(
+            write_db.execute(
                 'DELETE FROM favorites WHERE user_id = ? AND prompt_id = ?',
                 (user_id, id)
             )
             is_favorited = False
             action = '取消收藏'
         else:
-            db.execute(
+            write_db.execute(
                 'INSERT INTO favorites (user_id, prompt_id) VALUES (?, ?)',
                 (user_id, id)
             )
+            # 收藏事件累加到热度分数
+            apply_trending_events(write_db)
             is_favorited = True
             action = '收藏'
         
-        db.commit()
+        write_db.commit()
         return jsonify({
             'success': True, 
             'is_favorited': is_favorited,
             'message': f'成功{action}提示词'
         })
     except Exception as e:
-        db.rollback()
+        write_db.rollback()
         current_app.logger.error(f'收藏操作失败: {str(e)}')
         return jsonify({'success': False, 'message': f'操作失败: {str(e)}'}), 500
 
 
+@bp.route('/api/tags/autocomplete')
+@login_required
+def tag_autocomplete():
+    """标签自动补全：按前缀返回使用次数最多的标签"""
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', current_app.config['TAG_AUTOCOMPLETE_LIMIT'], type=int), 50)
+    
+    matches = get_tag_index(get_db()).complete(prefix, limit=limit)
+    return jsonify({'tags': [{'name': name, 'count': count} for name, count in matches]})
+
+
 @bp.route('/search')
 def search():
     """搜索提示词"""
+    # 语义索引在各进程的内存中增量更新，结果不完全由页面版本号决定，不做条件处理
+    if request.args.get('mode') != 'semantic':
+        not_modified = conditional_response()
+        if not_modified:
+            return not_modified
+    
     query = request.args.get('q', '')
-    tag = request.args.get('tag', '')
+    tag_filter, corrections, suggestions = resolve_tag_filter(get_db(), parse_tag_filter(request.args))
+    if corrections:
+        return _redirect_corrected(tag_filter, corrections)
+    page = request.args.get('page', 1, type=int)
     
-    db = get_db()
+    if not query and not tag_filter:
+        return redirect(url_for('main.index'))
     
-    if 'user_id' in session:
-        user_id = session['user_id']
-        if query and tag:
-            prompts = db.execute(
-                'SELECT DISTINCT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-                'JOIN tags t ON tp.tag_id = t.id '
-                'WHERE (p.is_public = 1 OR p.user_id = ?) AND t.name = ? '
-                'AND (p.title LIKE ? OR p.content LIKE ? OR p.description LIKE ?) '
-                'ORDER BY p.created_at DESC',
-                (user_id, tag, f'%{query}%', f'%{query}%', f'%{query}%')
-            ).fetchall()
-        elif query:
-            prompts = db.execute(
-                'SELECT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'WHERE (p.is_public = 1 OR p.user_id = ?) '
-                'AND (p.title LIKE ? OR p.content LIKE ? OR p.description LIKE ?) '
-                'ORDER BY p.created_at DESC',
-                (user_id, f'%{query}%', f'%{query}%', f'%{query}%')
-            ).fetchall()
-        elif tag:
-            prompts = db.execute(
-                'SELECT DISTINCT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-                'JOIN tags t ON tp.tag_id = t.id '
-                'WHERE (p.is_public = 1 OR p.user_id = ?) AND t.name = ? '
-                'ORDER BY p.created_at DESC',
-                (user_id, tag)
-            ).fetchall()
-        else:
-            return redirect(url_for('main.index'))
-        
-        tags = db.execute(
-            'SELECT DISTINCT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'JOIN prompts p ON tp.prompt_id = p.id '
-            'WHERE p.is_public = 1 OR p.user_id = ? '
-            'ORDER BY t.name',
-            (user_id,)
-        ).fetchall()
+    # 未登录用户只能搜索公开的提示词
+    user_id = session.get('user_id')
+    
+    # 语义搜索需要关键词和 NumPy，否则使用关键词搜索
+    semantic_enabled = semantic_available()
+    mode = request.args.get('mode', 'keyword')
+    if mode == 'semantic' and semantic_enabled and query.strip() and not semantic_index_ready():
+        # 索引在后台构建，不让请求等待
+        flash('语义索引正在构建，暂时显示关键词搜索的结果', 'info')
+        mode = 'keyword'
+    if mode == 'semantic' and semantic_enabled and query.strip():
+        result = semantic_search(query, tag_filter=tag_filter, user_id=user_id, page=page)
+        facets = []
     else:
-        # 未登录用户只能搜索公开的提示词
-        if query and tag:
-            prompts = db.execute(
-                'SELECT DISTINCT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-                'JOIN tags t ON tp.tag_id = t.id '
-                'WHERE p.is_public = 1 AND t.name = ? '
-                'AND (p.title LIKE ? OR p.content LIKE ? OR p.description LIKE ?) '
-                'ORDER BY p.created_at DESC',
-                (tag, f'%{query}%', f'%{query}%', f'%{query}%')
-            ).fetchall()
-        elif query:
-            prompts = db.execute(
-                'SELECT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'WHERE p.is_public = 1 '
-                'AND (p.title LIKE ? OR p.content LIKE ? OR p.description LIKE ?) '
-                'ORDER BY p.created_at DESC',
-                (f'%{query}%', f'%{query}%', f'%{query}%')
-            ).fetchall()
-        elif tag:
-            prompts = db.execute(
-                'SELECT DISTINCT p.*, u.username FROM prompts p '
-                'JOIN users u ON p.user_id = u.id '
-                'JOIN tags_prompts tp ON p.id = tp.prompt_id '
-                'JOIN tags t ON tp.tag_id = t.id '
-                'WHERE p.is_public = 1 AND t.name = ? '
-                'ORDER BY p.created_at DESC',
-                (tag,)
-            ).fetchall()
-        else:
-            return redirect(url_for('main.index'))
-        
-        tags = db.execute(
-            'SELECT DISTINCT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'JOIN prompts p ON tp.prompt_id = p.id '
-            'WHERE p.is_public = 1 '
-            'ORDER BY t.name'
-        ).fetchall()
-    
-    # 为每个prompt添加标签信息
-    prompts_with_tags = []
-    for prompt_row in prompts:
-        prompt = dict(prompt_row)
-        prompt_tags = db.execute(
-            'SELECT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'WHERE tp.prompt_id = ?',
-            (prompt['id'],)
-        ).fetchall()
-        prompt['tags'] = prompt_tags
-        prompts_with_tags.append(prompt)
-    
-    prompts = prompts_with_tags
-    
-    return render_template('search.html', prompts=prompts, tags=tags, query=query, selected_tag=tag)
+        mode = 'keyword'
+        result = search_prompts(query, tag_filter=tag_filter, user_id=user_id, page=page)
+        facets = get_tag_facets(query, tag_filter=tag_filter, user_id=user_id)
+    
+    return render_template(
+        'search.html', query=query, tag_filter=tag_filter, facets=facets,
+        tag_suggestions=_tag_suggestions(tag_filter, suggestions),
+        mode=mode, semantic_enabled=semantic_enabled, **result
+    )
 
@@ -3,12 +3,15 @@
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.database import get_db
+from app.database import get_db, get_write_db
 from app.utils.decorators import login_required
 from app.utils.helpers import format_datetime
 from app.utils.file_upload import save_avatar
 from app.utils.encryption import encrypt_string, decrypt_string
 from app.services.ai.factory import AIClientFactory
+from app.services.stats_service import get_user_stats
+from app.services.tag_service import attach_tags
+from app.services.view_counter import add_pending_views
 from flask import current_app
 import datetime
 
@@ -40,39 +43,19 @@ def profile(user_id):
             ORDER BY f.created_at DESC
         ''', (user_id,)).fetchall()
         
-        prompts = [dict(row) for row in prompt_rows] if prompt_rows else []
+        prompts = add_pending_views([dict(row) for row in prompt_rows]) if prompt_rows else []
         
-        # 获取用户提示词浏览量总数
-        views_count_result = db.execute('''
-            SELECT COALESCE(SUM(view_count), 0) as total_views 
-            FROM prompts 
-            WHERE user_id = ?
-        ''', (user_id,)).fetchone()
-        views_count = views_count_result['total_views'] if views_count_result else 0
+        # 浏览量、收藏数、提示词数直接读取计数表
+        user_stats = get_user_stats(user_id)
+        views_count = user_stats['view_count']
+        likes_count = user_stats['favorite_count']
+        prompts_count = user_stats['prompt_count']
         
-        # 获取用户收藏的提示词数量
-        likes_count_result = db.execute('''
-            SELECT COUNT(*) as count FROM favorites WHERE user_id = ?
-        ''', (user_id,)).fetchone()
-        likes_count = likes_count_result['count'] if likes_count_result else 0
+        # 批量加载标签
+        attach_tags(db, prompts, names_only=True)
         
-        # 获取用户创建的提示词数量
-        prompts_count_result = db.execute('''
-            SELECT COUNT(*) as count FROM prompts WHERE user_id = ?
-        ''', (user_id,)).fetchone()
-        prompts_count = prompts_count_result['count'] if prompts_count_result else 0
-        
-        # 为每个提示词加载标签
         for prompt in prompts:
             try:
-                tags = db.execute('''
-                    SELECT t.name 
-                    FROM tags t 
-                    JOIN tags_prompts tp ON t.id = tp.tag_id 
-                    WHERE tp.prompt_id = ?
-                ''', (prompt['id'],)).fetchall()
-                prompt['tags'] = [tag['name'] for tag in tags] if tags else []
-                
                 # 格式化日期时间
                 if 'created_at' in prompt and prompt['created_at']:
                     prompt['created_at'] = format_datetime(prompt['created_at'])
@@ -159,9 +142,10 @@ def edit_profile():
         if error:
             flash(error, 'danger')
         else:
+            write_db = get_write_db()
             try:
                 if config:
-                    db.execute('''
+                    write_db.execute('''
                         UPDATE ai_configs SET
                             provider = ?, api_key = ?, base_url = ?, model = ?,
                             temperature = ?, max_tokens = ?, enabled = ?,
@@ -173,7 +157,7 @@ def edit_profile():
                         user_id
                     ))
                 else:
-                    db.execute('''
+                    write_db.execute('''
                         INSERT INTO ai_configs (
                             user_id, provider, api_key, base_url, model,
                             temperature, max_tokens, enabled
@@ -183,12 +167,12 @@ def edit_profile():
                         temperature, max_tokens, enabled
                     ))
                 
-                db.commit()
+                write_db.commit()
                 flash('AI 设置已保存', 'success')
                 return redirect(url_for('user.edit_profile', tab='ai'))
                 
             except Exception as e:
-                db.rollback()
+                write_db.rollback()
                 current_app.logger.error(f'保存 AI 设置失败: {str(e)}')
                 flash(f'保存失败: {str(e)}', 'danger')
     
@@ -231,37 +215,38 @@ def edit_profile():
         if error:
             flash(error, 'danger')
         else:
+            write_db = get_write_db()
             try:
                 avatar_url = None
                 if avatar_file and avatar_file.filename:
                     avatar_url = save_avatar(avatar_file)
                 
                 if avatar_url:
-                    db.execute(
+                    write_db.execute(
                         'UPDATE users SET username = ?, email = ?, avatar_url = ? WHERE id = ?',
                         (username, email, avatar_url, user_id)
                     )
                     session['avatar_url'] = avatar_url
                 else:
-                    db.execute(
+                    write_db.execute(
                         'UPDATE users SET username = ?, email = ? WHERE id = ?',
                         (username, email, user_id)
                     )
                 
                 if new_password:
                     hashed_password = generate_password_hash(new_password, method='pbkdf2:sha256')
-                    db.execute(
+                    write_db.execute(
                         'UPDATE users SET password_hash = ? WHERE id = ?',
                         (hashed_password, user_id)
                     )
                 
-                db.commit()
+                write_db.commit()
                 flash('个人资料已更新', 'success')
                 session['username'] = username
                 
                 return redirect(url_for('user.profile', user_id=user_id))
             except Exception as e:
-                db.rollback()
+                write_db.rollback()
                 current_app.logger.error(f'更新个人资料失败: {str(e)}')
                 flash(f'更新失败: {str(e)}', 'danger')
     
@@ -1,7 +1,9 @@
 """
 管理员业务逻辑
 """
-from app.database import get_db
+from app.database import get_db, get_write_db
+from app.services.prompt_service import remove_prompts_from_indexes, sync_removed_prompts
+from app.services.tag_service import get_user_tag_names
 import random
 import string
 
@@ -9,7 +11,7 @@ import string
 def generate_invite_code(creator_id):
     """生成单个邀请码"""
     code = ''.join(random.choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(8))
-    db = get_db()
+    db = get_write_db()
     db.execute(
         'INSERT INTO invite_codes (code, creator_id) VALUES (?, ?)',
         (code, creator_id)
@@ -21,7 +23,7 @@ def generate_invite_code(creator_id):
 def generate_invite_codes(creator_id, quantity):
     """批量生成邀请码"""
     codes = []
-    db = get_db()
+    db = get_write_db()
     
     for _ in range(quantity):
         code = ''.join(random.choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(8))
@@ -51,7 +53,7 @@ def get_all_invite_codes():
 
 def delete_invite_codes(code_ids):
     """删除邀请码"""
-    db = get_db()
+    db = get_write_db()
     
     if not code_ids:
         return 0
@@ -77,7 +79,7 @@ def get_all_users():
 
 def ban_user(user_id, is_banned):
     """封禁/解封用户"""
-    db = get_db()
+    db = get_write_db()
     
     user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
     if not user:
@@ -86,11 +88,6 @@ def ban_user(user_id, is_banned):
     if user['is_admin']:
         raise PermissionError('不能封禁管理员账号')
     
-    # 检查字段是否存在
-    columns = [column[1] for column in db.execute('PRAGMA table_info(users)').fetchall()]
-    if 'is_banned' not in columns:
-        db.execute('ALTER TABLE users ADD COLUMN is_banned BOOLEAN DEFAULT 0')
-    
     db.execute('UPDATE users SET is_banned = ? WHERE id = ?', (is_banned, user_id))
     db.commit()
     
@@ -99,7 +96,7 @@ def ban_user(user_id, is_banned):
 
 def delete_user(user_id):
     """删除用户"""
-    db = get_db()
+    db = get_write_db()
     
     user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
     if not user:
@@ -110,15 +107,17 @@ def delete_user(user_id):
     
     try:
         # 删除用户创建的提示词
-        prompts = db.execute('SELECT id FROM prompts WHERE user_id = ?', (user_id,)).fetchall()
-        for prompt in prompts:
-            db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (prompt['id'],))
+        prompt_ids = [row['id'] for row in db.execute('SELECT id FROM prompts WHERE user_id = ?', (user_id,))]
+        previous_tags = get_user_tag_names(db, user_id)
+        db.execute('DELETE FROM tags_prompts WHERE prompt_id IN (SELECT id FROM prompts WHERE user_id = ?)', (user_id,))
         
         db.execute('DELETE FROM prompts WHERE user_id = ?', (user_id,))
         db.execute('UPDATE invite_codes SET used_by = NULL WHERE used_by = ?', (user_id,))
         db.execute('DELETE FROM favorites WHERE user_id = ?', (user_id,))
         db.execute('DELETE FROM users WHERE id = ?', (user_id,))
+        remove_prompts_from_indexes(db, prompt_ids)
         db.commit()
+        sync_removed_prompts(db, prompt_ids, previous_tags)
         
         return dict(user)
     except Exception as e:
@@ -0,0 +1,254 @@
+"""
+近似重复提示词检测（MinHash + LSH）
+
+提示词的标题和内容按搜索分词（app/utils/text.py）切分，每连续 SHINGLE_SIZE 个词作为一个片段，
+用 NUM_PERMUTATIONS 个哈希函数计算 MinHash 签名：两个签名中相等位置的比例是片段集合 Jaccard 系数的无偏估计。
+签名保存在 prompt_minhash 表中，并分为 LSH_BANDS 段、每段 LSH_ROWS 个值，每段的哈希作为键写入 prompt_lsh 表。
+Jaccard 系数为 s 的两个提示词至少有一段相同的概率为 1 - (1 - s^LSH_ROWS)^LSH_BANDS（s = 0.8 时约 99.9%），
+查找时只需按 LSH_BANDS 个键做索引查找，再用签名估计的相似度过滤候选，不需要与全部提示词比较。
+
+创建或编辑提示词后提示可能重复的提示词（只包含该用户能看到的）。
+管理员批量任务（flask find-duplicates）先补齐缺少的签名，再按键顺序流式扫描 prompt_lsh 表，
+每个桶只保留有限个代表签名，用并查集合并相似的提示词，结果写入 duplicate_clusters 表，在管理后台查看。
+"""
+import json
+import random
+import struct
+import zlib
+from flask import current_app
+from app.utils.text import segment_text
+
+# 签名长度 = 段数 × 每段的值数
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = 4
+# 片段包含的连续词数
+SHINGLE_SIZE = 3
+# 一次查找最多检查的候选数
+MAX_CANDIDATES = 500
+# 批量任务：每批补齐的签名数、每个桶保留的代表数
+BACKFILL_BATCH = 500
+MAX_REPRESENTATIVES = 20
+
+# 哈希函数 h(x) = ((a * x + b) mod 2^64) >> 32（multiply-shift，a 为奇数）
+_MASK = (1 << 64) - 1
+
+SIGNATURE_FORMAT = f'<{NUM_PERMUTATIONS}I'
+
+
+def _make_permutations(seed=20240601):
+    """生成哈希函数的系数（固定种子，各进程和重启后签名一致）"""
+    rng = random.Random(seed)
+    return [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(NUM_PERMUTATIONS)]
+
+
+PERMUTATIONS = _make_permutations()
+
+
+def compute_signature(title, content):
+    """计算 MinHash 签名（元组），没有可用的词时返回 None"""
+    tokens = segment_text(f'{title or ""} {content or ""}').split()
+    if not tokens:
+        return None
+    size = min(SHINGLE_SIZE, len(tokens))
+    shingles = {
+        zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    }
+    return tuple(min([((a * x + b) & _MASK) >> 32 for x in shingles]) for a, b in PERMUTATIONS)
+
+
+def estimate_similarity(a, b):
+    """由两个签名估计 Jaccard 系数"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERMUTATIONS
+
+
+def band_keys(signature):
+    """签名各段的键：段号 << 32 | 该段的哈希"""
+    return [
+        (band << 32) | zlib.crc32(struct.pack(f'<{LSH_ROWS}I', *signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+        for band in range(LSH_BANDS)
+    ]
+
+
+def _pack(signature):
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+
+def _unpack(blob):
+    return struct.unpack(SIGNATURE_FORMAT, blob)
+
+
+def _store_signature(db, prompt_id, signature):
+    """写入（或删除）一个提示词的签名和键"""
+    db.execute('DELETE FROM prompt_lsh WHERE prompt_id = ?', (prompt_id,))
+    if signature is None:
+        db.execute('DELETE FROM prompt_minhash WHERE prompt_id = ?', (prompt_id,))
+        return
+    db.execute(
+        'INSERT OR REPLACE INTO prompt_minhash (prompt_id, signature) VALUES (?, ?)',
+        (prompt_id, _pack(signature))
+    )
+    db.executemany(
+        'INSERT INTO prompt_lsh (band_key, prompt_id) VALUES (?, ?)',
+        [(key, prompt_id) for key in band_keys(signature)]
+    )
+
+
+def sync_prompt_minhash(db, prompt_id):
+    """提示词写入并提交后更新它的签名（在写连接上调用并提交，提示词已删除时由触发器清理）"""
+    prompt = db.execute('SELECT title, content FROM prompts WHERE id = ?', (prompt_id,)).fetchone()
+    if prompt is None:
+        return
+    _store_signature(db, prompt_id, compute_signature(prompt['title'], prompt['content']))
+    db.commit()
+
+
+def find_duplicates(db, prompt_id, user_id=None, limit=5):
+    """
+    查找与提示词近似重复的提示词（公开的，或属于 user_id 的）
+    
+    :return: [dict(id, title, similarity)]，按相似度降序
+    """
+    row = db.execute('SELECT signature FROM prompt_minhash WHERE prompt_id = ?', (prompt_id,)).fetchone()
+    if row is None:
+        return []
+    signature = _unpack(row['signature'])
+    threshold = current_app.config['DUPLICATE_THRESHOLD']
+    
+    rows = db.execute(
+        'SELECT p.id, p.title, p.user_id, p.is_public, m.signature FROM prompt_minhash m '
+        'JOIN prompts p ON p.id = m.prompt_id WHERE m.prompt_id IN ('
+        'SELECT prompt_id FROM prompt_lsh WHERE band_key IN (SELECT value FROM json_each(?)) AND prompt_id != ? LIMIT ?)',
+        (json.dumps(band_keys(signature)), prompt_id, MAX_CANDIDATES)
+    )
+    duplicates = []
+    for candidate in rows:
+        if not candidate['is_public'] and candidate['user_id'] != user_id:
+            continue
+        similarity = estimate_similarity(signature, _unpack(candidate['signature']))
+        if similarity >= threshold:
+            duplicates.append({'id': candidate['id'], 'title': candidate['title'], 'similarity': similarity})
+    duplicates.sort(key=lambda duplicate: (-duplicate['similarity'], duplicate['id']))
+    return duplicates[:limit]
+
+
+def format_duplicate_warning(duplicates):
+    """重复提示的文字"""
+    items = '、'.join(f"《{duplicate['title']}》（相似度 {duplicate['similarity']:.0%}）" for duplicate in duplicates)
+    return f'该提示词可能与已有的提示词重复：{items}'
+
+
+def backfill_signatures(db):
+    """为缺少签名的提示词分批计算签名，返回计算的数量"""
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            'SELECT p.id, p.title, p.content FROM prompts p WHERE p.id > ? '
+            'AND NOT EXISTS (SELECT 1 FROM prompt_minhash m WHERE m.prompt_id = p.id) ORDER BY p.id LIMIT ?',
+            (last_id, BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            return count
+        for row in rows:
+            _store_signature(db, row['id'], compute_signature(row['title'], row['content']))
+        db.commit()
+        last_id = rows[-1]['id']
+        count += len(rows)
+
+
+class _DisjointSet:
+    """并查集（只记录出现在重复对中的提示词，根为最小的 ID）"""
+    
+    def __init__(self):
+        self.parent = {}
+    
+    def find(self, item):
+        root = item
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if root_a > root_b:
+            root_a, root_b = root_b, root_a
+        self.parent.setdefault(root_a, root_a)
+        self.parent[root_b] = root_a
+    
+    def groups(self):
+        """{根: [成员]}"""
+        groups = {}
+        for item in list(self.parent):
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
+
+
+def cluster_duplicates(db, threshold=None):
+    """
+    对全部提示词聚类近似重复，结果写入 duplicate_clusters 表
+    
+    按键顺序流式读取 prompt_lsh（连同签名），同一个键的提示词依次与桶中的代表比较，
+    相似则合并，否则成为新的代表（每个桶最多 MAX_REPRESENTATIVES 个）；内存只与重复的提示词数有关
+    :return: (簇数, 簇中的提示词数)
+    """
+    threshold = threshold or current_app.config['DUPLICATE_THRESHOLD']
+    backfill_signatures(db)
+    
+    clusters = _DisjointSet()
+    key, representatives = None, []
+    rows = db.execute(
+        'SELECT l.band_key, l.prompt_id, m.signature FROM prompt_lsh l '
+        'JOIN prompt_minhash m ON m.prompt_id = l.prompt_id ORDER BY l.band_key'
+    )
+    for band_key, prompt_id, blob in rows:
+        signature = _unpack(blob)
+        if band_key != key:
+            key, representatives = band_key, [(prompt_id, signature)]
+            continue
+        for representative_id, representative in representatives:
+            if estimate_similarity(signature, representative) >= threshold:
+                clusters.union(representative_id, prompt_id)
+                break
+        else:
+            if len(representatives) < MAX_REPRESENTATIVES:
+                representatives.append((prompt_id, signature))
+    
+    groups = clusters.groups()
+    db.execute('DELETE FROM duplicate_clusters')
+    for root, members in groups.items():
+        signatures = {
+            row['prompt_id']: _unpack(row['signature']) for row in db.execute(
+                'SELECT prompt_id, signature FROM prompt_minhash WHERE prompt_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(members),)
+            )
+        }
+        db.executemany(
+            'INSERT INTO duplicate_clusters (prompt_id, cluster_id, similarity) VALUES (?, ?, ?)',
+            [(member, root, estimate_similarity(signatures[member], signatures[root])) for member in members]
+        )
+    db.commit()
+    return len(groups), sum(len(members) for members in groups.values())
+
+
+def get_duplicate_clusters(db, limit=50):
+    """读取最大的 limit 个重复簇 [dict(cluster_id, prompts)]，簇内按相似度降序"""
+    rows = db.execute(
+        'SELECT d.cluster_id, d.similarity, p.id, p.title, p.is_public, p.created_at, u.username '
+        'FROM duplicate_clusters d JOIN prompts p ON p.id = d.prompt_id JOIN users u ON u.id = p.user_id '
+        'WHERE d.cluster_id IN (SELECT cluster_id FROM duplicate_clusters GROUP BY cluster_id '
+        'ORDER BY COUNT(*) DESC, cluster_id LIMIT ?) '
+        'ORDER BY d.cluster_id, d.similarity DESC, p.id',
+        (limit,)
+    ).fetchall()
+    clusters = {}
+    for row in rows:
+        clusters.setdefault(row['cluster_id'], []).append(dict(row))
+    result = [{'cluster_id': cluster_id, 'prompts': prompts} for cluster_id, prompts in clusters.items()]
+    result.sort(key=lambda cluster: (-len(cluster['prompts']), cluster['cluster_id']))
+    return result
@@ -0,0 +1,68 @@
+"""
+提示词卡片片段缓存
+
+列表页反复渲染相同提示词的卡片，渲染好的卡片 HTML 按
+(变体, 提示词 ID, updated_at, 卡片显示内容的 BLAKE2 摘要) 缓存在每个进程的 LRU 缓存中，总大小不超过 FRAGMENT_CACHE_MAX_BYTES。
+显示内容包括标题、描述、公开状态、作者、标签，以及摘要、相似度、收藏时间等随页面变化的字段，
+任何一项变化都会得到新的键，旧片段不再被读取，最终被 LRU 淘汰。
+摘要取 128 位（不会因为碰撞返回其他内容的卡片），键的大小固定，不会让描述、摘要等长文本在缓存的字节上限之外占用内存。
+浏览数变化最频繁，不进入缓存键：卡片宏在浏览数的位置输出 views_slot 标记，缓存的是以标记为界切开的几段 HTML，
+组装页面时在切口处填入当前浏览数（只做拼接，不在整段 HTML 中查找替换）。
+"""
+import hashlib
+from flask import current_app
+from markupsafe import Markup
+from app.utils.cache import LRUCache
+
+CARD_TEMPLATE = 'prompts/_cards.html'
+# 影响卡片显示的字段（浏览数除外）
+CARD_FIELDS = ('title', 'description', 'is_public', 'username', 'created_at', 'snippet', 'score', 'favorited_at')
+# 浏览数的位置（HTML 注释形式，经过转义的用户输入中不会出现）
+VIEWS_SLOT = Markup('<!--views-->')
+
+
+def _card_key(variant, prompt):
+    """缓存键"""
+    tags = tuple(tag if isinstance(tag, str) else tag['name'] for tag in prompt.get('tags') or ())
+    fields = tuple(prompt.get(field) for field in CARD_FIELDS)
+    digest = hashlib.blake2b(repr((fields, tags)).encode('utf-8'), digest_size=16).digest()
+    return variant, prompt['id'], str(prompt.get('updated_at')), digest
+
+
+def _parts_size(parts):
+    """缓存条目（切开的几段 HTML）按 UTF-8 编码后的字节数"""
+    return sum(len(part.encode('utf-8')) for part in parts)
+
+
+def prompt_card(variant, prompt):
+    """
+    渲染提示词卡片（模板全局函数），返回可直接输出的 HTML
+    
+    :param variant: 卡片变体，对应 CARD_TEMPLATE 中的 <变体>_card 宏（public、owner、search、favorite）
+    """
+    cache = get_fragment_cache()
+    key = _card_key(variant, prompt)
+    parts = cache.get(key)
+    if parts is None:
+        macro = getattr(current_app.jinja_env.get_template(CARD_TEMPLATE).module, f'{variant}_card')
+        parts = tuple(str(macro(prompt)).split(VIEWS_SLOT))
+        cache.set(key, parts)
+    return Markup(str(prompt.get('view_count') or 0).join(parts))
+
+
+def get_fragment_cache(app=None):
+    """获取当前应用的片段缓存"""
+    app = app or current_app
+    return app.extensions['fragment_cache']
+
+
+def init_fragment_cache(app):
+    """初始化片段缓存，并注册模板全局函数 prompt_card 和浏览数标记 views_slot"""
+    app.extensions['fragment_cache'] = LRUCache(
+        max_entries=app.config['FRAGMENT_CACHE_MAX_ENTRIES'],
+        ttl=0,
+        max_bytes=app.config['FRAGMENT_CACHE_MAX_BYTES'],
+        sizeof=_parts_size,
+    )
+    app.jinja_env.globals['prompt_card'] = prompt_card
+    app.jinja_env.globals['views_slot'] = VIEWS_SLOT
@@ -0,0 +1,162 @@
+"""
+首页快照
+
+首页的热门提示词、热门标签和全站统计变化很慢，每个进程在内存中保存一份快照，
+由后台线程每隔 HOME_SNAPSHOT_INTERVAL 秒重新计算；本进程写入提示词后标记为过期，立即唤醒后台线程。
+请求总是直接使用内存中的快照（过期时先返回旧快照，同时唤醒后台线程重新计算）；
+只有还没有快照，或快照超过 HOME_SNAPSHOT_MAX_AGE 秒（后台线程异常）时才在请求中同步计算。
+尚未写入数据库的浏览增量在渲染时从浏览计数器加上，不需要重新计算快照。
+"""
+import os
+import threading
+import time
+from flask import current_app
+from app.database import get_db
+from app.services.stats_service import get_site_totals, get_popular_tags
+from app.services.tag_service import attach_tags
+from app.utils.helpers import format_datetime
+
+POPULAR_PROMPTS = 6
+POPULAR_TAGS = 12
+
+
+def build_snapshot(db):
+    """计算首页数据 {popular_prompts, popular_tags, totals}"""
+    rows = db.execute('''
+        SELECT p.id, p.title, p.description, p.view_count as views, p.is_public, p.created_at,
+               u.id as user_id, u.username
+        FROM prompts p
+        JOIN users u ON p.user_id = u.id
+        WHERE p.is_public = 1
+        ORDER BY p.trending_score DESC LIMIT ?
+    ''', (POPULAR_PROMPTS,)).fetchall()
+    popular_prompts = [dict(row) for row in rows]
+    for prompt in popular_prompts:
+        prompt['created_at'] = format_datetime(prompt['created_at'])
+    attach_tags(db, popular_prompts, names_only=True)
+    
+    return {
+        'popular_prompts': popular_prompts,
+        'popular_tags': [dict(row) for row in get_popular_tags(limit=POPULAR_TAGS)],
+        'totals': get_site_totals(),
+    }
+
+
+class HomeSnapshot:
+    """首页快照及其后台刷新线程"""
+    
+    def __init__(self, app, interval=60, max_age=600):
+        """
+        :param interval: 后台重新计算的间隔（秒），超过后视为过期
+        :param max_age: 快照超过该时间仍未刷新时在请求中同步计算（秒）
+        """
+        self._app = app
+        self.interval = interval
+        self.max_age = max_age
+        self._snapshot = None
+        self._built_at = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        self._stats = {'refreshes': 0, 'sync_refreshes': 0, 'failures': 0}
+    
+    def get(self):
+        """返回 (快照, 快照时间距今秒数)"""
+        self._check_fork()
+        with self._lock:
+            snapshot, built_at, dirty = self._snapshot, self._built_at, self._dirty
+        age = time.monotonic() - built_at if built_at is not None else None
+        
+        if snapshot is None or age > self.max_age:
+            self.refresh()
+            with self._lock:
+                self._stats['sync_refreshes'] += 1
+                snapshot, built_at = self._snapshot, self._built_at
+            age = time.monotonic() - built_at
+        elif dirty or age > self.interval:
+            self._ensure_thread()
+            self._wakeup.set()
+        return snapshot, age
+    
+    def mark_stale(self):
+        """内容变化后标记快照过期（下次请求或后台线程醒来时重新计算）"""
+        with self._lock:
+            self._dirty = True
+        if self._thread is not None:
+            self._wakeup.set()
+    
+    def refresh(self):
+        """重新计算快照（需要应用上下文）"""
+        with self._refresh_lock:
+            with self._lock:
+                self._dirty = False
+            snapshot = build_snapshot(get_db())
+            with self._lock:
+                self._snapshot = snapshot
+                self._built_at = time.monotonic()
+                self._stats['refreshes'] += 1
+    
+    def stats(self):
+        """返回快照统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['age_seconds'] = round(time.monotonic() - self._built_at, 1) if self._built_at else None
+        return stats
+    
+    def _ensure_thread(self):
+        """第一次需要刷新时启动后台线程（在工作进程中启动，而不是在 fork 前）"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='home-snapshot-refresh', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if os.getpid() != self._pid:
+                return
+            try:
+                with self._app.app_context():
+                    self.refresh()
+            except Exception as e:
+                self._stats['failures'] += 1
+                self._app.logger.error(f"首页快照刷新失败: {e}")
+    
+    def _check_fork(self):
+        """fork 后子进程不继承父进程的后台线程，快照在子进程中首次使用时重新计算"""
+        if os.getpid() == self._pid:
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._snapshot = None
+                self._built_at = None
+                self._thread = None
+                self._wakeup = threading.Event()
+                self._pid = os.getpid()
+
+
+def get_home_snapshot(app=None):
+    """获取当前应用的首页快照"""
+    app = app or current_app
+    return app.extensions['home_snapshot']
+
+
+def mark_home_stale():
+    """提示词写入后标记首页快照过期"""
+    get_home_snapshot().mark_stale()
+
+
+def init_home_snapshot(app):
+    """初始化首页快照（第一次访问首页时计算）"""
+    app.extensions['home_snapshot'] = HomeSnapshot(
+        app,
+        interval=app.config['HOME_SNAPSHOT_INTERVAL'],
+        max_age=app.config['HOME_SNAPSHOT_MAX_AGE'],
+    )
@@ -1,14 +1,67 @@
 """
 提示词业务逻辑
 """
-from app.database import get_db
-from app.services.tag_service import link_tags_to_prompt
+import json
+from app.database import get_db, get_write_db
+from app.services.tag_service import link_tags_to_prompt, attach_tags, get_prompt_tag_names
+from app.services.stats_service import (
+    get_site_totals, get_user_stats, get_tag_public_count, get_content_generation
+)
+from app.services.search_service import build_search_filter, get_search_cache, sync_search_index
+from app.services.tag_index import sync_prompt_tag_usage, sync_tag_usage
+from app.services.tag_postings import match_tag_filter, get_tag_postings, sync_prompt_postings, remove_prompt_postings
+from app.services.semantic_service import sync_prompt_vector, remove_prompt_vectors
+from app.services.related_service import queue_related_prompts, remove_related_prompts
+from app.services.duplicate_service import sync_prompt_minhash
+from app.services.home_snapshot import mark_home_stale
+from app.services.view_counter import record_view, add_pending_views
 from app.utils.helpers import format_datetime
+from app.utils.pagination import paginate
+from app.utils.text import normalize_text
+from app.utils.trending import apply_trending_events
+
+
+def sync_prompt_indexes(db, prompt_id, previous_tags=()):
+    """
+    提示词或其标签写入并提交后更新派生的数据（全文搜索索引、多标签倒排索引、标签使用次数、语义向量、重复检测签名、首页快照），相关提示词在后台更新
+    
+    :param previous_tags: 写入之前关联的标签名（见 get_prompt_tag_names）
+    """
+    sync_search_index(db)
+    sync_prompt_postings(db, prompt_id)
+    sync_prompt_tag_usage(db, prompt_id, previous_tags)
+    sync_prompt_vector(db, prompt_id)
+    sync_prompt_minhash(db, prompt_id)
+    queue_related_prompts(prompt_id)
+    mark_home_stale()
+
+
+def remove_prompts_from_indexes(db, prompt_ids):
+    """
+    批量删除提示词（删除用户）时更新派生的数据，代替逐个调用 sync_prompt_indexes
+    
+    在删除提示词的写事务中、删除之后调用，由调用方提交一次；提交后调用 sync_removed_prompts
+    （重复检测签名由触发器删除）
+    """
+    remove_related_prompts(db, prompt_ids)
+
+
+def sync_removed_prompts(db, prompt_ids, previous_tags=()):
+    """
+    批量删除提示词并提交后更新派生的数据（全文搜索索引、多标签倒排索引、标签使用次数、语义向量、首页快照）
+    
+    :param previous_tags: 这些提示词删除前关联的标签名
+    """
+    sync_search_index(db)
+    remove_prompt_postings(db, prompt_ids)
+    sync_tag_usage(db, previous_tags)
+    remove_prompt_vectors(prompt_ids)
+    mark_home_stale()
 
 
 def create_prompt(user_id, title, content, description, version, is_public, tag_names):
     """创建提示词"""
-    db = get_db()
+    db = get_write_db()
     
     # 插入提示词
     db.execute(
@@ -21,12 +74,13 @@ def create_prompt(user_id, title, content, description, version, is_public, tag_
     link_tags_to_prompt(db, prompt_id, tag_names)
     
     db.commit()
+    sync_prompt_indexes(db, prompt_id)
     return prompt_id
 
 
 def update_prompt(prompt_id, user_id, title, content, description, version, is_public, tag_names):
     """更新提示词"""
-    db = get_db()
+    db = get_write_db()
     
     # 检查权限
     prompt = db.execute('SELECT user_id FROM prompts WHERE id = ?', (prompt_id,)).fetchone()
@@ -40,17 +94,19 @@ def update_prompt(prompt_id, user_id, title, content, description, version, is_p
     )
     
     # 删除旧标签关联
+    previous_tags = get_prompt_tag_names(db, prompt_id)
     db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (prompt_id,))
     
     # 添加新标签
     link_tags_to_prompt(db, prompt_id, tag_names)
     
     db.commit()
+    sync_prompt_indexes(db, prompt_id, previous_tags)
 
 
 def delete_prompt(prompt_id, user_id, is_admin=False):
     """删除提示词"""
-    db = get_db()
+    db = get_write_db()
     
     prompt = db.execute('SELECT * FROM prompts WHERE id = ?', (prompt_id,)).fetchone()
     if not prompt:
@@ -61,6 +117,7 @@ def delete_prompt(prompt_id, user_id, is_admin=False):
         raise PermissionError('您没有权限删除此提示词')
     
     # 删除标签关联
+    previous_tags = get_prompt_tag_names(db, prompt_id)
     db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (prompt_id,))
     
     # 删除收藏关联
@@ -70,6 +127,7 @@ def delete_prompt(prompt_id, user_id, is_admin=False):
     db.execute('DELETE FROM prompts WHERE id = ?', (prompt_id,))
     
     db.commit()
+    sync_prompt_indexes(db, prompt_id, previous_tags)
 
 
 def get_prompt_by_id(prompt_id, user_id=None):
@@ -102,125 +160,121 @@ def get_prompt_by_id(prompt_id, user_id=None):
     ).fetchall()
     prompt['tags'] = tags
     
-    # 更新浏览计数
-    db.execute('UPDATE prompts SET view_count = view_count + 1 WHERE id = ?', (prompt_id,))
-    db.commit()
+    # 记录浏览（缓冲后批量写入）
+    record_view(prompt_id)
+    add_pending_views([prompt])
     
     return prompt
 
 
-def get_user_prompts(user_id, page=1, per_page=9):
-    """获取用户的提示词列表"""
+# 列表排序方式：排序键 [(列表达式, 结果列名)]，与 0003、0010 迁移中的索引对应
+PROMPT_ORDERINGS = {
+    'popular': [('p.view_count', 'view_count'), ('p.created_at', 'created_at'), ('p.id', 'id')],
+    'trending': [('p.trending_score', 'trending_score'), ('p.id', 'id')],
+    'latest': [('p.created_at', 'created_at'), ('p.id', 'id')],
+}
+
+
+def get_user_prompts(user_id, page=1, per_page=9, cursor=None):
+    """获取用户的提示词列表（按创建时间倒序）"""
     db = get_db()
     
-    # 计算总数
-    total_count = db.execute(
-        'SELECT COUNT(*) as count FROM prompts WHERE user_id = ?',
-        (user_id,)
-    ).fetchone()['count']
-    
-    # 计算总页数
-    total_pages = (total_count + per_page - 1) // per_page
-    
-    # 确保page在有效范围内
-    if page < 1:
-        page = 1
-    elif page > total_pages and total_pages > 0:
-        page = total_pages
-    
-    # 获取提示词数据
-    prompt_rows = db.execute(
-        'SELECT p.*, u.username FROM prompts p JOIN users u ON p.user_id = u.id WHERE p.user_id = ? ORDER BY p.created_at DESC LIMIT ? OFFSET ?',
-        (user_id, per_page, (page - 1) * per_page)
-    ).fetchall()
-    
-    prompts = [dict(row) for row in prompt_rows]
-    
-    # 获取所有提示词的标签
-    for prompt in prompts:
-        tags = db.execute(
-            'SELECT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'WHERE tp.prompt_id = ?',
-            (prompt['id'],)
-        ).fetchall()
-        prompt['tags'] = tags
-        
-        # 格式化日期时间
-        if 'created_at' in prompt and prompt['created_at']:
-            prompt['created_at'] = format_datetime(prompt['created_at'])
-        if 'updated_at' in prompt and prompt['updated_at']:
-            prompt['updated_at'] = format_datetime(prompt['updated_at'])
-    
-    return {
-        'prompts': prompts,
-        'current_page': page,
-        'total_pages': total_pages,
-        'total_count': total_count
-    }
+    result = paginate(
+        db,
+        'SELECT p.*, u.username FROM prompts p JOIN users u ON p.user_id = u.id',
+        ['p.user_id = ?'], [user_id],
+        PROMPT_ORDERINGS['latest'], per_page, page=page, cursor=cursor,
+        total_count=get_user_stats(user_id)['prompt_count']
+    )
+    result['prompts'] = _prepare_listing(db, result.pop('rows'))
+    return result
 
 
-def get_public_prompts(page=1, per_page=9, search_query=None, tag_filter=None):
-    """获取公开提示词列表"""
+def get_public_prompts(page=1, per_page=9, search_query=None, tag_filter=None, order_by='trending', cursor=None):
+    """
+    获取公开提示词列表
+    
+    :param tag_filter: 标签筛选条件（TagFilter），组合条件由内存倒排索引求出 ID 集合
+    :param order_by: 排序方式（PROMPT_ORDERINGS 的键）：trending 热度、popular 浏览数、latest 最新
+    """
     db = get_db()
+    select = 'SELECT p.*, u.username, u.avatar_url FROM prompts p JOIN users u ON p.user_id = u.id'
     
-    # 构建查询
-    query = 'SELECT p.*, u.username, u.avatar_url FROM prompts p JOIN users u ON p.user_id = u.id WHERE p.is_public = 1'
+    # 缓存每页的 ID 和分页信息，内容版本号变化后失效（按浏览数或热度排序时顺序最多滞后一个缓存有效期）
+    cache = get_search_cache()
+    key = (
+        'public', normalize_text(search_query), tag_filter or None, order_by, page, cursor, per_page,
+        get_content_generation()
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        result = dict(cached)
+        rows = _load_prompts(db, select, result.pop('ids'))
+        result['prompts'] = _prepare_listing(db, rows)
+        return result
+    
+    # 构建查询条件
+    where = ['p.is_public = 1']
     params = []
     
-    if search_query:
-        query += ' AND (p.title LIKE ? OR p.description LIKE ?)'
-        search_pattern = f'%{search_query}%'
-        params.extend([search_pattern, search_pattern])
-    
-    if tag_filter:
-        query += ' AND p.id IN (SELECT tp.prompt_id FROM tags_prompts tp JOIN tags t ON tp.tag_id = t.id WHERE t.name = ?)'
-        params.append(tag_filter)
-    
-    # 计算总数
-    count_query = query.replace('SELECT p.*, u.username, u.avatar_url', 'SELECT COUNT(*) as count')
-    total_count = db.execute(count_query, params).fetchone()['count']
-    
-    # 计算总页数
-    total_pages = (total_count + per_page - 1) // per_page
-    
-    # 确保page在有效范围内
-    if page < 1:
-        page = 1
-    elif page > total_pages and total_pages > 0:
-        page = total_pages
-    
-    # 添加排序和分页
-    query += ' ORDER BY p.view_count DESC, p.created_at DESC LIMIT ? OFFSET ?'
-    params.extend([per_page, (page - 1) * per_page])
-    
-    # 获取提示词数据
-    prompt_rows = db.execute(query, params).fetchall()
+    search_sql, search_params = build_search_filter(search_query)
+    if search_sql:
+        where.append(f'p.id IN ({search_sql})')
+        params.extend(search_params)
+    
+    # 没有关键词时总数可以直接从计数表（或倒排索引的结果）得到
+    total_count = None
+    if tag_filter and tag_filter.single_tag:
+        where.append('p.id IN (SELECT tp.prompt_id FROM tags_prompts tp JOIN tags t ON tp.tag_id = t.id WHERE t.name = ?)')
+        params.append(tag_filter.single_tag)
+        if not search_query:
+            total_count = get_tag_public_count(tag_filter.single_tag)
+    elif tag_filter:
+        ids = match_tag_filter(db, tag_filter)
+        if get_tag_postings().prefers_lookup(len(ids)):
+            # 结果很少：一元 + 使 is_public 条件不能使用索引，改为按 ID 查找
+            where[0] = '+p.is_public = 1'
+        where.append('p.id IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(ids))
+        if not search_query:
+            total_count = len(ids)
+    elif not search_query:
+        total_count = get_site_totals()['public_prompts']
+    
+    result = paginate(
+        db, select, where, params,
+        PROMPT_ORDERINGS[order_by], per_page, page=page, cursor=cursor, total_count=total_count
+    )
+    rows = result.pop('rows')
+    cache.set(key, dict(result, ids=[row['id'] for row in rows]))
+    result['prompts'] = _prepare_listing(db, rows)
+    return result
+
+
+def _load_prompts(db, select, ids):
+    """按 ID 读取提示词（保持 ID 列表的顺序）"""
+    if not ids:
+        return []
+    rows = db.execute(f"{select} WHERE p.id IN ({', '.join('?' * len(ids))})", ids).fetchall()
+    by_id = {row['id']: row for row in rows}
+    return [by_id[prompt_id] for prompt_id in ids if prompt_id in by_id]
+
+
+def _prepare_listing(db, rows):
+    """将列表查询结果转换为模板使用的字典（标签、待写入的浏览数、日期格式）"""
+    prompts = add_pending_views([dict(row) for row in rows])
     
-    prompts = [dict(row) for row in prompt_rows]
+    # 批量获取所有提示词的标签
+    attach_tags(db, prompts)
     
-    # 获取所有提示词的标签
     for prompt in prompts:
-        tags = db.execute(
-            'SELECT t.* FROM tags t '
-            'JOIN tags_prompts tp ON t.id = tp.tag_id '
-            'WHERE tp.prompt_id = ?',
-            (prompt['id'],)
-        ).fetchall()
-        prompt['tags'] = tags
-        
         # 格式化日期时间
         if 'created_at' in prompt and prompt['created_at']:
             prompt['created_at'] = format_datetime(prompt['created_at'])
         if 'updated_at' in prompt and prompt['updated_at']:
             prompt['updated_at'] = format_datetime(prompt['updated_at'])
     
-    return {
-        'prompts': prompts,
-        'current_page': page,
-        'total_pages': total_pages,
-        'total_count': total_count
-    }
+    return prompts
 
 
 def is_favorited(user_id, prompt_id):
@@ -239,7 +293,7 @@ def is_favorited(user_id, prompt_id):
 
 def toggle_favorite(user_id, prompt_id):
     """切换收藏状态"""
-    db = get_db()
+    db = get_write_db()
     
     favorite = db.execute(
         'SELECT * FROM favorites WHERE user_id = ? AND prompt_id = ?',
@@ -253,6 +307,8 @@ def toggle_favorite(user_id, prompt_id):
     else:
         # 添加收藏
         db.execute('INSERT INTO favorites (user_id, prompt_id) VALUES (?, ?)', (user_id, prompt_id))
+        # 收藏事件累加到热度分数
+        apply_trending_events(db)
         is_favorited = True
     
     db.commit()
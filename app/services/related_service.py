@@ -0,0 +1,396 @@
+"""
+相关提示词
+
+每个提示词最相似的公开提示词（最多 RELATED_PROMPTS_LIMIT 个）预先计算并保存在 related_prompts 表中，
+查看页按主键前缀一次读取。相似度为标签集合的 Jaccard 系数与文本 Jaccard 系数
+（标题、描述和内容开头的搜索分词集合）按 RELATED_PROMPTS_WEIGHTS 加权求和，是对称的。
+
+候选来自两处：与它共享标签的提示词（每个标签取最新的若干个，使用数少的标签优先），
+以及全文索引中包含它的标题和标签里最少见的几个词的提示词（词频来自 fts5vocab 表 prompts_fts_vocab；
+匹配数不多时按 BM25 取前若干个，否则取最新的若干个，避免为大量匹配计算 BM25）。
+fts5vocab 统计常见词的文档数需要遍历整个倒排列表，词频在进程内缓存 TERM_CACHE_TTL 秒（只用于挑选候选，不要求精确）。
+
+提示词或其标签变化后调用 queue_related_prompts()，由后台线程（RelatedPromptsQueue）执行 sync_related_prompts()，
+不占用写入请求的时间（最坏情况下一次约 260 ms），查看页的相关列表稍后更新。sync_related_prompts() 重新计算它自己的列表，
+并把它合并进各候选提示词的列表；原来列出它的提示词更新分数，已满的列表中它的分数下降或不再相关时
+重新计算（列表外可能有更相似的提示词）。每次最多重新计算 MAX_RECOMPUTE 个，其余的只更新分数或移除；
+候选不对称时（A 的候选包含 B，B 的候选不包含 A）B 的修改也不会并入 A 的列表。
+这些近似在对应提示词自身被修改或完整重建时消除。
+完整重建: flask rebuild-related-prompts
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+from flask import current_app
+from app.database import get_write_db
+from app.utils.cache import LRUCache
+from app.utils.text import segment_text
+
+# 每个标签、全文索引分别取的候选数，最多使用的标签数
+TAG_CANDIDATES = 30
+TEXT_CANDIDATES = 50
+MAX_CANDIDATE_TAGS = 5
+# 查询词频的词数，其中最少见的几个用于全文查询（只出现在自身的词除外）
+MAX_VOCAB_TOKENS = 8
+MAX_QUERY_TOKENS = 3
+# 匹配的提示词不超过这么多时按 BM25 排序
+MAX_RANKED_MATCHES = 5000
+# 词频缓存的条目数和有效期（秒）
+TERM_CACHE_SIZE = 20000
+TERM_CACHE_TTL = 3600
+# 一次增量更新最多重新计算的其他列表数
+MAX_RECOMPUTE = 8
+# 参与文本相似度的内容长度（字符）
+CONTENT_PREFIX = 300
+# 低于此相似度不算相关
+MIN_SCORE = 0.05
+# 完整重建时每处理这么多提示词提交一次，避免长时间占用写连接
+REBUILD_BATCH = 500
+
+Features = namedtuple('Features', ['is_public', 'title', 'tag_ids', 'tag_names', 'tokens'])
+
+FEATURES_SQL = (
+    'SELECT p.id, p.is_public, p.title, p.description, substr(p.content, 1, ?) AS content '
+    'FROM prompts p WHERE p.id IN (SELECT value FROM json_each(?))'
+)
+TAGS_SQL = (
+    'SELECT tp.prompt_id, t.id, t.name FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id '
+    'WHERE tp.prompt_id IN (SELECT value FROM json_each(?))'
+)
+
+
+def _load_features(db, ids):
+    """读取提示词的标签和分词集合 {提示词ID: Features}（不存在的提示词不包含在内）"""
+    if not ids:
+        return {}
+    ids_json = json.dumps(list(ids))
+    tags = {}
+    for prompt_id, tag_id, name in db.execute(TAGS_SQL, (ids_json,)):
+        tags.setdefault(prompt_id, []).append((tag_id, name))
+    features = {}
+    for row in db.execute(FEATURES_SQL, (CONTENT_PREFIX, ids_json)):
+        prompt_tags = tags.get(row['id'], [])
+        text = ' '.join(value for value in (row['title'], row['description'], row['content']) if value)
+        features[row['id']] = Features(
+            is_public=bool(row['is_public']),
+            title=row['title'] or '',
+            tag_ids=frozenset(tag_id for tag_id, _ in prompt_tags),
+            tag_names=frozenset(name for _, name in prompt_tags),
+            tokens=frozenset(segment_text(text).split()),
+        )
+    return features
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def similarity(a, b, weights=None):
+    """两个提示词（Features）的相似度，0 到 1"""
+    tag_weight, text_weight = weights or current_app.config['RELATED_PROMPTS_WEIGHTS']
+    return tag_weight * _jaccard(a.tag_ids, b.tag_ids) + text_weight * _jaccard(a.tokens, b.tokens)
+
+
+def _candidate_ids(db, prompt_id, features):
+    """候选提示词 ID（共享标签或全文相关，不含自身）"""
+    candidates = set()
+    if features.tag_ids:
+        # 使用数少的标签更有区分度，先取
+        tag_ids = db.execute(
+            'SELECT tag_id FROM tag_stats WHERE tag_id IN (SELECT value FROM json_each(?)) ORDER BY prompt_count LIMIT ?',
+            (json.dumps(list(features.tag_ids)), MAX_CANDIDATE_TAGS)
+        ).fetchall()
+        for (tag_id,) in tag_ids:
+            rows = db.execute(
+                'SELECT prompt_id FROM tags_prompts WHERE tag_id = ? ORDER BY prompt_id DESC LIMIT ?',
+                (tag_id, TAG_CANDIDATES)
+            )
+            candidates.update(row[0] for row in rows)
+    
+    # 标题和标签的分词（按出现顺序去重）中最少见的几个词，任一出现即可
+    tokens = []
+    for token in segment_text(' '.join([features.title, *sorted(features.tag_names)])).split():
+        if token not in tokens:
+            tokens.append(token)
+    counts = _term_counts(db, tokens[:MAX_VOCAB_TOKENS])
+    rare = sorted((doc, term) for term, doc in counts.items() if doc > 1)[:MAX_QUERY_TOKENS]
+    if rare:
+        # 分词结果只包含字母、数字和汉字，不需要转义
+        match = ' OR '.join(f'"{term}"' for _, term in rare)
+        if sum(doc for doc, _ in rare) <= MAX_RANKED_MATCHES:
+            weights = current_app.config['SEARCH_BM25_WEIGHTS']
+            order = f"bm25(prompts_fts, {', '.join('?' * len(weights))})"
+            params = [match, *weights, TEXT_CANDIDATES]
+        else:
+            order = 'rowid DESC'
+            params = [match, TEXT_CANDIDATES]
+        rows = db.execute(f'SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ? ORDER BY {order} LIMIT ?', params)
+        candidates.update(row[0] for row in rows)
+    
+    candidates.discard(prompt_id)
+    return candidates
+
+
+def _term_counts(db, terms):
+    """各词出现在多少个提示词中 {词: 文档数}（先查缓存）"""
+    cache = current_app.extensions['related_term_counts']
+    counts = {}
+    missing = []
+    for term in terms:
+        count = cache.get(term)
+        if count is None:
+            missing.append(term)
+        else:
+            counts[term] = count
+    if missing:
+        found = dict(db.execute(
+            'SELECT term, doc FROM prompts_fts_vocab WHERE term IN (SELECT value FROM json_each(?))',
+            (json.dumps(missing),)
+        ).fetchall())
+        for term in missing:
+            counts[term] = found.get(term, 0)
+            cache.set(term, counts[term])
+    return counts
+
+
+def _top(scores, limit):
+    """按相似度降序取前 limit 个 [(提示词ID, 相似度)]（相同时 ID 大的在前）"""
+    return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+def _store(db, lists):
+    """替换提示词的相关列表 {提示词ID: [(相关提示词ID, 相似度)]}"""
+    if not lists:
+        return
+    db.execute(
+        'DELETE FROM related_prompts WHERE prompt_id IN (SELECT value FROM json_each(?))',
+        (json.dumps(list(lists)),)
+    )
+    db.executemany(
+        'INSERT INTO related_prompts (prompt_id, related_id, score) VALUES (?, ?, ?)',
+        [(prompt_id, related_id, score) for prompt_id, related in lists.items() for related_id, score in related]
+    )
+
+
+def _score_candidates(db, prompt_id, features):
+    """计算与全部候选的相似度，返回 ({候选ID: 相似度}, {候选ID: Features})"""
+    candidates = _load_features(db, _candidate_ids(db, prompt_id, features))
+    weights = current_app.config['RELATED_PROMPTS_WEIGHTS']
+    scores = {}
+    for candidate_id, candidate in candidates.items():
+        score = similarity(features, candidate, weights)
+        if score >= MIN_SCORE:
+            scores[candidate_id] = score
+    return scores, candidates
+
+
+def compute_related(db, prompt_id, limit=None):
+    """计算一个提示词的相关列表 [(提示词ID, 相似度)]（只包含公开提示词）"""
+    limit = limit or current_app.config['RELATED_PROMPTS_LIMIT']
+    features = _load_features(db, [prompt_id]).get(prompt_id)
+    if features is None:
+        return []
+    scores, candidates = _score_candidates(db, prompt_id, features)
+    return _top({candidate_id: score for candidate_id, score in scores.items()
+                 if candidates[candidate_id].is_public}, limit)
+
+
+def sync_related_prompts(db, prompt_id):
+    """提示词或其标签写入并提交后更新相关列表（在写连接上调用并提交）"""
+    limit = current_app.config['RELATED_PROMPTS_LIMIT']
+    features = _load_features(db, [prompt_id]).get(prompt_id)
+    scores, candidates = {}, {}
+    lists = {}
+    if features is not None:
+        scores, candidates = _score_candidates(db, prompt_id, features)
+        lists[prompt_id] = _top({candidate_id: score for candidate_id, score in scores.items()
+                                 if candidates[candidate_id].is_public}, limit)
+    
+    # 需要检查的列表：原来列出它的提示词，以及它是公开提示词时与它相关的候选
+    listers = {row[0] for row in db.execute('SELECT prompt_id FROM related_prompts WHERE related_id = ?', (prompt_id,))}
+    targets = listers | (set(scores) if features is not None and features.is_public else set())
+    if targets:
+        current = {}
+        rows = db.execute(
+            'SELECT prompt_id, related_id, score FROM related_prompts WHERE prompt_id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(targets)),)
+        )
+        for target_id, related_id, score in rows:
+            current.setdefault(target_id, {})[related_id] = score
+        
+        # 列出它但不在候选中的提示词单独计算相似度
+        missing = [target_id for target_id in listers if target_id not in candidates]
+        if features is not None and features.is_public and missing:
+            for target_id, target in _load_features(db, missing).items():
+                score = similarity(features, target)
+                if score >= MIN_SCORE:
+                    scores[target_id] = score
+        
+        recompute = []
+        for target_id in targets:
+            related = current.get(target_id, {})
+            old_score = related.pop(prompt_id, None)
+            score = scores.get(target_id) if features is not None and features.is_public else None
+            full = len(related) + (old_score is not None) >= limit
+            if score is None and old_score is None:
+                continue
+            if (old_score is not None and full and (score is None or score < old_score)
+                    and len(recompute) < MAX_RECOMPUTE):
+                # 满的列表中它的分数下降或不再相关：列表外可能有更相似的提示词，重新计算
+                recompute.append(target_id)
+                continue
+            if score is not None:
+                if old_score is None and full and score <= min(related.values()):
+                    continue
+                related[prompt_id] = score
+            lists[target_id] = _top(related, limit)
+        for target_id in recompute:
+            lists[target_id] = compute_related(db, target_id, limit)
+    
+    _store(db, lists)
+    db.commit()
+
+
+def remove_related_prompts(db, prompt_ids):
+    """
+    批量删除提示词时从其他提示词的列表中移除它们（在删除提示词的写事务中、删除之后调用，由调用方提交）
+    
+    它们自己的列表由触发器删除；受影响的列表最多重新计算 MAX_RECOMPUTE 个补足，其余的只移除
+    """
+    ids = json.dumps(list(prompt_ids))
+    listers = [row[0] for row in db.execute(
+        'SELECT DISTINCT prompt_id FROM related_prompts WHERE related_id IN (SELECT value FROM json_each(?))',
+        (ids,)
+    )]
+    db.execute('DELETE FROM related_prompts WHERE related_id IN (SELECT value FROM json_each(?))', (ids,))
+    _store(db, {prompt_id: compute_related(db, prompt_id) for prompt_id in listers[:MAX_RECOMPUTE]})
+
+
+def get_related_prompts(db, prompt_id):
+    """读取提示词的相关列表（只包含当前仍公开的提示词）"""
+    rows = db.execute(
+        'SELECT p.id, p.title, p.description, p.view_count, u.username, r.score '
+        'FROM related_prompts r JOIN prompts p ON p.id = r.related_id JOIN users u ON u.id = p.user_id '
+        'WHERE r.prompt_id = ? AND p.is_public = 1 ORDER BY r.score DESC, p.id DESC',
+        (prompt_id,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def rebuild_related_prompts(db):
+    """重新计算全部提示词的相关列表，返回处理的提示词数量"""
+    limit = current_app.config['RELATED_PROMPTS_LIMIT']
+    ids = [row[0] for row in db.execute('SELECT id FROM prompts ORDER BY id')]
+    # 逐批替换各自的列表（已删除提示词的列表由触发器删除），重建期间查看页仍显示旧列表
+    for start in range(0, len(ids), REBUILD_BATCH):
+        _store(db, {prompt_id: compute_related(db, prompt_id, limit) for prompt_id in ids[start:start + REBUILD_BATCH]})
+        db.commit()
+    return len(ids)
+
+
+class RelatedPromptsQueue:
+    """
+    待更新相关列表的提示词，由后台线程依次执行 sync_related_prompts()
+    
+    同一提示词在处理前多次写入只计算一次；进程退出时尚未处理的提示词不再计算（完整重建时补上）
+    """
+    
+    def __init__(self, app):
+        self._app = app
+        self._pending = []
+        self._lock = threading.Lock()
+        # 保证同一时刻只有一个线程在计算
+        self._sync_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        self._stats = {'synced': 0, 'failures': 0}
+    
+    def add(self, prompt_id):
+        """加入队列并唤醒后台线程"""
+        self._check_fork()
+        with self._lock:
+            if prompt_id not in self._pending:
+                self._pending.append(prompt_id)
+        self._ensure_thread()
+        self._wakeup.set()
+    
+    def drain(self):
+        """在当前线程中处理队列中的全部提示词（需要应用上下文），返回处理的数量"""
+        self._check_fork()
+        count = 0
+        with self._sync_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        return count
+                    prompt_id = self._pending.pop(0)
+                try:
+                    sync_related_prompts(get_write_db(), prompt_id)
+                except Exception as e:
+                    with self._lock:
+                        self._stats['failures'] += 1
+                    self._app.logger.error(f"相关提示词更新失败（提示词 {prompt_id}）: {e}")
+                    continue
+                count += 1
+                with self._lock:
+                    self._stats['synced'] += 1
+    
+    def stats(self):
+        """返回队列统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        return stats
+    
+    def _ensure_thread(self):
+        """第一次加入时启动后台线程（在工作进程中启动，而不是在 fork 前）"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='related-prompts-sync', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if os.getpid() != self._pid:
+                return
+            # 每批使用一个应用上下文，结束时归还写连接
+            with self._app.app_context():
+                self.drain()
+    
+    def _check_fork(self):
+        """fork 后子进程不继承父进程的队列（由父进程处理）和后台线程"""
+        if os.getpid() == self._pid:
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._pending = []
+                self._thread = None
+                self._wakeup = threading.Event()
+                self._pid = os.getpid()
+
+
+def get_related_queue(app=None):
+    """获取当前应用的相关列表更新队列"""
+    app = app or current_app
+    return app.extensions['related_queue']
+
+
+def queue_related_prompts(prompt_id):
+    """提示词或其标签写入并提交后，在后台更新相关列表"""
+    get_related_queue().add(prompt_id)
+
+
+def init_related_prompts(app):
+    """初始化词频缓存和相关列表更新队列"""
+    app.extensions['related_term_counts'] = LRUCache(max_entries=TERM_CACHE_SIZE, ttl=TERM_CACHE_TTL)
+    app.extensions['related_queue'] = RelatedPromptsQueue(app)
@@ -0,0 +1,301 @@
+"""
+全文搜索业务逻辑
+
+标题、描述、内容和标签名保存在 FTS5 表 prompts_fts 中（rowid 即提示词 ID）。
+触发器只把变化的提示词 ID 记入 search_pending（纯 SQL，外部连接写入也不会出错），
+由 sync_search_index 在写入提交后分词并更新索引；应用启动时也会处理一次，补上外部写入。
+写入索引的是 segment_text() 的分词结果：中文按重叠双字切分，英文按单词切分（见 app/utils/text.py），
+查询时按同样的规则把每个关键词转为短语；关键词按空白拆分，全部出现才算匹配。
+
+搜索结果按 BM25 相关度排序并分页，每页只读取当前页的行；结果不包含完整内容，
+只包含由 search_snippet() 在查询中截取的带高亮摘要。
+
+每页结果的 ID 列表缓存在进程内（LRU + TTL），缓存键包含内容版本号
+（stats_totals.content_generation，由触发器在提示词或标签变化时加 1），写入后自动失效。
+
+标签筛选使用 TagFilter：单个标签走 SQL 子查询，组合条件由内存倒排索引（app/services/tag_postings.py）求出 ID 集合。
+"""
+import json
+from flask import current_app
+from app.database import get_db, get_write_db
+from app.services.tag_service import attach_tags
+from app.services.stats_service import get_user_stats, get_content_generation, get_popular_tags
+from app.services.tag_postings import match_tag_filter, get_tag_postings
+from app.services.view_counter import add_pending_views
+from app.utils.cache import LRUCache
+from app.utils.text import normalize_text, segment_query, segment_text
+
+# 搜索结果列表使用的字段（不包含完整内容）
+RESULT_COLUMNS = (
+    'p.id, p.title, p.description, p.is_public, p.view_count, p.created_at, p.user_id, u.username'
+)
+
+# 写入索引的字段（标签名以空格拼接）
+INDEX_COLUMNS = (
+    'p.id, p.title, p.description, p.content, '
+    "(SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id "
+    'WHERE tp.prompt_id = p.id)'
+)
+
+
+def split_terms(query):
+    """按空白拆分关键词（规范化后去重，保持顺序）"""
+    terms = []
+    for term in normalize_text(query).split():
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_match_query(query):
+    """将用户输入转为 FTS5 MATCH 表达式，没有可搜索的词时返回 None"""
+    phrases = []
+    for term in split_terms(query):
+        tokens, prefix = segment_query(term)
+        if tokens:
+            # 分词结果只包含字母、数字和汉字，不需要转义
+            phrases.append('"{}"{}'.format(' '.join(tokens), ' *' if prefix else ''))
+    return ' '.join(phrases) or None
+
+
+def build_search_filter(query):
+    """
+    构建关键词搜索的子查询
+    
+    :return: (SQL, 参数)，SQL 形如 SELECT rowid FROM prompts_fts WHERE ...；没有关键词时返回 (None, [])
+    """
+    if not normalize_text(query):
+        return None, []
+    
+    match = build_match_query(query)
+    if match is None:
+        # 只有标点等无法搜索的字符，不匹配任何提示词
+        return 'SELECT rowid FROM prompts_fts WHERE 0', []
+    return 'SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?', [match]
+
+
+def search_prompts(query='', tag_filter=None, user_id=None, page=1, per_page=None):
+    """
+    搜索提示词（公开的提示词，以及登录用户自己的提示词）
+    
+    有关键词时按相关度排序，只有标签时按创建时间排序
+    :return: dict(prompts, page, per_page, has_prev, has_next)，
+             每个结果带有 snippet（已转义的 HTML，没有匹配时为 None）
+    """
+    config = current_app.config
+    per_page = per_page or config['SEARCH_PER_PAGE']
+    page = min(max(page, 1), config['SEARCH_MAX_PAGES'])
+    query = normalize_text(query)
+    tag_filter = tag_filter or None
+    db = get_db()
+    
+    user_id = _visibility_scope(user_id)
+    
+    # 缓存键包含用户 ID（可见范围）和内容版本号，私有结果只会命中同一用户的缓存
+    cache = get_search_cache()
+    key = ('search', query, tag_filter, user_id or 0, page, per_page, get_content_generation())
+    ids = cache.get(key)
+    if ids is None:
+        ids = _search_ids(db, query, tag_filter, user_id, page, per_page)
+        cache.set(key, ids)
+    
+    prompts = load_search_results(db, ids[:per_page], query)
+    attach_tags(db, prompts)
+    add_pending_views(prompts)
+    return {
+        'prompts': prompts,
+        'page': page,
+        'per_page': per_page,
+        'has_prev': page > 1,
+        'has_next': len(ids) > per_page and page < config['SEARCH_MAX_PAGES'],
+    }
+
+
+def get_tag_facets(query='', tag_filter=None, user_id=None, limit=None):
+    """
+    统计当前搜索条件（关键词、标签筛选、可见范围）下结果集中各标签的提示词数
+    
+    一次聚合查询，只返回数量最多的 limit 个标签（不包含已选中的标签），按条件缓存
+    :return: [(标签名, 提示词数)]
+    """
+    limit = limit or current_app.config['FACET_LIMIT']
+    query = normalize_text(query)
+    tag_filter = tag_filter or None
+    user_id = _visibility_scope(user_id)
+    
+    cache = get_search_cache()
+    key = ('facets', query, tag_filter, user_id or 0, limit, get_content_generation())
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+    
+    if not query and not tag_filter and not user_id:
+        # 全部公开提示词：直接读取计数表
+        facets = [(row['name'], row['count']) for row in get_popular_tags(limit=limit)]
+    else:
+        db = get_db()
+        from_sql, params, _ = _result_set(db, query, tag_filter, user_id)
+        if from_sql is None:
+            facets = []
+        else:
+            selected = list(tag_filter.selected) if tag_filter else []
+            exclude_sql = f" AND t.name NOT IN ({', '.join('?' * len(selected))})" if selected else ''
+            rows = db.execute(
+                'SELECT t.name, COUNT(*) AS count FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id '
+                f'WHERE tp.prompt_id IN (SELECT p.id {from_sql}){exclude_sql} '
+                'GROUP BY tp.tag_id ORDER BY count DESC, t.name LIMIT ?',
+                [*params, *selected, limit]
+            ).fetchall()
+            facets = [(row['name'], row['count']) for row in rows]
+    
+    cache.set(key, facets)
+    return facets
+
+
+def _visibility_scope(user_id):
+    """搜索的可见范围：有私有提示词的用户为用户 ID，其他情况为 None（只有公开提示词）"""
+    # 没有私有提示词的用户与未登录用户的搜索结果相同，可以共用缓存
+    if user_id:
+        user_stats = get_user_stats(user_id)
+        if user_stats['prompt_count'] == user_stats['public_prompt_count']:
+            return None
+    return user_id
+
+
+def _result_set(db, query, tag_filter, user_id):
+    """
+    当前搜索条件下的结果集
+    
+    :return: (FROM ... WHERE ... 语句片段, 参数, 是否按相关度排序)；关键词无法搜索时片段为 None
+    """
+    if user_id:
+        where = ['(p.is_public = 1 OR p.user_id = ?)']
+        params = [user_id]
+    else:
+        where = ['p.is_public = 1']
+        params = []
+    
+    if tag_filter and tag_filter.single_tag:
+        where.append('p.id IN (SELECT tp.prompt_id FROM tags_prompts tp JOIN tags t ON tp.tag_id = t.id WHERE t.name = ?)')
+        params.append(tag_filter.single_tag)
+    elif tag_filter:
+        # 组合条件：由倒排索引求出 ID 集合（包含该用户满足条件的私有提示词）
+        ids = match_tag_filter(db, tag_filter, user_id)
+        if get_tag_postings().prefers_lookup(len(ids)):
+            # 结果很少：一元 + 使可见范围条件不能使用索引，改为按 ID 查找
+            where[0] = f'+{where[0]}'
+        where.append('p.id IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(ids))
+    
+    match = build_match_query(query)
+    if match:
+        from_sql = (
+            'FROM prompts_fts JOIN prompts p ON p.id = prompts_fts.rowid '
+            f"WHERE prompts_fts MATCH ? AND {' AND '.join(where)}"
+        )
+        return from_sql, [match, *params], True
+    if query:
+        # 只有标点等无法搜索的字符
+        return None, [], False
+    return f"FROM prompts p WHERE {' AND '.join(where)}", params, False
+
+
+def _search_ids(db, query, tag_filter, user_id, page, per_page):
+    """查询当前页结果的 ID（多取一个用于判断是否还有下一页）"""
+    from_sql, params, ranked = _result_set(db, query, tag_filter, user_id)
+    if from_sql is None:
+        return []
+    
+    limit = [per_page + 1, (page - 1) * per_page]
+    if ranked:
+        weights = current_app.config['SEARCH_BM25_WEIGHTS']
+        order = f"bm25(prompts_fts, {', '.join('?' * len(weights))}), p.id"
+        params = [*params, *weights]
+    else:
+        order = 'p.created_at DESC, p.id DESC'
+    rows = db.execute(f'SELECT p.id {from_sql} ORDER BY {order} LIMIT ? OFFSET ?', params + limit).fetchall()
+    return [row['id'] for row in rows]
+
+
+def load_search_results(db, ids, query):
+    """按 ID 读取结果行（保持顺序），摘要只对这些行计算"""
+    if not ids:
+        return []
+    length = current_app.config['SEARCH_SNIPPET_LENGTH']
+    placeholders = ', '.join('?' * len(ids))
+    rows = db.execute(
+        f'SELECT {RESULT_COLUMNS}, '
+        'COALESCE(search_snippet(p.content, ?, ?), search_snippet(p.description, ?, ?)) AS snippet '
+        f'FROM prompts p JOIN users u ON p.user_id = u.id WHERE p.id IN ({placeholders})',
+        [query, length, query, length, *ids]
+    ).fetchall()
+    by_id = {row['id']: dict(row) for row in rows}
+    return [by_id[prompt_id] for prompt_id in ids if prompt_id in by_id]
+
+
+def get_search_cache(app=None):
+    """获取当前应用的搜索结果缓存"""
+    app = app or current_app
+    return app.extensions['search_cache']
+
+
+def init_search_cache(app):
+    """初始化搜索结果缓存"""
+    app.extensions['search_cache'] = LRUCache(
+        max_entries=app.config['SEARCH_CACHE_SIZE'],
+        ttl=app.config['SEARCH_CACHE_TTL'],
+    )
+
+
+def _index_rows(rows):
+    """把按 INDEX_COLUMNS 查出的行转为 prompts_fts 的行"""
+    for prompt_id, title, description, content, tags in rows:
+        yield prompt_id, segment_text(title), segment_text(description), segment_text(content), segment_text(tags)
+
+
+def sync_search_index(db):
+    """
+    更新 search_pending 中记录的提示词的索引（在写连接上、写入提交后调用），返回处理的提示词数量
+    
+    同时把内容版本号加 1：写入提交到这里更新索引之间，其他请求可能已按新的版本号缓存了不含这次写入的搜索结果
+    """
+    if db.execute('SELECT 1 FROM search_pending LIMIT 1').fetchone() is None:
+        return 0
+    
+    # 先写入以取得写锁，之后读取的待处理记录不会再被其他进程处理
+    db.execute("UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation'")
+    count = db.execute('SELECT COUNT(*) FROM search_pending').fetchone()[0]
+    # 已删除的提示词只删除索引行
+    db.execute('DELETE FROM prompts_fts WHERE rowid IN (SELECT prompt_id FROM search_pending)')
+    db.executemany(
+        'INSERT INTO prompts_fts (rowid, title, description, content, tags) VALUES (?, ?, ?, ?, ?)',
+        # CROSS JOIN 固定从队列开始连接，不扫描 prompts 表
+        _index_rows(db.execute(
+            f'SELECT {INDEX_COLUMNS} FROM search_pending sp CROSS JOIN prompts p ON p.id = sp.prompt_id'
+        ).fetchall())
+    )
+    db.execute('DELETE FROM search_pending')
+    db.commit()
+    return count
+
+
+def init_search_index(app):
+    """应用启动时更新外部连接写入后尚未进入索引的提示词"""
+    with app.app_context():
+        count = sync_search_index(get_write_db())
+    if count:
+        app.logger.info(f"全文搜索索引已更新 {count} 条提示词")
+
+
+def rebuild_search_index(db):
+    """根据提示词和标签重建全文搜索索引，返回索引的提示词数量"""
+    db.execute('DELETE FROM prompts_fts')
+    db.execute('DELETE FROM search_pending')
+    db.executemany(
+        'INSERT INTO prompts_fts (rowid, title, description, content, tags) VALUES (?, ?, ?, ?, ?)',
+        _index_rows(db.execute(f'SELECT {INDEX_COLUMNS} FROM prompts p').fetchall())
+    )
+    db.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('optimize')")
+    count = db.execute('SELECT COUNT(*) FROM prompts_fts').fetchone()[0]
+    db.commit()
+    return count
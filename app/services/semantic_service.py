@@ -0,0 +1,502 @@
+"""
+语义搜索（本地向量，不依赖外部服务）
+
+每个提示词按标题、描述、内容和标签名生成哈希 TF-IDF 向量：词与全文搜索使用同样的分词
+（中文双字、英文单词），另加较低权重的中文单字和英文字母三元组，使词形变化、近义表述也能部分匹配；
+用 crc32 哈希到 SEMANTIC_DIMENSIONS 维并带符号，词频取对数后乘以 IDF，再归一化。
+查询向量按同样的规则生成，与全部向量做一次矩阵乘法得到余弦相似度，取前 k 个。
+
+向量保存在 SEMANTIC_INDEX_DIR 下的 float32 内存映射矩阵中（只追加）：
+修改提示词时把旧行标记为删除（ID 置 0）并追加新行，删除提示词时只标记；
+各进程共享同一组文件，current.json 记录当前使用的文件目录和行数，写入时用文件锁串行化。
+完整重建（flask rebuild-semantic-index）会重新计算 IDF 并清除已删除的行。
+索引不存在（首次使用或修改了维度）时，第一次语义搜索在后台线程中构建，构建完成前搜索页使用关键词搜索；
+也可以在部署时执行 flask rebuild-semantic-index 预先构建。
+
+需要 NumPy；未安装时语义搜索不可用，搜索页只提供关键词搜索。
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from flask import current_app
+from app.database import get_db
+from app.services.search_service import load_search_results, get_search_cache
+from app.services.stats_service import get_content_generation
+from app.services.tag_postings import match_tag_filter
+from app.services.tag_service import attach_tags
+from app.services.view_counter import add_pending_views
+from app.utils.text import normalize_text, segment_text
+
+# 可选依赖
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Windows 上没有 fcntl，只使用进程内的锁
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 各字段的权重
+FIELD_WEIGHTS = {'title': 2.0, 'description': 1.0, 'content': 1.0, 'tags': 2.0}
+# 中文单字、英文字母三元组特征的权重（相对于所在的词）
+NGRAM_WEIGHT = 0.5
+
+# 初始容量（行），不够时翻倍
+INITIAL_CAPACITY = 1024
+# 完整构建时每次按 IDF 加权并归一化的行数
+BUILD_CHUNK_ROWS = 4096
+
+PROMPT_SQL = (
+    'SELECT p.id, p.title, p.description, p.content, p.is_public, p.user_id, '
+    "(SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id "
+    'WHERE tp.prompt_id = p.id) AS tags '
+    'FROM prompts p'
+)
+
+
+def semantic_available():
+    """是否可以使用语义搜索（已安装 NumPy）"""
+    return np is not None
+
+
+def _features(prompt):
+    """提示词（或查询）的加权词频 {特征: 权重}"""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in segment_text(prompt.get(field) or '').split():
+            if not token.isascii():
+                # 中文双字（每段末尾的单字只计为单字特征）
+                if len(token) > 1:
+                    counts[token] += weight
+                counts[token[0]] += weight * NGRAM_WEIGHT
+                continue
+            counts[token] += weight
+            if len(token) > 3:
+                padded = f'<{token}>'
+                for i in range(len(padded) - 2):
+                    counts['3:' + padded[i:i + 3]] += weight * NGRAM_WEIGHT
+    return counts
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature, dims):
+    """特征对应的 (维度, 符号)"""
+    code = zlib.crc32(feature.encode('utf-8'))
+    return code % dims, -1.0 if code & 0x80000000 else 1.0
+
+
+def _hashed(features, dims):
+    """将特征哈希到 dims 维，返回 {维度: 带符号的对数词频}"""
+    buckets = {}
+    for feature, weight in features.items():
+        bucket, sign = _bucket(feature, dims)
+        buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(weight) if weight >= 1 else weight)
+    return buckets
+
+
+def _idf(df, documents):
+    """平滑 IDF：log((1 + 文档数) / (1 + 文档频率)) + 1"""
+    return np.log((1.0 + documents) / (1.0 + df)) + 1.0
+
+
+def _vector(buckets, idf):
+    """按 IDF 加权并归一化，返回 float32 向量（全零时返回 None）"""
+    vector = np.zeros(len(idf), dtype=np.float32)
+    if buckets:
+        vector[list(buckets)] = list(buckets.values())
+    vector *= idf
+    norm = float(np.linalg.norm(vector))
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+class SemanticIndex:
+    """内存映射的向量矩阵"""
+    
+    def __init__(self, path, dims=512):
+        """
+        :param path: 索引文件目录
+        :param dims: 向量维度（修改后需要重建）
+        """
+        self.path = path
+        self.dims = dims
+        self._meta = None
+        self._meta_mtime = None
+        self._vectors = None
+        self._ids = None
+        self._owners = None
+        self._df = None
+        self._rows_by_id = {}
+        self._mapped_rows = 0
+        self._lock = threading.RLock()
+        self._builder = None      # 后台构建的 (进程 ID, 线程)
+        self._builder_lock = threading.Lock()
+    
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, 'current.json')
+    
+    def _open_arrays(self, meta, mode='r+'):
+        """打开 meta 所指目录中的内存映射数组"""
+        directory = os.path.join(self.path, meta['directory'])
+        capacity = meta['capacity']
+        return (
+            np.memmap(os.path.join(directory, 'vectors.f32'), dtype=np.float32, mode=mode, shape=(capacity, self.dims)),
+            np.memmap(os.path.join(directory, 'ids.i64'), dtype=np.int64, mode=mode, shape=(capacity,)),
+            np.memmap(os.path.join(directory, 'owners.i64'), dtype=np.int64, mode=mode, shape=(capacity,)),
+            np.memmap(os.path.join(directory, 'df.f64'), dtype=np.float64, mode=mode, shape=(self.dims,)),
+        )
+    
+    def _write_meta(self, meta):
+        """原子地替换 current.json"""
+        temp_path = f'{self._meta_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path)
+    
+    def exists(self):
+        """索引文件是否存在且维度与配置一致"""
+        try:
+            with open(self._meta_path, encoding='utf-8') as f:
+                return json.load(f).get('dims') == self.dims
+        except (OSError, ValueError):
+            return False
+    
+    def refresh(self):
+        """current.json 变化时（其他进程写入或重建）重新打开；索引不存在时返回 False"""
+        try:
+            mtime = os.stat(self._meta_path).st_mtime_ns
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._meta_mtime and self._meta is not None:
+                return True
+            try:
+                with open(self._meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return False
+            if meta.get('dims') != self.dims:
+                return False
+            
+            previous = self._meta
+            if (previous is None or previous['directory'] != meta['directory']
+                    or previous['capacity'] != meta['capacity']):
+                self._vectors, self._ids, self._owners, self._df = self._open_arrays(meta)
+                if previous is None or previous['directory'] != meta['directory']:
+                    self._rows_by_id = {}
+                    self._mapped_rows = 0
+            
+            # 记录新追加的行（同一提示词以最后一行为准）
+            ids = self._ids[self._mapped_rows:meta['rows']]
+            for offset in np.flatnonzero(ids):
+                self._rows_by_id[int(ids[offset])] = self._mapped_rows + int(offset)
+            self._mapped_rows = meta['rows']
+            self._meta = meta
+            self._meta_mtime = mtime
+            return True
+    
+    @contextmanager
+    def _write_lock(self):
+        """进程内和进程间的写锁"""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, 'lock'), 'w') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def rebuild(self, db):
+        """根据数据库完整重建索引，返回向量数（重建期间其他进程的增量更新会等待）"""
+        with self._write_lock():
+            rows = self._build(db)
+        self.refresh()
+        return rows
+    
+    def ensure_built(self, db):
+        """索引不存在时构建（多个进程同时发现时只构建一次）"""
+        if self.exists():
+            return
+        with self._write_lock():
+            if not self.exists():
+                current_app.logger.info('语义索引不存在，开始构建')
+                self._build(db)
+        self.refresh()
+    
+    def build_in_background(self, app):
+        """
+        索引不存在时在后台线程中构建，返回索引是否已经可用
+        
+        本进程已在构建时不重复启动（fork 之前启动的线程不属于子进程）；多个进程同时构建时由文件锁保证只构建一次
+        """
+        if self.exists():
+            return True
+        with self._builder_lock:
+            builder = self._builder
+            if builder is None or builder[0] != os.getpid() or not builder[1].is_alive():
+                thread = threading.Thread(
+                    target=self._run_build, args=(app,), name='semantic-index-build', daemon=True
+                )
+                self._builder = (os.getpid(), thread)
+                thread.start()
+        return False
+    
+    def _run_build(self, app):
+        try:
+            with app.app_context():
+                self.ensure_built(get_db())
+        except Exception as e:
+            app.logger.error(f"语义索引构建失败: {e}")
+    
+    def _build(self, db):
+        """生成新的索引文件并切换 current.json（调用方持有写锁）"""
+        # 只遍历一遍：先把词频向量写入新文件并统计文档频率，再按块乘以 IDF 并归一化
+        count = db.execute('SELECT COUNT(*) FROM prompts').fetchone()[0]
+        capacity = max(INITIAL_CAPACITY, count)
+        directory = f'build-{time.time_ns()}'
+        os.makedirs(os.path.join(self.path, directory))
+        meta = {'dims': self.dims, 'directory': directory, 'capacity': capacity, 'rows': 0, 'documents': 0}
+        vectors, ids, owners, df = self._open_arrays(meta, mode='w+')
+        
+        rows = 0
+        for row in db.execute(PROMPT_SQL):
+            buckets = _hashed(_features(dict(row)), self.dims)
+            if not buckets:
+                continue
+            if rows >= capacity:
+                # 统计行数之后新建的提示词：它们的增量更新在写锁释放后追加
+                break
+            vectors[rows, list(buckets)] = list(buckets.values())
+            df[list(buckets)] += 1
+            ids[rows] = row['id']
+            owners[rows] = 0 if row['is_public'] else row['user_id']
+            rows += 1
+        
+        idf = _idf(df, rows).astype(np.float32)
+        for start in range(0, rows, BUILD_CHUNK_ROWS):
+            chunk = vectors[start:start + BUILD_CHUNK_ROWS] * idf
+            norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors[start:start + BUILD_CHUNK_ROWS] = chunk / norms
+        for array in (vectors, ids, owners, df):
+            array.flush()
+        meta['documents'] = rows
+        meta['rows'] = rows
+        
+        old_directory = self._current_directory()
+        self._write_meta(meta)
+        if old_directory and old_directory != directory:
+            # 其他进程已映射的旧文件在 POSIX 上会保留到取消映射为止
+            shutil.rmtree(os.path.join(self.path, old_directory), ignore_errors=True)
+        return rows
+    
+    def _current_directory(self):
+        """current.json 记录的文件目录（不存在时为 None）"""
+        try:
+            with open(self._meta_path, encoding='utf-8') as f:
+                return json.load(f).get('directory')
+        except (OSError, ValueError):
+            return None
+    
+    def sync_prompt(self, db, prompt_id):
+        """按数据库中的当前状态更新一个提示词的向量（提示词已删除时只标记删除）"""
+        row = db.execute(f'{PROMPT_SQL} WHERE p.id = ?', (prompt_id,)).fetchone()
+        with self._write_lock():
+            if not self.refresh():
+                return
+            meta = dict(self._meta)
+            
+            self._mark_deleted(prompt_id, meta)
+            
+            buckets = _hashed(_features(dict(row)), self.dims) if row is not None else None
+            if buckets:
+                self._df[list(buckets)] += 1
+                meta['documents'] += 1
+                vector = _vector(buckets, _idf(self._df, meta['documents']))
+                if vector is not None:
+                    if meta['rows'] >= meta['capacity']:
+                        # 容量翻倍（np.memmap 以 r+ 打开更大的形状时会扩展文件）
+                        meta['capacity'] *= 2
+                        self._vectors, self._ids, self._owners, self._df = self._open_arrays(meta)
+                    position = meta['rows']
+                    self._vectors[position] = vector
+                    self._owners[position] = 0 if row['is_public'] else row['user_id']
+                    self._ids[position] = prompt_id
+                    self._rows_by_id[prompt_id] = position
+                    meta['rows'] += 1
+                    self._mapped_rows = meta['rows']
+            
+            self._save(meta)
+    
+    def remove_prompts(self, prompt_ids):
+        """批量删除提示词后标记它们的向量删除（只写入一次文件）"""
+        with self._write_lock():
+            if not self.refresh():
+                return
+            meta = dict(self._meta)
+            for prompt_id in prompt_ids:
+                self._mark_deleted(prompt_id, meta)
+            self._save(meta)
+    
+    def _mark_deleted(self, prompt_id, meta):
+        """标记提示词的旧行删除，并从文档频率中减去（调用方持有写锁）"""
+        old_row = self._rows_by_id.pop(prompt_id, None)
+        if old_row is not None and self._ids[old_row] == prompt_id:
+            self._ids[old_row] = 0
+            self._df[np.flatnonzero(self._vectors[old_row])] -= 1
+            meta['documents'] -= 1
+    
+    def _save(self, meta):
+        """写回数组和 current.json（调用方持有写锁）"""
+        for array in (self._vectors, self._ids, self._owners, self._df):
+            array.flush()
+        self._write_meta(meta)
+        self._meta = meta
+        self._meta_mtime = os.stat(self._meta_path).st_mtime_ns
+    
+    def search(self, text, limit, user_id=None, allowed_ids=None, min_score=0.0):
+        """
+        返回与查询最相似的提示词 [(提示词ID, 相似度)]，按相似度降序
+        
+        :param user_id: 可以看到该用户的私有提示词
+        :param allowed_ids: 只在这些提示词中查找（标签筛选结果），None 表示不限
+        """
+        # 只在锁内取得当前的数组，矩阵乘法在锁外进行（旧的映射在引用释放前一直有效）
+        with self._lock:
+            if not self.refresh():
+                return []
+            meta = self._meta
+            vectors, ids, owners = self._vectors, self._ids, self._owners
+            idf = _idf(self._df, meta['documents'])
+        rows = meta['rows']
+        query = _vector(_hashed(_features({'content': text}), self.dims), idf)
+        if query is None or rows == 0:
+            return []
+        
+        scores = np.asarray(vectors[:rows] @ query)
+        ids = np.array(ids[:rows])
+        owners = np.asarray(owners[:rows])
+        
+        mask = (ids != 0) & (scores >= min_score)
+        if user_id:
+            mask &= (owners == 0) | (owners == user_id)
+        else:
+            mask &= owners == 0
+        if allowed_ids is not None:
+            mask &= np.isin(ids, np.asarray(allowed_ids, dtype=np.int64))
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        order = candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+        return [(int(ids[row]), float(scores[row])) for row in order]
+    
+    def stats(self):
+        """返回索引统计信息"""
+        with self._lock:
+            if self._meta is None:
+                return {'rows': 0, 'prompts': 0}
+            return {
+                'rows': self._meta['rows'],
+                'prompts': len(self._rows_by_id),
+                'dims': self.dims,
+            }
+
+
+def get_semantic_index(app=None):
+    """获取当前应用的语义索引（未安装 NumPy 时为 None）"""
+    app = app or current_app
+    return app.extensions.get('semantic_index')
+
+
+def semantic_search(query, tag_filter=None, user_id=None, page=1, per_page=None):
+    """
+    语义搜索（公开的提示词，以及登录用户自己的提示词）
+    
+    调用前用 semantic_index_ready() 确认索引已构建；返回值与 search_prompts 相同，每个结果带有 score
+    """
+    config = current_app.config
+    per_page = per_page or config['SEARCH_PER_PAGE']
+    page = min(max(page, 1), config['SEARCH_MAX_PAGES'])
+    query = normalize_text(query)
+    tag_filter = tag_filter or None
+    db = get_db()
+    index = get_semantic_index()
+    
+    cache = get_search_cache()
+    key = ('semantic', query, tag_filter, user_id or 0, page, per_page, get_content_generation())
+    matches = cache.get(key)
+    if matches is None:
+        allowed_ids = match_tag_filter(db, tag_filter, user_id) if tag_filter else None
+        matches = index.search(
+            query, page * per_page + 1, user_id=user_id, allowed_ids=allowed_ids,
+            min_score=config['SEMANTIC_MIN_SCORE']
+        )[(page - 1) * per_page:]
+        cache.set(key, matches)
+    
+    scores = dict(matches[:per_page])
+    prompts = [
+        prompt for prompt in load_search_results(db, list(scores), query)
+        # 再次检查可见范围（向量中的可见范围只在写入时更新）
+        if prompt['is_public'] or prompt['user_id'] == user_id
+    ]
+    for prompt in prompts:
+        prompt['score'] = round(scores[prompt['id']], 3)
+    attach_tags(db, prompts)
+    add_pending_views(prompts)
+    return {
+        'prompts': prompts,
+        'page': page,
+        'per_page': per_page,
+        'has_prev': page > 1,
+        'has_next': len(matches) > per_page and page < config['SEARCH_MAX_PAGES'],
+    }
+
+
+def semantic_index_ready():
+    """语义索引是否已构建；不存在时在后台开始构建（见 SemanticIndex.build_in_background）"""
+    return get_semantic_index().build_in_background(current_app._get_current_object())
+
+
+def sync_prompt_vector(db, prompt_id):
+    """提示词变化后更新语义索引（索引尚未构建时跳过，构建时会读取全部提示词）"""
+    index = get_semantic_index()
+    if index is not None:
+        index.sync_prompt(db, prompt_id)
+
+
+def remove_prompt_vectors(prompt_ids):
+    """批量删除提示词后更新语义索引"""
+    index = get_semantic_index()
+    if index is not None:
+        index.remove_prompts(prompt_ids)
+
+
+def rebuild_semantic_index(db):
+    """重建语义索引，返回向量数"""
+    return get_semantic_index().rebuild(db)
+
+
+def init_semantic_index(app):
+    """初始化语义索引（未安装 NumPy 时不启用）"""
+    if np is None:
+        app.logger.info('未安装 NumPy，语义搜索不可用')
+        app.extensions['semantic_index'] = None
+        return
+    path = app.config['SEMANTIC_INDEX_DIR'] or os.path.join(os.path.dirname(app.config['DATABASE']), 'semantic')
+    app.extensions['semantic_index'] = SemanticIndex(path, dims=app.config['SEMANTIC_DIMENSIONS'])
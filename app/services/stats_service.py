@@ -0,0 +1,131 @@
+"""
+统计计数业务逻辑
+
+计数由 0004 迁移中的触发器在写入时同步维护，这里只做单行读取。
+"""
+import threading
+from app.database import get_db
+
+USER_STATS_FIELDS = ('prompt_count', 'public_prompt_count', 'view_count', 'favorite_count')
+
+
+def get_site_totals():
+    """获取全站计数 {users, prompts, public_prompts, views}"""
+    db = get_db()
+    rows = db.execute('SELECT name, value FROM stats_totals').fetchall()
+    totals = {'users': 0, 'prompts': 0, 'public_prompts': 0, 'views': 0}
+    totals.update({row['name']: row['value'] for row in rows if row['name'] in totals})
+    return totals
+
+
+def get_user_stats(user_id):
+    """获取用户计数 {prompt_count, public_prompt_count, view_count, favorite_count}"""
+    db = get_db()
+    row = db.execute(
+        'SELECT prompt_count, public_prompt_count, view_count, favorite_count FROM user_stats WHERE user_id = ?',
+        (user_id,)
+    ).fetchone()
+    if not row:
+        return dict.fromkeys(USER_STATS_FIELDS, 0)
+    return dict(row)
+
+
+def get_tag_public_count(tag_name):
+    """获取标签关联的公开提示词数"""
+    db = get_db()
+    row = db.execute(
+        'SELECT ts.public_prompt_count FROM tags t JOIN tag_stats ts ON ts.tag_id = t.id WHERE t.name = ?',
+        (tag_name,)
+    ).fetchone()
+    return row['public_prompt_count'] if row else 0
+
+
+def get_popular_tags(limit=None):
+    """按公开提示词数获取热门标签 [(id, name, count)]"""
+    db = get_db()
+    query = (
+        'SELECT t.id, t.name, ts.public_prompt_count as count FROM tag_stats ts '
+        'JOIN tags t ON t.id = ts.tag_id '
+        'WHERE ts.public_prompt_count > 0 '
+        'ORDER BY ts.public_prompt_count DESC'
+    )
+    if limit:
+        return db.execute(query + ' LIMIT ?', (limit,)).fetchall()
+    return db.execute(query).fetchall()
+
+
+def get_content_generation(db=None):
+    """获取内容版本号（提示词内容、公开状态或标签变化时由触发器加 1）"""
+    if db is None:
+        db = get_db()
+    row = db.execute("SELECT value FROM stats_totals WHERE name = 'content_generation'").fetchone()
+    return row[0] if row else 0
+
+
+class ContentGenerationTracker:
+    """
+    进程内索引对应的内容版本号
+    
+    索引整体加载时记录读取数据之前的版本号；本进程的写入增量同步到索引后，把版本号推进到写入后的值（见 advance），
+    因此只有其他进程的写入会让 is_current() 为假、触发重建。
+    索引在自己的锁内调用 finish_load() 和 begin_sync()，与索引数据的替换和修改保持一致
+    """
+    
+    def __init__(self):
+        self._generation = None
+        self._load_seq = 0        # 已开始的加载次数
+        self._snapshot_seq = 0    # 当前索引来自第几次加载
+        self._syncs = 0           # 增量更新次数
+        # 上次增量更新时写连接的 (连接, data_version, 推进版本号所需的最小加载序号)，见 advance
+        self._write_version = None
+        self._lock = threading.Lock()
+    
+    def begin_load(self, db):
+        """开始整体加载（在读取索引数据之前调用），返回交给 finish_load() 的加载凭据"""
+        with self._lock:
+            self._load_seq += 1
+            seq, syncs = self._load_seq, self._syncs
+        return seq, syncs, get_content_generation(db)
+    
+    def finish_load(self, token):
+        """加载的数据已替换索引"""
+        seq, syncs, generation = token
+        with self._lock:
+            # 加载期间有增量更新时，读取的快照可能不包含那次写入：不记录版本号，下次检查时重新加载
+            self._generation = generation if self._syncs == syncs else None
+            self._snapshot_seq = seq
+    
+    def begin_sync(self):
+        """开始增量更新，返回应用更新时索引的加载序号（交给 advance()）"""
+        with self._lock:
+            self._syncs += 1
+            return self._snapshot_seq
+    
+    def advance(self, db, snapshot):
+        """
+        本进程的写入已同步到索引后，把版本号推进到当前值，下次检查时不必因为自己的写入重建
+        
+        只有确定期间没有其他连接提交过写入时才能推进：写连接的 PRAGMA data_version 只在其他连接提交后变化，
+        与上次增量更新时相同，说明两次之间的版本号变化都来自本进程（都已同步）。
+        第一次增量更新或发现其他写入时不推进，只记录当前值；等读取之后开始的下一次加载（已包含之前的写入）完成后才能再推进。
+        更新期间索引被重新加载时也不推进
+        
+        :param snapshot: begin_sync() 返回的加载序号
+        """
+        generation, data_version = db.execute(
+            "SELECT (SELECT value FROM stats_totals WHERE name = 'content_generation'), "
+            "(SELECT data_version FROM pragma_data_version)"
+        ).fetchone()
+        connection = getattr(db, 'raw', db)
+        with self._lock:
+            previous = self._write_version
+            if (previous is not None and previous[0] is connection and previous[1] == data_version
+                    and snapshot >= previous[2] and self._snapshot_seq == snapshot and self._generation is not None):
+                self._generation = generation
+                self._write_version = (connection, data_version, snapshot)
+            else:
+                self._write_version = (connection, data_version, self._load_seq + 1)
+    
+    def is_current(self, db):
+        """数据库的内容版本号是否与索引一致"""
+        return get_content_generation(db) == self._generation
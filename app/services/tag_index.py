@@ -0,0 +1,309 @@
+"""
+标签自动补全与模糊匹配索引
+
+每个进程在内存中保存按规范化名称排序的标签数组，前缀查询用二分查找定位，
+候选结果按使用次数（tag_stats.prompt_count）排序。
+
+模糊匹配处理输错的标签：模糊键（规范化、忽略大小写并去掉分隔符）相同的标签直接解析为已有标签（resolve）；
+个别字符不同的只作为“您是不是要找”的建议（suggest），因为 gpt4 和 gpt3 这样的标签只差一个字符。
+标签的模糊键切分为首尾补位的字符二元组，建立 二元组 -> 标签 的倒排列表；
+建议时统计候选与输入共有的二元组数，先按数量过滤（每处编辑最多破坏三个二元组），
+再对共有最多的候选计算编辑距离，不需要扫描 tags 表。
+
+本进程写入提示词并提交后，按关联前后标签集合的差异从 tag_stats 读取这些标签的当前使用次数（新标签插入排序数组）；
+其他进程的写入通过内容版本号发现，每 TAG_INDEX_REFRESH_INTERVAL 秒检查一次，版本号变化时整体重建（与多标签倒排索引相同）。
+"""
+import bisect
+import heapq
+import json
+import re
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from app.services.stats_service import ContentGenerationTracker
+from app.services.tag_postings import make_tag_filter
+from app.utils.text import normalize_text
+
+# 单次前缀查询最多检查的候选数（很短的前缀可能匹配大量标签）
+MAX_PREFIX_CANDIDATES = 2000
+# 模糊匹配：计算编辑距离的候选数、允许的编辑距离占模糊键长度的比例
+MAX_FUZZY_CANDIDATES = 50
+FUZZY_DISTANCE_RATIO = 0.25
+
+SEPARATOR_PATTERN = re.compile(r'[\s\-_./·・、]+')
+
+
+def _index_key(name):
+    """前缀匹配使用的键：规范化并忽略大小写"""
+    return normalize_text(name).casefold()
+
+
+def _fuzzy_key(name):
+    """模糊匹配使用的键：在前缀键的基础上去掉分隔符"""
+    return SEPARATOR_PATTERN.sub('', _index_key(name))
+
+
+def _grams(key):
+    """首尾补位后的字符二元组（去重）"""
+    padded = f'\x02{key}\x03'
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def edit_distance(a, b, limit):
+    """
+    a 与 b 的编辑距离（插入、删除、替换和相邻字符交换各算一次），超过 limit 时返回 limit + 1
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class TagPrefixIndex:
+    """标签名前缀索引"""
+    
+    def __init__(self, refresh_interval=300):
+        """
+        :param refresh_interval: 检查其他进程写入（内容版本号）的间隔（秒）
+        """
+        self.refresh_interval = refresh_interval
+        self._keys = []     # 排序后的 (键, 标签名)
+        self._counts = {}   # 标签名 -> 使用次数
+        self._grams = {}    # 二元组 -> 模糊键列表
+        self._fuzzy = {}    # 模糊键 -> 标签名列表
+        self._generation = ContentGenerationTracker()
+        self._loaded_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+    
+    def load(self, db):
+        """从数据库重建索引"""
+        token = self._generation.begin_load(db)
+        rows = db.execute(
+            'SELECT t.name, COALESCE(ts.prompt_count, 0) AS count FROM tags t '
+            'LEFT JOIN tag_stats ts ON ts.tag_id = t.id'
+        ).fetchall()
+        keys = sorted((_index_key(row['name']), row['name']) for row in rows)
+        counts = {row['name']: row['count'] for row in rows}
+        grams, fuzzy = {}, {}
+        for name in counts:
+            _add_fuzzy(grams, fuzzy, name)
+        with self._lock:
+            self._keys = keys
+            self._counts = counts
+            self._grams = grams
+            self._fuzzy = fuzzy
+            self._generation.finish_load(token)
+            self._loaded_at = self._checked_at = time.monotonic()
+    
+    def ensure_loaded(self, db):
+        """首次使用时加载；超过检查间隔且内容版本号变化时重建"""
+        checked_at = self._checked_at
+        if checked_at is None:
+            self.load(db)
+        elif time.monotonic() - checked_at > self.refresh_interval:
+            if not self._generation.is_current(db):
+                self.load(db)
+            else:
+                self._checked_at = time.monotonic()
+    
+    def sync_prompt(self, db, prompt_id, previous_names=()):
+        """
+        提示词的标签关联变化并提交后更新使用次数（在写入它的连接上调用）
+        
+        :param previous_names: 写入之前关联的标签名（新建的提示词为空，删除的提示词为删除前的全部标签）
+        """
+        if self._checked_at is None:
+            return
+        names = {row['name'] for row in db.execute(
+            'SELECT t.name FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id WHERE tp.prompt_id = ?', (prompt_id,)
+        )}
+        self.sync_tags(db, names.symmetric_difference(previous_names))
+    
+    def sync_tags(self, db, names):
+        """按数据库中的当前使用次数更新一组标签（在写入它们的连接上提交后调用，新标签插入排序数组）"""
+        if self._checked_at is None:
+            return
+        rows = []
+        if names:
+            rows = db.execute(
+                'SELECT t.name, COALESCE(ts.prompt_count, 0) AS count FROM tags t '
+                'LEFT JOIN tag_stats ts ON ts.tag_id = t.id WHERE t.name IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted(names), ensure_ascii=False),)
+            ).fetchall()
+        with self._lock:
+            snapshot = self._generation.begin_sync()
+            for row in rows:
+                name = row['name']
+                if name not in self._counts:
+                    bisect.insort(self._keys, (_index_key(name), name))
+                    _add_fuzzy(self._grams, self._fuzzy, name)
+                self._counts[name] = row['count']
+        # 即使没有标签变化也要推进版本号（提示词内容的修改同样会改变内容版本号）
+        self._generation.advance(db, snapshot)
+    
+    def complete(self, prefix, limit=10):
+        """返回以 prefix 开头的标签 [(标签名, 使用次数)]，按使用次数降序"""
+        key = _index_key(prefix)
+        if not key:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (key,))
+            candidates = []
+            for index_key, name in self._keys[start:start + MAX_PREFIX_CANDIDATES]:
+                if not index_key.startswith(key):
+                    break
+                candidates.append((self._counts[name], name))
+        # 使用次数相同时短的标签优先
+        best = heapq.nlargest(limit, candidates, key=lambda candidate: (candidate[0], -len(candidate[1])))
+        return [(name, count) for count, name in best]
+    
+    def contains(self, name):
+        """标签名是否在索引中"""
+        return name in self._counts
+    
+    def resolve(self, name):
+        """
+        把输入的标签名解析为模糊键相同的已有标签（只有大小写、全角半角或分隔符不同），没有时返回 None
+        
+        模糊键相同的标签有多个时使用次数多者优先
+        """
+        key = _fuzzy_key(name)
+        if not key:
+            return None
+        with self._lock:
+            names = self._fuzzy.get(key)
+            if not names:
+                return None
+            return max(names, key=lambda name: (self._counts.get(name, 0), -len(name)))
+    
+    def suggest(self, name, limit=3):
+        """
+        与输入的标签名编辑距离足够小的已有标签（“您是不是要找”），不包含模糊键相同的标签
+        
+        编辑距离小者优先，相同时使用次数多者优先；只作为建议，不用来改写筛选条件
+        （gpt4 与 gpt3、python3 与 python2 只差一个字符，却是不同的标签）
+        """
+        key = _fuzzy_key(name)
+        if not key:
+            return []
+        distance_limit = int(len(key) * FUZZY_DISTANCE_RATIO)
+        grams = _grams(key)
+        with self._lock:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            shared.pop(key, None)
+            # 每处编辑最多破坏三个二元组（相邻交换），编辑距离不超过 distance_limit 时至少共有 len(grams) - 3 * distance_limit 个
+            required = max(1, len(grams) - 3 * distance_limit)
+            best = heapq.nlargest(
+                MAX_FUZZY_CANDIDATES,
+                (item for item in shared.items() if item[1] >= required),
+                key=lambda item: item[1]
+            )
+            candidates = []
+            for candidate, _ in best:
+                distance = edit_distance(key, candidate, distance_limit)
+                if distance <= distance_limit:
+                    candidates.extend((distance, -self._counts.get(name, 0), len(name), name) for name in self._fuzzy[candidate])
+        return [candidate[-1] for candidate in sorted(candidates)[:limit]]
+    
+    def top(self, limit=20):
+        """返回使用次数最多的标签 [(标签名, 使用次数)]"""
+        with self._lock:
+            return heapq.nlargest(limit, self._counts.items(), key=lambda item: item[1])
+    
+    def stats(self):
+        """返回索引统计信息"""
+        with self._lock:
+            return {
+                'tags': len(self._keys),
+                'fuzzy_grams': len(self._grams),
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
+
+
+def _add_fuzzy(grams, fuzzy, name):
+    """把标签加入模糊匹配的倒排列表"""
+    key = _fuzzy_key(name)
+    if not key:
+        return
+    if key not in fuzzy:
+        fuzzy[key] = []
+        for gram in _grams(key):
+            grams.setdefault(gram, []).append(key)
+    fuzzy[key].append(name)
+
+
+def resolve_tag_filter(db, tag_filter):
+    """
+    检查筛选条件中不存在的标签
+    
+    “全部包含”和“任一包含”中的标签与已有标签的模糊键相同时直接改写为已有标签；
+    其余不存在的标签（包括“排除”中的标签，排除条件从不改写）给出编辑距离相近的标签作为建议。
+    内存索引中没有的标签先用唯一索引确认数据库中确实不存在（可能是其他进程刚创建的）
+    :return: (新的筛选条件, [(输入的标签名, 改写后的标签名)], [(输入的标签名, [建议的标签名])])
+    """
+    index = get_tag_index(db)
+    corrections = {}
+    suggestions = []
+    seen = set()
+    for names, correctable in ((tag_filter.all_of + tag_filter.any_of, True), (tag_filter.none_of, False)):
+        for name in names:
+            if name in seen or index.contains(name):
+                continue
+            seen.add(name)
+            if db.execute('SELECT 1 FROM tags WHERE name = ?', (name,)).fetchone():
+                continue
+            resolved = index.resolve(name) if correctable else None
+            if resolved and resolved != name:
+                corrections[name] = resolved
+                continue
+            candidates = index.suggest(name)
+            if candidates:
+                suggestions.append((name, candidates))
+    if not corrections:
+        return tag_filter, [], suggestions
+    
+    def replace(names):
+        return [corrections.get(name, name) for name in names]
+    
+    tag_filter = make_tag_filter(replace(tag_filter.all_of), replace(tag_filter.any_of), tag_filter.none_of)
+    return tag_filter, list(corrections.items()), suggestions
+
+
+def get_tag_index(db=None, app=None):
+    """获取当前应用的标签索引（传入数据库连接时按需加载）"""
+    app = app or current_app
+    index = app.extensions['tag_index']
+    if db is not None:
+        index.ensure_loaded(db)
+    return index
+
+
+def sync_prompt_tag_usage(db, prompt_id, previous_names=()):
+    """提示词的标签关联变化后更新本进程的标签使用次数"""
+    get_tag_index().sync_prompt(db, prompt_id, previous_names)
+
+
+def sync_tag_usage(db, names):
+    """批量删除提示词后更新这些标签在本进程中的使用次数"""
+    get_tag_index().sync_tags(db, names)
+
+
+def init_tag_index(app):
+    """初始化标签索引（在第一次查询时从数据库加载）"""
+    app.extensions['tag_index'] = TagPrefixIndex(
+        refresh_interval=app.config['TAG_INDEX_REFRESH_INTERVAL']
+    )
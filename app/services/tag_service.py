@@ -3,6 +3,10 @@
 """
 import re
 from app.database import get_db
+from app.utils.text import normalize_text
+
+# 单条语句中 IN 列表的最大长度（SQLite 默认最多 999 个绑定参数）
+TAG_QUERY_CHUNK_SIZE = 500
 
 
 def process_tags(tag_names):
@@ -12,7 +16,9 @@ def process_tags(tag_names):
     
     all_tags = []
     for tag_field in tag_names:
-        if tag_field.strip():
+        # 与全文搜索使用相同的规范化（全角字母、数字和标点转为半角）
+        tag_field = normalize_text(tag_field)
+        if tag_field:
             # 支持多种分隔符：逗号、分号、空格、井号、斜杠、竖线、换行等
             separators = r'[,;，；、\s\n#\/\|·\-_\+\*~`]+'
             split_tags = re.split(separators, tag_field)
@@ -42,3 +48,48 @@ def link_tags_to_prompt(db, prompt_id, tag_names):
         # 关联标签和提示词
         db.execute('INSERT INTO tags_prompts (tag_id, prompt_id) VALUES (?, ?)', (tag_id, prompt_id))
 
+
+def get_prompt_tag_names(db, prompt_id):
+    """获取提示词当前关联的标签名（修改或删除关联之前调用，提交后交给 sync_prompt_indexes）"""
+    return [row['name'] for row in db.execute(
+        'SELECT t.name FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id WHERE tp.prompt_id = ?', (prompt_id,)
+    )]
+
+
+def get_user_tag_names(db, user_id):
+    """获取用户的全部提示词关联的标签名（删除用户之前调用，提交后交给 sync_removed_prompts）"""
+    return [row['name'] for row in db.execute(
+        'SELECT DISTINCT t.name FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id '
+        'WHERE tp.prompt_id IN (SELECT id FROM prompts WHERE user_id = ?)',
+        (user_id,)
+    )]
+
+
+def get_tags_for_prompts(db, prompt_ids):
+    """批量获取多个提示词的标签，返回 {提示词ID: [标签行]}"""
+    tags_by_prompt = {prompt_id: [] for prompt_id in prompt_ids}
+    ids = list(tags_by_prompt)
+    
+    # 按块查询，避免超过绑定参数上限
+    for start in range(0, len(ids), TAG_QUERY_CHUNK_SIZE):
+        chunk = ids[start:start + TAG_QUERY_CHUNK_SIZE]
+        placeholders = ','.join(['?'] * len(chunk))
+        rows = db.execute(
+            f'SELECT tp.prompt_id, t.* FROM tags_prompts tp '
+            f'JOIN tags t ON t.id = tp.tag_id '
+            f'WHERE tp.prompt_id IN ({placeholders})',
+            chunk
+        ).fetchall()
+        for row in rows:
+            tags_by_prompt[row['prompt_id']].append(row)
+    
+    return tags_by_prompt
+
+
+def attach_tags(db, prompts, names_only=False):
+    """为提示词列表批量加载标签，写入 prompt['tags']"""
+    tags_by_prompt = get_tags_for_prompts(db, [prompt['id'] for prompt in prompts])
+    for prompt in prompts:
+        tags = tags_by_prompt[prompt['id']]
+        prompt['tags'] = [tag['name'] for tag in tags] if names_only else tags
+    return prompts
@@ -2,7 +2,7 @@
 用户业务逻辑
 """
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.database import get_db
+from app.database import get_db, get_write_db
 import os
 import uuid
 from werkzeug.utils import secure_filename
@@ -30,7 +30,7 @@ def authenticate_user(email, password):
 
 def register_user(username, email, password, invite_code):
     """注册新用户"""
-    db = get_db()
+    db = get_write_db()
     
     # 检查用户名和邮箱是否已存在
     if db.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone():
@@ -102,7 +102,7 @@ def get_user_profile(user_id):
 
 def update_user_profile(user_id, username=None, bio=None, avatar_file=None):
     """更新用户资料"""
-    db = get_db()
+    db = get_write_db()
     
     # 检查用户名是否已被其他用户使用
     if username:
@@ -177,7 +177,7 @@ def save_avatar(file, user_id):
 
 def change_password(user_id, old_password, new_password):
     """修改密码"""
-    db = get_db()
+    db = get_write_db()
     user = db.execute('SELECT password_hash FROM users WHERE id = ?', (user_id,)).fetchone()
     
     if not user:
@@ -0,0 +1,214 @@
+"""
+浏览计数写缓冲
+
+查看提示词时只在内存中累加浏览次数，由后台线程每隔 VIEW_COUNT_FLUSH_INTERVAL 秒，
+或累计 VIEW_COUNT_FLUSH_THRESHOLD 次后，在一个事务中批量写入数据库。
+进程退出时（包括 gunicorn 回收工作进程）会执行最后一次写入。
+页面显示的浏览次数 = 数据库中的值 + 当前进程尚未写入的增量。
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from collections import Counter
+from flask import current_app
+from app.utils.trending import apply_trending_events
+
+# 当前进程中的所有计数器，用于退出时统一写入
+_counters = weakref.WeakSet()
+
+
+class ViewCounter:
+    """按提示词缓冲浏览增量的计数器"""
+    
+    def __init__(self, pool, flush_interval=5, flush_threshold=100, logger=None):
+        """
+        :param pool: 写连接池
+        :param flush_interval: 定时写入间隔（秒）
+        :param flush_threshold: 缓冲的增量达到该数量时立即写入
+        """
+        self._pool = pool
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._logger = logger
+        
+        self._pending = Counter()
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        # 保证同一时刻只有一个线程在写入
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._pid = os.getpid()
+        self._stats = {'flushes': 0, 'flushed_views': 0, 'failures': 0}
+        _counters.add(self)
+    
+    def increment(self, prompt_id, count=1):
+        """记录浏览"""
+        self._check_fork()
+        with self._lock:
+            self._pending[prompt_id] += count
+            self._pending_total += count
+            full = self._pending_total >= self.flush_threshold
+        
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+    
+    def pending(self, prompt_id):
+        """返回尚未写入数据库的浏览增量"""
+        with self._lock:
+            return self._pending.get(prompt_id, 0)
+    
+    def pending_total(self):
+        """返回所有提示词尚未写入数据库的浏览增量之和"""
+        with self._lock:
+            return self._pending_total
+    
+    def flush(self):
+        """将缓冲的增量写入数据库，返回写入的浏览次数"""
+        self._check_fork()
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = Counter()
+                self._pending_total = 0
+            
+            try:
+                self._write(batch)
+            except Exception as e:
+                # 写入失败时放回缓冲区，等待下次重试
+                with self._lock:
+                    self._pending.update(batch)
+                    self._pending_total += sum(batch.values())
+                    self._stats['failures'] += 1
+                if self._logger:
+                    self._logger.error(f"浏览计数写入失败: {e}")
+                return 0
+            
+            total = sum(batch.values())
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['flushed_views'] += total
+            return total
+    
+    def stop(self):
+        """停止后台线程并写入剩余增量"""
+        self._stopped = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+    
+    def stats(self):
+        """返回计数器统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'pending_prompts': len(self._pending),
+                'pending_views': self._pending_total,
+            })
+        return stats
+    
+    def _write(self, batch):
+        conn = self._pool.acquire()
+        discard = False
+        try:
+            with conn:
+                # 浏览同时累加到热度分数（见 app/utils/trending.py）
+                conn.executemany(
+                    "UPDATE prompts SET view_count = view_count + ?, "
+                    "trending_score = trending_add(trending_score, 'view', ?, NULL) WHERE id = ?",
+                    [(count, count, prompt_id) for prompt_id, count in batch.items()]
+                )
+                # 顺便处理外部连接写入的收藏事件
+                apply_trending_events(conn)
+        except sqlite3.Error:
+            discard = True
+            raise
+        finally:
+            self._pool.release(conn, discard=discard)
+    
+    def _ensure_thread(self):
+        """首次记录浏览时启动后台写入线程（在工作进程中启动，而不是在 fork 前）"""
+        if self._thread is not None or self._stopped:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if os.getpid() != self._pid:
+                return
+            self.flush()
+    
+    def _check_fork(self):
+        """fork 后子进程不继承父进程的缓冲（由父进程负责写入）和后台线程"""
+        if os.getpid() == self._pid:
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._pending = Counter()
+                self._pending_total = 0
+                self._thread = None
+                self._wakeup = threading.Event()
+                self._pid = os.getpid()
+
+
+def flush_all():
+    """写入当前进程中所有计数器的缓冲（进程退出时调用）"""
+    for counter in list(_counters):
+        counter.stop()
+
+
+atexit.register(flush_all)
+
+
+def get_view_counter(app=None):
+    """获取当前应用的浏览计数器"""
+    app = app or current_app
+    return app.extensions['view_counter']
+
+
+def record_view(prompt_id):
+    """记录一次浏览"""
+    get_view_counter().increment(prompt_id)
+
+
+def add_pending_views(prompts, key='view_count'):
+    """在提示词字典的浏览次数上加上尚未写入的增量"""
+    counter = get_view_counter()
+    for prompt in prompts:
+        prompt[key] = (prompt.get(key) or 0) + counter.pending(prompt['id'])
+    return prompts
+
+
+def init_view_counter(app):
+    """初始化浏览计数器（需在数据库连接池初始化之后调用）"""
+    from app.database import get_write_pool
+    
+    pool = get_write_pool(app)
+    app.extensions['view_counter'] = ViewCounter(
+        pool,
+        flush_interval=app.config['VIEW_COUNT_FLUSH_INTERVAL'],
+        flush_threshold=app.config['VIEW_COUNT_FLUSH_THRESHOLD'],
+        logger=app.logger,
+    )
+    
+    # 启动时处理外部连接写入后尚未累加的热度事件，之后随每次浏览数写入处理
+    conn = pool.acquire()
+    try:
+        with conn:
+            apply_trending_events(conn)
+    finally:
+        pool.release(conn)
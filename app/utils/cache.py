@@ -0,0 +1,95 @@
+"""
+进程内 LRU + TTL 缓存
+
+每个工作进程各有一份，线程安全；条目超过 max_entries（或总大小超过 max_bytes）时淘汰最久未使用的条目，
+超过 ttl 秒的条目在读取时视为未命中。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# 区分“未命中”和缓存的 None
+_MISSING = object()
+
+
+def _utf8_size(value):
+    """字符串按 UTF-8 编码后的字节数，其他对象按 repr 的长度估计"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(repr(value))
+
+
+class LRUCache:
+    """带过期时间的 LRU 缓存"""
+    
+    def __init__(self, max_entries=1024, ttl=60, max_bytes=0, sizeof=None):
+        """
+        :param max_entries: 最多缓存的条目数
+        :param ttl: 条目有效期（秒），0 表示不过期
+        :param max_bytes: 条目总大小上限（字节，由 sizeof 计算），0 表示不限
+        :param sizeof: 计算条目大小的函数，默认按 UTF-8 编码后的长度计算字符串
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or _utf8_size
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+    
+    def get(self, key, default=None):
+        """读取条目，未命中或已过期时返回 default"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+            expires_at, value, size = entry
+            if expires_at and expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+    
+    def set(self, key, value):
+        """写入条目"""
+        if self.max_entries <= 0:
+            return
+        size = self._sizeof(value) if self.max_bytes else 0
+        # 单个条目超过总大小上限时不缓存
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        """返回命中率等统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            if self.max_bytes:
+                stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
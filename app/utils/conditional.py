@@ -0,0 +1,89 @@
+"""
+条件请求（ETag / Last-Modified）
+
+提示词页面和列表页的内容只取决于：页面版本号（stats_totals.page_generation，页面显示的内容变化时由 0011、0012 迁移中的触发器加 1）、
+请求地址，以及会话中影响页面的字段（当前用户及导航栏中的用户名、头像）；查看页再加上该提示词的 updated_at 和当前用户的收藏状态
+（收藏只影响这一页，不改变页面版本号，见 0015 迁移）。
+视图在查询和渲染之前先读取页面版本号（一次主键查询）计算 ETag，客户端带来的 If-None-Match 仍然匹配时直接返回 304；
+Last-Modified 取最后一次变化的时间（秒），只在该秒已经过去后才发送，保证之后的变化一定得到更大的时间；
+它无法区分会话，只对未登录的请求发送（登录后的页面只用 ETag 验证）。
+ETag 是以 SECRET_KEY 为密钥的 BLAKE2 摘要，不能由版本号和地址推算出来。
+浏览数不在验证器中（浏览数写入不改变页面版本号），页面上的浏览数可能落后；因此使用弱 ETag。
+按浏览数或热度排序的列表，顺序本身随浏览数写入和收藏变化，这些页面按时间分段（interval）：
+每段的 ETag 不同、Last-Modified 不早于段的开始，顺序最多落后一段时间。
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from flask import current_app, request, session, after_this_request
+from werkzeug.http import is_resource_modified
+from app.database import get_db
+
+# 会话中显示在页面上的字段
+SESSION_SCOPE_FIELDS = ('user_id', 'username', 'avatar_url', 'is_admin')
+
+
+def get_page_generation(db):
+    """返回 (页面版本号, 最后变化时间的 Unix 秒)"""
+    rows = db.execute(
+        "SELECT name, value FROM stats_totals WHERE name IN ('page_generation', 'page_modified_at')"
+    ).fetchall()
+    values = {row['name']: row['value'] for row in rows}
+    return values.get('page_generation', 0), values.get('page_modified_at', 0)
+
+
+def _etag_key():
+    """计算 ETag 使用的密钥（BLAKE2 的密钥最长 64 字节，先对 SECRET_KEY 取摘要）"""
+    secret = current_app.config['SECRET_KEY']
+    if isinstance(secret, str):
+        secret = secret.encode('utf-8')
+    return hashlib.blake2b(secret).digest()
+
+
+def _add_validators(response, etag, last_modified):
+    """在响应上附加验证器和缓存策略（页面与会话有关，每次使用前都要重新验证）"""
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache' if session.get('user_id') else 'no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def conditional_response(*validators, interval=None):
+    """
+    处理当前 GET 请求的条件请求
+    
+    客户端缓存的页面仍然有效时返回 304 响应；否则返回 None，并在本次请求正常渲染的 200 响应上附加 ETag 和 Last-Modified。
+    会话中有待显示的提示消息时页面会不同，不做条件处理。
+    
+    :param validators: 页面版本号之外决定页面内容的值（如提示词的 updated_at）
+    :param interval: 页面还取决于不改变页面版本号的数据（如浏览数排序）时，验证器按这么多秒分段失效
+    """
+    if request.method != 'GET' or session.get('_flashes'):
+        return None
+    
+    generation, modified_at = get_page_generation(get_db())
+    now = time.time()
+    if interval:
+        bucket = int(now // interval)
+        validators += (bucket,)
+        modified_at = max(modified_at, int(bucket * interval))
+    scope = tuple(session.get(field) for field in SESSION_SCOPE_FIELDS)
+    etag = hashlib.blake2b(
+        repr((generation, validators, request.full_path, scope)).encode('utf-8'), digest_size=12, key=_etag_key()
+    ).hexdigest()
+    last_modified = None
+    if not session.get('user_id') and modified_at < int(now):
+        last_modified = datetime.fromtimestamp(modified_at, timezone.utc)
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return _add_validators(current_app.response_class(status=304), etag, last_modified)
+    
+    @after_this_request
+    def add_validators(response):
+        if response.status_code == 200:
+            _add_validators(response, etag, last_modified)
+        return response
+    
+    return None
@@ -0,0 +1,130 @@
+"""
+游标（keyset）分页
+
+列表按固定的排序键（例如 created_at, id）降序排列，翻页时用上一页最后一行的排序键
+作为游标，查询条件为 (排序键) < (游标值)，可直接利用索引定位，耗时与翻到第几页无关。
+
+只有前几页保留页码（OFFSET 代价很小），之后只能通过不透明的上一页/下一页游标翻页；
+调用方能从计数表取得总数时直接传入，否则只统计到页码范围为止，不再对整个结果集执行 COUNT(*)。
+"""
+import base64
+import binascii
+import json
+
+# 保留页码的页数
+NUMBERED_PAGES = 5
+
+
+def encode_cursor(direction, values):
+    """将翻页方向和排序键编码为不透明的游标字符串"""
+    payload = json.dumps([direction, list(values)], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, key_length):
+    """解析游标，返回 (方向, 排序键)；游标无效时返回 None"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != key_length:
+        return None
+    # 游标来自客户端，排序键只能是可以绑定为 SQL 参数的标量（bool 也是 int，一并排除）
+    if not all(value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool)) for value in values):
+        return None
+    return direction, values
+
+
+def paginate(db, select, where, params, order_by, per_page, page=1, cursor=None, total_count=None):
+    """
+    分页查询
+    
+    :param select: SELECT ... FROM ... JOIN ... 部分
+    :param where: WHERE 条件列表（以 AND 连接）
+    :param params: WHERE 条件的参数
+    :param order_by: 排序键 [(列表达式, 结果列名)]，全部按降序排列，最后一列必须唯一（例如 id）
+    :param page: 页码（超出页码范围时按最后一个页码处理）
+    :param cursor: 上一页/下一页游标，提供时忽略页码
+    :param total_count: 已知的结果总数（来自计数表），为 None 时只统计页码范围内的结果数
+    :return: dict(rows, current_page, page_count, has_more_pages, total_count, total_is_exact,
+             next_cursor, prev_cursor)，游标翻页时 current_page 为 None
+    """
+    columns = [column for column, _ in order_by]
+    keys = [key for _, key in order_by]
+    where = list(where)
+    params = list(params)
+    
+    limit = per_page * NUMBERED_PAGES
+    if total_count is None:
+        # 统计页码范围内的结果数（多取一行用于判断页码之外是否还有数据）
+        count_from = select.split(' FROM ', 1)[1]
+        count_sql = f'SELECT COUNT(*) FROM (SELECT 1 FROM {count_from}{_where_sql(where)} LIMIT ?)'
+        counted = db.execute(count_sql, params + [limit + 1]).fetchone()[0]
+        has_more_pages = counted > limit
+        total_is_exact = not has_more_pages
+        total_count = min(counted, limit)
+    else:
+        has_more_pages = total_count > limit
+        total_is_exact = True
+    page_count = max(1, (min(total_count, limit) + per_page - 1) // per_page)
+    
+    decoded = decode_cursor(cursor, len(order_by))
+    row_value = f"({', '.join(columns)})"
+    placeholders = f"({', '.join(['?'] * len(columns))})"
+    
+    if decoded:
+        direction, values = decoded
+        if direction == 'next':
+            where.append(f'{row_value} < {placeholders}')
+            order = ', '.join(f'{column} DESC' for column in columns)
+        else:
+            # 向前翻页时反向查询，再把结果倒回来
+            where.append(f'{row_value} > {placeholders}')
+            order = ', '.join(f'{column} ASC' for column in columns)
+        rows = db.execute(
+            f'{select}{_where_sql(where)} ORDER BY {order} LIMIT ?',
+            params + values + [per_page + 1]
+        ).fetchall()
+        has_extra = len(rows) > per_page
+        rows = rows[:per_page]
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_prev = True, has_extra
+        else:
+            has_next, has_prev = has_extra, True
+        current_page = None
+    else:
+        current_page = min(max(page, 1), page_count)
+        order = ', '.join(f'{column} DESC' for column in columns)
+        rows = db.execute(
+            f'{select}{_where_sql(where)} ORDER BY {order} LIMIT ? OFFSET ?',
+            params + [per_page + 1, (current_page - 1) * per_page]
+        ).fetchall()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = False  # 页码范围内通过页码向前翻页
+    
+    next_cursor = None
+    prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor('next', [rows[-1][key] for key in keys])
+    if rows and has_prev:
+        prev_cursor = encode_cursor('prev', [rows[0][key] for key in keys])
+    
+    return {
+        'rows': rows,
+        'current_page': current_page,
+        'page_count': page_count,
+        'has_more_pages': has_more_pages,
+        'total_count': total_count,
+        'total_is_exact': total_is_exact,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+    }
+
+
+def _where_sql(where):
+    return f" WHERE {' AND '.join(where)}" if where else ''
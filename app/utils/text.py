@@ -0,0 +1,110 @@
+"""
+文本规范化与搜索分词
+
+中文等 CJK 文本没有空格分隔，按重叠的双字切分（“帮我写作” → 帮我 我写 写作 作，
+每段末尾再补一个单字），英文和数字按单词切分并转为小写，结果以空格连接后交给
+FTS5 的 unicode61 分词器。查询时按同样的规则切分，连续的词组成短语，
+因此任意长度的中文子串都能通过索引匹配。
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from markupsafe import escape
+
+# 中日韩文字：平假名、片假名、CJK 统一汉字（含扩展 A）、兼容汉字、谚文
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+SEGMENT_PATTERN = re.compile(f'([{CJK_CHARS}]+)|([^\\W_{CJK_CHARS}]+)')
+
+
+def normalize_text(text):
+    """NFKC 规范化（全角字母、数字和标点转为半角），并合并连续空白"""
+    if not text:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+
+def _segments(text):
+    """返回 [(是否为 CJK, 片段)]，英文片段已转为小写"""
+    return [
+        (bool(cjk), cjk or word.casefold())
+        for cjk, word in SEGMENT_PATTERN.findall(normalize_text(text))
+    ]
+
+
+def _bigrams(run):
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segment_text(text):
+    """索引端分词，返回以空格分隔的词"""
+    tokens = []
+    for cjk, segment in _segments(text):
+        if cjk:
+            tokens.extend(_bigrams(segment))
+            tokens.append(segment[-1])
+        else:
+            tokens.append(segment)
+    return ' '.join(tokens)
+
+
+def segment_query(term):
+    """
+    查询端分词，返回 (词列表, 最后一个词是否按前缀匹配)
+    
+    与索引端一致，但最后一个 CJK 片段不补末尾单字（文档中该片段之后可能还有汉字）；
+    最后一个词为单个汉字或英文单词时按前缀匹配，效果与原来的子串匹配相近
+    """
+    segments = _segments(term)
+    tokens = []
+    prefix = False
+    for i, (cjk, segment) in enumerate(segments):
+        last = i == len(segments) - 1
+        if cjk and len(segment) > 1:
+            tokens.extend(_bigrams(segment))
+            if not last:
+                tokens.append(segment[-1])
+            prefix = False
+        else:
+            tokens.append(segment)
+            prefix = True
+    return tokens, prefix
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(query):
+    """匹配关键词各片段（中文片段、英文单词）的正则表达式，不区分大小写"""
+    segments = sorted({segment for term in normalize_text(query).split() for _, segment in _segments(term)},
+                      key=len, reverse=True)
+    if not segments:
+        return None
+    return re.compile('|'.join(re.escape(segment) for segment in segments), re.IGNORECASE)
+
+
+def make_snippet(text, query, length=80):
+    """
+    截取第一个关键词附近的一段文本，关键词用 <mark> 标出
+    
+    :return: 已转义的 HTML；文本中没有关键词时返回 None
+    """
+    pattern = _highlight_pattern(query or '')
+    text = normalize_text(text)
+    if pattern is None or not text:
+        return None
+    first = pattern.search(text)
+    if first is None:
+        return None
+    
+    # 关键词前保留约四分之一的上下文
+    start = max(0, min(first.start() - length // 4, len(text) - length))
+    end = min(len(text), start + length)
+    window = text[start:end]
+    
+    parts = ['…' if start > 0 else '']
+    position = 0
+    for match in pattern.finditer(window):
+        parts.append(str(escape(window[position:match.start()])))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(str(escape(window[position:])))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
@@ -0,0 +1,79 @@
+"""
+时间衰减的热度分数
+
+热度 = Σ 权重 × 2^(-(当前时间 - 事件时间) / 半衰期)。所有提示词在同一时刻乘以相同的衰减因子，
+不影响相对顺序，因此只保存对数形式 ln(Σ 权重 × e^((事件时间 - 基准时间) / τ))，τ = 半衰期 / ln 2：
+新事件用 log-sum-exp 累加到原分数上，已有分数永远不需要随时间重写，也不会溢出。
+创建事件的分数由触发器直接用 SQL 计算（迁移 0014 中的常量与这里一致）；收藏由触发器记入 trending_events，
+由 apply_trending_events() 在应用中累加（触发器不调用自定义函数，外部连接也能写入）；
+浏览在浏览计数批量写入时通过自定义 SQL 函数 trending_add() 累加。
+修改半衰期或权重后，已有分数需要重新计算才能与新分数比较（同时修改迁移中创建事件的常量）。
+"""
+import datetime
+import math
+import time
+
+# 半衰期：3 天
+HALF_LIFE_SECONDS = 3 * 24 * 3600
+# 基准时间（UTC 2024-01-01）
+EPOCH = 1704067200
+
+TRENDING_WEIGHTS = {
+    'create': 3.0,
+    'view': 1.0,
+    'favorite': 5.0,
+}
+
+_TAU = HALF_LIFE_SECONDS / math.log(2)
+
+
+def _timestamp(at):
+    """数据库中的 UTC 时间字符串转为时间戳，为空时取当前时间"""
+    if not at:
+        return time.time()
+    try:
+        value = datetime.datetime.fromisoformat(str(at).replace('Z', '+00:00'))
+    except ValueError:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def trending_add(score, kind, count=1, at=None):
+    """
+    在热度分数上累加 count 次 kind 事件（发生在 at，为空时为当前时间）
+    
+    :param score: 原分数，为 NULL 时表示没有任何事件
+    """
+    weight = TRENDING_WEIGHTS.get(kind, 0) * (count or 0)
+    if weight <= 0:
+        return score
+    value = math.log(weight) + (_timestamp(at) - EPOCH) / _TAU
+    if score is None:
+        return value
+    high, low = max(score, value), min(score, value)
+    return high + math.log1p(math.exp(low - high))
+
+
+
+def apply_trending_events(db):
+    """
+    把 trending_events 中记录的事件累加到热度分数并删除这些记录，返回处理的事件数
+    
+    在注册了 trending_add() 的写连接上调用，由调用方提交；同一时刻的多个事件合并为一次累加
+    """
+    if db.execute('SELECT 1 FROM trending_events LIMIT 1').fetchone() is None:
+        return 0
+    # 在写事务中读取事件，避免多个进程重复累加
+    if not db.in_transaction:
+        db.execute('BEGIN IMMEDIATE')
+    rows = db.execute(
+        'SELECT prompt_id, kind, COUNT(*), created_at FROM trending_events GROUP BY prompt_id, kind, created_at'
+    ).fetchall()
+    db.executemany(
+        'UPDATE prompts SET trending_score = trending_add(trending_score, ?, ?, ?) WHERE id = ?',
+        [(kind, count, created_at, prompt_id) for prompt_id, kind, count, created_at in rows]
+    )
+    db.execute('DELETE FROM trending_events')
+    return sum(row[2] for row in rows)
@@ -0,0 +1,68 @@
+"""
+条件请求基准测试：比较查看页 /prompts/<id> 和列表页 /prompts/all 完整渲染（200）
+与客户端缓存仍然有效时直接返回 304 的耗时
+
+用法: python benchmarks/bench_conditional.py [--prompts 5000] [--sample 50] [--duration 2]
+"""
+import argparse
+import random
+import time
+
+from common import create_bench_app, create_database
+
+from app.utils.pagination import NUMBERED_PAGES
+
+
+def run(client, requests, duration, expected_status):
+    """依次循环发送 [(地址, 请求头)]，返回每个请求的平均耗时（毫秒）"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        url, headers = requests[count % len(requests)]
+        response = client.get(url, headers=headers)
+        assert response.status_code == expected_status, (url, response.status_code)
+        count += 1
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=5000)
+    parser.add_argument('--sample', type=int, default=50, help='请求的提示词数')
+    parser.add_argument('--duration', type=float, default=2)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts)
+    app = create_bench_app(tmp_dir, SQL_DEBUG_HEADERS=True)
+    client = app.test_client()
+    
+    # 基准数据中约 80% 为公开提示词
+    rng = random.Random(42)
+    public_ids = []
+    while len(public_ids) < args.sample:
+        prompt_id = rng.randint(1, args.prompts)
+        if client.get(f'/prompts/{prompt_id}').status_code == 200:
+            public_ids.append(prompt_id)
+    
+    groups = {
+        '/prompts/<id>': [f'/prompts/{prompt_id}' for prompt_id in public_ids],
+        '/prompts/all': [
+            f'/prompts/all?sort={sort}&page={page}'
+            for sort in ('latest', 'trending', 'popular') for page in range(1, NUMBERED_PAGES + 1)
+        ],
+    }
+    
+    print(f'提示词数量: {args.prompts}')
+    for name, urls in groups.items():
+        full = run(client, [(url, {}) for url in urls], args.duration, 200)
+        etags = {url: client.get(url).headers['ETag'] for url in urls}
+        revalidate = run(client, [(url, {'If-None-Match': etags[url]}) for url in urls], args.duration, 304)
+        sql_count = client.get(urls[0], headers={'If-None-Match': etags[urls[0]]}).headers['X-SQL-Count']
+        print(f'{name:14s} 完整渲染: {full:6.2f} ms  304: {revalidate:6.3f} ms  ({full / revalidate:.1f}x, 304 执行 {sql_count} 条 SQL)')
+    
+    # 查看页的 304 在确认提示词可见后也会记录浏览（浏览数写入不改变页面版本号）
+    print('浏览计数器统计:', app.extensions['view_counter'].stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+重复检测基准测试：保存提示词时用 LSH 键查找近似重复与逐个比较全部签名的耗时，
+以及管理员聚类任务补齐签名和流式聚类的耗时、聚类的内存峰值
+
+用法: python benchmarks/bench_duplicates.py [--prompts 50000] [--duplicates 500] [--duration 1]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+import tracemalloc
+
+from common import create_database, create_bench_app, measure
+
+from app.database import register_functions
+from app.services.duplicate_service import (
+    _unpack, backfill_signatures, cluster_duplicates, estimate_similarity, find_duplicates, sync_prompt_minhash
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=50000)
+    parser.add_argument('--duplicates', type=int, default=500, help='复制并略作修改的提示词数')
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts)
+    app = create_bench_app(tmp_dir)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    db.row_factory = sqlite3.Row
+    register_functions(db)
+    
+    # 复制一部分提示词，只在末尾追加几个词
+    rng = random.Random(42)
+    sources = rng.sample(range(1, args.prompts + 1), args.duplicates)
+    db.executemany(
+        "INSERT INTO prompts (title, content, description, version, user_id, is_public) "
+        "SELECT title, content || ' 请用中文回答', description, version, user_id, is_public FROM prompts WHERE id = ?",
+        [(prompt_id,) for prompt_id in sources]
+    )
+    db.commit()
+    
+    with app.app_context():
+        start = time.perf_counter()
+        count = backfill_signatures(db)
+        backfill_seconds = time.perf_counter() - start
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        clusters, prompts = cluster_duplicates(db)
+        cluster_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        print(f'提示词数量: {args.prompts + args.duplicates}（其中 {args.duplicates} 条为近似副本）')
+        print(f'补齐签名: {backfill_seconds:.1f} s（{count} 条，{backfill_seconds * 1000 / count:.2f} ms/条）')
+        print(f'流式聚类: {cluster_seconds:.1f} s（开启 tracemalloc），内存峰值 {peak / 1024 / 1024:.1f} MB，'
+              f'{clusters} 组，{prompts} 条提示词')
+        
+        copies = range(args.prompts + 1, args.prompts + args.duplicates + 1)
+        found = sum(bool(find_duplicates(db, prompt_id, 1)) for prompt_id in copies)
+        print(f'LSH 查找召回: {found}/{args.duplicates}')
+        
+        def lookup():
+            return find_duplicates(db, rng.choice(copies), 1)
+        
+        _, rate = measure(lookup, args.duration)
+        print(f'LSH 查找: {1000 / rate:.3f} ms')
+        
+        def scan():
+            prompt_id = rng.choice(copies)
+            signature = _unpack(db.execute(
+                'SELECT signature FROM prompt_minhash WHERE prompt_id = ?', (prompt_id,)
+            ).fetchone()[0])
+            threshold = app.config['DUPLICATE_THRESHOLD']
+            return [
+                row[0] for row in db.execute('SELECT prompt_id, signature FROM prompt_minhash')
+                if row[0] != prompt_id and estimate_similarity(signature, _unpack(row[1])) >= threshold
+            ]
+        
+        _, rate = measure(scan, args.duration)
+        print(f'逐个比较全部签名: {1000 / rate:.1f} ms')
+        
+        def update_prompt():
+            prompt_id = rng.choice(copies)
+            db.execute("UPDATE prompts SET title = title || ' 新版' WHERE id = ?", (prompt_id,))
+            db.commit()
+            sync_prompt_minhash(db, prompt_id)
+        
+        _, rate = measure(update_prompt, args.duration)
+        print(f'修改一个提示词后更新签名: {1000 / rate:.2f} ms')
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+片段缓存基准测试：比较列表页在使用与不使用提示词卡片片段缓存时的渲染耗时
+
+用法: python benchmarks/bench_fragments.py [--prompts 5000] [--duration 3]
+"""
+import argparse
+import time
+
+from common import create_bench_app, create_database
+
+from app.utils.pagination import NUMBERED_PAGES
+
+
+def run(app, urls, duration):
+    """依次循环请求 urls，返回每个请求的平均耗时（毫秒）"""
+    client = app.test_client()
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        response = client.get(urls[count % len(urls)])
+        assert response.status_code == 200
+        count += 1
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=5000)
+    parser.add_argument('--duration', type=float, default=3)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts)
+    # FRAGMENT_CACHE_MAX_ENTRIES=0 时不缓存，每次都渲染卡片
+    uncached = create_bench_app(tmp_dir, FRAGMENT_CACHE_MAX_ENTRIES=0)
+    cached = create_bench_app(tmp_dir)
+    
+    # 所有带页码的列表页（按最新和最受欢迎排序）
+    urls = [
+        f'/prompts/all?sort={sort}&page={page}'
+        for sort in ('latest', 'popular') for page in range(1, NUMBERED_PAGES + 1)
+    ]
+    
+    # 预热（填充片段缓存）
+    run(uncached, urls, 0.5)
+    run(cached, urls, 0.5)
+    
+    without_cache = run(uncached, urls, args.duration)
+    with_cache = run(cached, urls, args.duration)
+    
+    print(f'提示词数量: {args.prompts}, 列表页数: {len(urls)}')
+    print(f'不使用片段缓存: {without_cache:6.2f} ms/页')
+    print(f'片段缓存:       {with_cache:6.2f} ms/页  ({without_cache / with_cache:.2f}x)')
+    print('片段缓存统计:', cached.extensions['fragment_cache'].stats())
+
+
+if __name__ == '__main__':
+    main()
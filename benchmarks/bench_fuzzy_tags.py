@@ -0,0 +1,75 @@
+"""
+标签模糊匹配基准测试：用字符二元组倒排列表 + 编辑距离为输错的标签查找建议，
+与逐个计算全部标签编辑距离的耗时对比，以及索引加载的耗时
+
+用法: python benchmarks/bench_fuzzy_tags.py [--tags 100000] [--queries 200] [--duration 1]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+from common import create_database, measure
+
+from app.services.tag_index import FUZZY_DISTANCE_RATIO, TagPrefixIndex, _fuzzy_key, edit_distance
+
+
+def misspell(name, rng):
+    """生成输错的标签：改变大小写或分隔符、替换一个字符或交换相邻字符"""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return name.upper()
+    if kind == 1:
+        position = rng.randrange(1, len(name))
+        return f'{name[:position]}-{name[position:]}'
+    position = rng.randrange(len(name) - 1)
+    if kind == 2:
+        return f'{name[:position]}x{name[position + 1:]}'
+    return f'{name[:position]}{name[position + 1]}{name[position]}{name[position + 2:]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tags', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(1000, tag_count=args.tags)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    db.row_factory = sqlite3.Row
+    
+    index = TagPrefixIndex()
+    start = time.perf_counter()
+    index.load(db)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f'标签数量: {args.tags}，索引加载: {load_ms:.0f} ms，{index.stats()["fuzzy_grams"]} 个二元组')
+    
+    rng = random.Random(42)
+    names = [row['name'] for row in db.execute('SELECT name FROM tags')]
+    queries = [(name, misspell(name, rng)) for name in rng.sample(names, args.queries)]
+    resolved = sum(
+        _fuzzy_key(index.resolve(query) or '') == _fuzzy_key(name)
+        or any(_fuzzy_key(candidate) == _fuzzy_key(name) for candidate in index.suggest(query))
+        for name, query in queries
+    )
+    print(f'解析或建议回原标签（或同一模糊键的标签）: {resolved}/{args.queries}')
+    
+    keys = [_fuzzy_key(name) for name in names]
+    
+    def scan(query):
+        key = _fuzzy_key(query)
+        limit = int(len(key) * FUZZY_DISTANCE_RATIO)
+        return min(keys, key=lambda candidate: edit_distance(key, candidate, limit))
+    
+    _, rate = measure(lambda: index.suggest(rng.choice(queries)[1]), args.duration)
+    print(f'二元组索引 + 编辑距离: {1000 / rate:.3f} ms')
+    _, rate = measure(lambda: scan(rng.choice(queries)[1]), args.duration)
+    print(f'逐个计算全部标签的编辑距离: {1000 / rate:.1f} ms')
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+分页基准测试：比较 LIMIT/OFFSET 与游标分页在不同深度的单页查询耗时
+
+用法: python benchmarks/bench_pagination.py [--prompts 100000] [--per-page 12] [--duration 1]
+"""
+import argparse
+import os
+import sqlite3
+
+from common import create_database, measure
+
+SELECT = (
+    'SELECT p.*, u.username, u.avatar_url FROM prompts p JOIN users u ON p.user_id = u.id '
+    'WHERE p.is_public = 1'
+)
+ORDER = 'ORDER BY p.created_at DESC, p.id DESC'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=100000)
+    parser.add_argument('--per-page', type=int, default=12)
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts, tags_per_prompt=1)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    total = db.execute('SELECT COUNT(*) FROM prompts WHERE is_public = 1').fetchone()[0]
+    
+    print(f'公开提示词数量: {total}, 每页: {args.per_page}')
+    print(f'{"页码":>8} {"OFFSET+COUNT (ms)":>18} {"游标 (ms)":>12}')
+    
+    last_page = total // args.per_page
+    for page in (1, 10, 100, last_page // 2, last_page):
+        offset = (page - 1) * args.per_page
+        
+        # 游标取上一页最后一行的排序键
+        cursor = db.execute(
+            f'SELECT p.created_at, p.id FROM prompts p WHERE p.is_public = 1 {ORDER} LIMIT 1 OFFSET ?',
+            (max(offset - 1, 0),)
+        ).fetchone()
+        
+        def offset_page():
+            db.execute('SELECT COUNT(*) FROM prompts WHERE is_public = 1').fetchone()
+            db.execute(f'{SELECT} {ORDER} LIMIT ? OFFSET ?', (args.per_page, offset)).fetchall()
+        
+        def cursor_page():
+            db.execute(
+                f'{SELECT} AND (p.created_at, p.id) < (?, ?) {ORDER} LIMIT ?',
+                (*cursor, args.per_page + 1)
+            ).fetchall()
+        
+        offset_count, _ = measure(offset_page, args.duration)
+        cursor_count, _ = measure(cursor_page, args.duration)
+        print(
+            f'{page:>8} {args.duration * 1000 / offset_count:>18.3f} '
+            f'{args.duration * 1000 / cursor_count:>12.3f}'
+        )
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+连接池基准测试：比较 /prompts/all 在使用与不使用连接池时的吞吐量
+
+用法: python benchmarks/bench_pool.py [--prompts 5000] [--threads 8] [--duration 5]
+"""
+import argparse
+import threading
+import time
+
+from common import create_bench_app, create_database
+
+
+def run(app, threads, duration):
+    """多线程并发请求 /prompts/all，返回每秒请求数"""
+    counts = [0] * threads
+    stop_at = time.perf_counter() + duration
+    
+    def worker(index):
+        client = app.test_client()
+        while time.perf_counter() < stop_at:
+            response = client.get('/prompts/all')
+            assert response.status_code == 200
+            counts[index] += 1
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts)
+    
+    # DB_POOL_MAX_IDLE=0 时连接归还后立即被淘汰，等价于每个请求重新建立连接
+    no_pool = create_bench_app(tmp_dir, DB_POOL_MAX_IDLE=0, DB_POOL_SIZE=args.threads)
+    pooled = create_bench_app(tmp_dir, DB_POOL_SIZE=args.threads)
+    
+    # 预热
+    run(no_pool, 1, 0.5)
+    run(pooled, 1, 0.5)
+    
+    without_pool = run(no_pool, args.threads, args.duration)
+    with_pool = run(pooled, args.threads, args.duration)
+    
+    print(f'提示词数量: {args.prompts}, 线程数: {args.threads}')
+    print(f'无连接池: {without_pool:8.1f} req/s')
+    print(f'连接池:   {with_pool:8.1f} req/s  ({with_pool / without_pool:.2f}x)')
+    print('连接池统计:', pooled.extensions['db_pool'].stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+相关提示词基准测试：查看页在请求中即时计算相关列表（候选 + 相似度）
+与读取预先计算的 related_prompts 表的耗时，以及修改一个提示词后增量更新的耗时
+
+用法: python benchmarks/bench_related.py [--prompts 100000] [--sample 200] [--duration 1]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+from common import create_database, create_bench_app, measure
+
+from app.database import register_functions
+from app.services.related_service import compute_related, get_related_prompts, sync_related_prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=100000)
+    parser.add_argument('--sample', type=int, default=200, help='预先计算相关列表的提示词数')
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+
+    tmp_dir = create_database(args.prompts)
+    app = create_bench_app(tmp_dir)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    db.row_factory = sqlite3.Row
+    register_functions(db)
+
+    rng = random.Random(42)
+    ids = rng.sample(range(1, args.prompts + 1), args.sample)
+
+    with app.app_context():
+        start = time.perf_counter()
+        for prompt_id in ids:
+            compute_related(db, prompt_id)
+        compute_ms = (time.perf_counter() - start) * 1000 / len(ids)
+        for prompt_id in ids:
+            sync_related_prompts(db, prompt_id)
+
+        print(f'提示词数量: {args.prompts}')
+        print(f'计算一个提示词的相关列表: {compute_ms:.2f} ms'
+              f'（全部重建约 {compute_ms * args.prompts / 1000 / 60:.1f} 分钟）')
+
+        def lookup():
+            return get_related_prompts(db, rng.choice(ids))
+
+        _, rate = measure(lookup, args.duration)
+        print(f'读取预先计算的列表: {1000 / rate:.3f} ms')
+
+        def update_prompt():
+            prompt_id = rng.choice(ids)
+            db.execute("UPDATE prompts SET title = title || ' 新版' WHERE id = ?", (prompt_id,))
+            db.commit()
+            sync_related_prompts(db, prompt_id)
+
+        _, rate = measure(update_prompt, args.duration)
+        print(f'修改一个提示词后的增量更新: {1000 / rate:.2f} ms')
+
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+搜索基准测试：比较 LIKE '%关键词%' 扫描、FTS5 全文索引（返回全部结果）
+与 FTS5 按相关度排序分页（只返回第一页）的查询耗时
+
+用法: python benchmarks/bench_search.py [--prompts 100000] [--duration 1]
+"""
+import argparse
+import os
+import sqlite3
+
+from common import create_database, measure
+
+from app.config import Config
+from app.services.search_service import build_match_query, build_search_filter
+
+SELECT = 'SELECT p.*, u.username FROM prompts p JOIN users u ON p.user_id = u.id WHERE p.is_public = 1'
+ORDER = 'ORDER BY p.created_at DESC'
+
+# 常见词（大量结果）、两个字的中文词、多个关键词、精确定位和无结果
+QUERIES = ['python', '写作', '润色 邮件', 'review story', '提示词 12345', '描述 数据 999', '不存在的关键词']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=100000)
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    
+    print(f'提示词数量: {args.prompts}')
+    print(f'{"关键词":<16} {"结果数":>8} {"LIKE (ms)":>12} {"FTS5 (ms)":>12} {"FTS5 分页 (ms)":>14}')
+    
+    for query in QUERIES:
+        # 原实现：整个关键词作为子串在标题、内容、描述中匹配
+        pattern = f'%{query}%'
+        
+        def like_search():
+            return db.execute(
+                f'{SELECT} AND (p.title LIKE ? OR p.content LIKE ? OR p.description LIKE ?) {ORDER}',
+                (pattern, pattern, pattern)
+            ).fetchall()
+        
+        search_sql, search_params = build_search_filter(query)
+        
+        def fts_search():
+            return db.execute(f'{SELECT} AND p.id IN ({search_sql}) {ORDER}', search_params).fetchall()
+        
+        match = build_match_query(query)
+        weights = Config.SEARCH_BM25_WEIGHTS
+        
+        def ranked_page():
+            return db.execute(
+                'SELECT p.id, p.title, p.description, u.username FROM prompts_fts '
+                'JOIN prompts p ON p.id = prompts_fts.rowid JOIN users u ON p.user_id = u.id '
+                'WHERE prompts_fts MATCH ? AND p.is_public = 1 '
+                'ORDER BY bm25(prompts_fts, ?, ?, ?, ?), p.id LIMIT ?',
+                (match, *weights, Config.SEARCH_PER_PAGE + 1)
+            ).fetchall()
+        
+        results = len(fts_search())
+        _, like_rate = measure(like_search, args.duration)
+        _, fts_rate = measure(fts_search, args.duration)
+        _, ranked_rate = measure(ranked_page, args.duration)
+        print(
+            f'{query:<16} {results:>8} {1000 / like_rate:>12.3f} {1000 / fts_rate:>12.3f} '
+            f'{1000 / ranked_rate:>14.3f}'
+        )
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+语义搜索基准测试：完整构建向量索引的耗时、查询（一次矩阵乘法取前 k 个）的耗时
+与修改一个提示词后增量更新的耗时
+
+用法: python benchmarks/bench_semantic.py [--prompts 50000] [--dims 512] [--duration 1]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from common import create_database, measure
+
+from app.database import register_functions
+from app.services.semantic_service import SemanticIndex, semantic_available
+
+QUERIES = ['python', '写作 润色', '帮我分析一下数据报告', 'review my email story', '不存在的关键词']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=50000)
+    parser.add_argument('--dims', type=int, default=512)
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    if not semantic_available():
+        parser.exit(1, '语义搜索需要安装 NumPy\n')
+    
+    tmp_dir = create_database(args.prompts)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    db.row_factory = sqlite3.Row
+    register_functions(db)
+    
+    index = SemanticIndex(os.path.join(tmp_dir, 'semantic'), dims=args.dims)
+    start = time.perf_counter()
+    rows = index.rebuild(db)
+    build_seconds = time.perf_counter() - start
+    matrix_mb = rows * args.dims * 4 / 1024 / 1024
+    
+    print(f'提示词数量: {args.prompts}，向量维度: {args.dims}')
+    print(f'完整构建: {build_seconds:.1f} s，{rows} 行，矩阵 {matrix_mb:.1f} MB')
+    
+    print(f'{"查询":<24} {"结果数":>6} {"最高相似度":>10} {"查询 (ms)":>10}')
+    for query in QUERIES:
+        results = index.search(query, limit=20, min_score=0.1)
+        _, rate = measure(lambda: index.search(query, limit=20, min_score=0.1), args.duration)
+        best = f'{results[0][1]:.3f}' if results else '-'
+        print(f'{query:<24} {len(results):>6} {best:>10} {1000 / rate:>10.3f}')
+    
+    prompt_id = db.execute('SELECT MAX(id) FROM prompts').fetchone()[0]
+    
+    def update_prompt():
+        db.execute("UPDATE prompts SET title = title || ' 新版' WHERE id = ?", (prompt_id,))
+        index.sync_prompt(db, prompt_id)
+    
+    _, rate = measure(update_prompt, args.duration)
+    print(f'增量更新一个提示词: {1000 / rate:.3f} ms（标记旧行删除并追加新行）')
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
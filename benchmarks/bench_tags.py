@@ -0,0 +1,113 @@
+"""
+多标签筛选基准测试：比较每个标签一层 SQL 子查询与内存倒排索引（集合运算后交给 json_each）
+求出结果第一页和总数的耗时
+
+默认 20 万个提示词、每个 5 个标签，共 100 万条标签关联
+用法: python benchmarks/bench_tags.py [--prompts 200000] [--tags 20] [--duration 1]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+import tracemalloc
+
+from common import create_database, measure
+
+from app.services.tag_postings import TagPostingIndex, make_tag_filter
+
+SELECT = 'SELECT p.id, p.title, p.created_at FROM prompts p WHERE p.is_public = 1'
+TAG_SUBQUERY = 'p.id IN (SELECT tp.prompt_id FROM tags_prompts tp JOIN tags t ON tp.tag_id = t.id WHERE t.name = ?)'
+PAGE = 'ORDER BY p.created_at DESC, p.id DESC LIMIT 12'
+
+
+def sql_filter(tag_filter):
+    """原实现的扩展：每个标签一层子查询"""
+    where = [TAG_SUBQUERY] * len(tag_filter.all_of)
+    params = list(tag_filter.all_of)
+    if tag_filter.any_of:
+        where.append(
+            'p.id IN (SELECT tp.prompt_id FROM tags_prompts tp JOIN tags t ON tp.tag_id = t.id '
+            f"WHERE t.name IN ({', '.join('?' * len(tag_filter.any_of))}))"
+        )
+        params.extend(tag_filter.any_of)
+    for name in tag_filter.none_of:
+        where.append(f'NOT {TAG_SUBQUERY}')
+        params.append(name)
+    return ' AND '.join(where), params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompts', type=int, default=200000)
+    parser.add_argument('--tags', type=int, default=20)
+    parser.add_argument('--tags-per-prompt', type=int, default=5)
+    parser.add_argument('--duration', type=float, default=1)
+    args = parser.parse_args()
+    
+    tmp_dir = create_database(args.prompts, tag_count=args.tags, tags_per_prompt=args.tags_per_prompt)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    db.row_factory = sqlite3.Row
+    
+    links = db.execute('SELECT COUNT(*) FROM tags_prompts').fetchone()[0]
+    names = [row['name'] for row in db.execute('SELECT name FROM tags ORDER BY id LIMIT 8')]
+    
+    index = TagPostingIndex()
+    start = time.perf_counter()
+    index.load(db)
+    load_ms = (time.perf_counter() - start) * 1000
+    
+    # 内存单独统计（tracemalloc 会明显拖慢加载）
+    tracemalloc.start()
+    measured = TagPostingIndex()
+    measured.load(db)
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    del measured
+    
+    print(f'提示词数量: {args.prompts}，标签关联: {links}')
+    print(f'倒排索引加载: {load_ms:.0f} ms，内存 {memory_mb:.1f} MB')
+    
+    filters = {
+        '2 个标签 AND': make_tag_filter(names[:2]),
+        '5 个标签 AND': make_tag_filter(names[:5]),
+        '3 个标签 OR': make_tag_filter(any_of=names[:3]),
+        '2 AND + 2 OR + 1 NOT': make_tag_filter(names[:2], names[2:4], names[4:5]),
+        '5 AND + 2 NOT': make_tag_filter(names[:5], none_of=names[5:7]),
+    }
+    
+    print(f'{"条件":<22} {"结果数":>8} {"SQL 子查询 (ms)":>16} {"倒排索引 (ms)":>14} {"其中集合运算 (ms)":>18}')
+    for label, tag_filter in filters.items():
+        where, params = sql_filter(tag_filter)
+        
+        def sql_query():
+            count = db.execute(f'SELECT COUNT(*) FROM prompts p WHERE p.is_public = 1 AND {where}', params).fetchone()[0]
+            rows = db.execute(f'{SELECT} AND {where} {PAGE}', params).fetchall()
+            return count, rows
+        
+        def index_query():
+            ids = index.match(tag_filter)
+            select = SELECT.replace('p.is_public', '+p.is_public') if index.prefers_lookup(len(ids)) else SELECT
+            rows = db.execute(f'{select} AND p.id IN (SELECT value FROM json_each(?)) {PAGE}', [json.dumps(ids)]).fetchall()
+            return len(ids), rows
+        
+        def set_operations():
+            return index.match(tag_filter)
+        
+        sql_count, sql_rows = sql_query()
+        index_count, index_rows = index_query()
+        assert sql_count == index_count and [row['id'] for row in sql_rows] == [row['id'] for row in index_rows], label
+        
+        _, sql_rate = measure(sql_query, args.duration)
+        _, index_rate = measure(index_query, args.duration)
+        _, match_rate = measure(set_operations, args.duration)
+        print(
+            f'{label:<22} {index_count:>8} {1000 / sql_rate:>16.3f} {1000 / index_rate:>14.3f} '
+            f'{1000 / match_rate:>18.3f}'
+        )
+    
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+查询计划回归检查
+
+在临时数据库上访问主要页面并执行常见写操作，记录应用实际执行的全部 SQL 语句，
+然后对每条语句执行 EXPLAIN QUERY PLAN：
+
+- 出现全表扫描（SCAN）且未在 ALLOWED_SCANS 中登记时失败
+- 与快照文件 query_plans.json 不一致时失败（确认无误后使用 --update 更新快照）
+
+pytest 通过 tests/test_query_plans.py 执行同样的检查；本脚本用于查看计划和更新快照。
+
+用法: python benchmarks/check_query_plans.py [--update] [--verbose]
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from common import create_bench_app, create_database
+
+from app.database import register_functions
+
+SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plans.json')
+
+# 允许全表扫描的语句模板（正则表达式）及原因
+ALLOWED_SCANS = [
+    (r'^SELECT \* FROM users ORDER BY id$', '管理员用户列表需要返回全部用户'),
+    (r'^SELECT ic\.\*, .* FROM invite_codes ic ', '管理员邀请码列表需要返回全部邀请码'),
+    (r'^SELECT .*FROM search_pending\b', '待更新全文搜索索引的队列，处理后即清空'),
+    (r'^SELECT .* FROM trending_events\b', '待累加的热度事件，处理后即清空'),
+    (r'^SELECT t\.name, COALESCE\(ts\.prompt_count, \?\) AS count FROM tags t ', '标签自动补全索引定期整体重建'),
+    (r'^SELECT t\.name, g\.ids FROM \(SELECT tag_id, group_concat\(prompt_id\) ', '多标签筛选倒排索引整体重建'),
+    (r'^SELECT name, value FROM stats_totals$', '全站计数表只有几行'),
+    (r'^SELECT COUNT\(\*\) FROM \(SELECT \? FROM .* LIMIT \?\)$', '分页计数只扫描子查询中有上限的结果'),
+    (r'^SELECT term, doc FROM prompts_fts_vocab WHERE term IN ', 'fts5vocab 按 term 逐个定位（INDEX 1 为 term 等值约束）'),
+    (r'^SELECT d\.cluster_id, .* FROM duplicate_clusters d ', '管理后台按簇大小排序需要统计全部重复簇（只包含重复的提示词）'),
+    (r'\(SELECT data_version FROM pragma_data_version\)$', 'PRAGMA 表值函数只返回一行'),
+]
+
+# 需要访问的页面（以管理员身份登录）
+PAGES = [
+    '/', '/prompts/all', '/prompts/all?page=3', '/prompts/all?sort=trending', '/prompts/all?sort=popular&page=2', '/prompts/all?tag={tag}', '/my-prompts',
+    '/my-prompts?page=2', '/prompts/{prompt_id}', '/prompts/{prompt_id}/edit', '/prompts/create',
+    '/search?q={word}', '/search?q=python {word}', '/search?tag={tag}', '/api/tags/autocomplete?q={word}', '/search?q={word}&tag={tag}',
+    '/prompts/all?tag={tag}&not_tag={word}', '/prompts/all?tag={tag}-x', '/search?q={word}&any_tag={tag}&any_tag={word}', '/profile/1',
+    '/admin/users', '/admin/invite-codes', '/admin/duplicates', '/health',
+]
+
+# 需要沿游标继续翻页的列表（先访问最后一个带页码的页面）
+CURSOR_PAGES = ['/prompts/all?page=5', '/my-prompts?page=5']
+CURSOR_PATTERN = re.compile(r'cursor=([\w-]+)')
+
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+VIRTUAL_INDEX_PATTERN = re.compile(r'VIRTUAL TABLE INDEX \d+:\S')
+SHADOW_TABLE_PATTERN = re.compile(r'_fts_(?:data|idx|content|docsize|config)\b')
+IN_LIST_PATTERN = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+
+def normalize(sql):
+    """将语句中的字面量替换为占位符，得到语句模板"""
+    template = LITERAL_PATTERN.sub('?', sql)
+    template = IN_LIST_PATTERN.sub('(?...)', template)
+    return ' '.join(template.split())
+
+
+def collect_statements(app, prompt_id, tag, word):
+    """访问页面并执行写操作，返回 {模板: 展开参数后的语句}"""
+    statements = {}
+    
+    def record(sql):
+        # 忽略 FTS5 访问内部影子表的语句
+        if SHADOW_TABLE_PATTERN.search(sql):
+            return
+        if sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')):
+            statements.setdefault(normalize(sql), sql)
+    
+    @app.before_request
+    def trace():
+        from app.database import get_db, get_write_db
+        get_db().set_trace_callback(record)
+        get_write_db().set_trace_callback(record)
+    
+    client = app.test_client()
+    response = client.post('/login', data={'email': 'admin@example.com', 'password': 'admin123'})
+    assert response.status_code == 302, '登录失败'
+    
+    for page in PAGES:
+        url = page.format(prompt_id=prompt_id, tag=tag, word=word)
+        response = client.get(url)
+        assert response.status_code in (200, 302), f'{url} 返回 {response.status_code}'
+    
+    # 下一页游标，再从游标页面向前翻页
+    for page in CURSOR_PAGES:
+        path = page.split('?')[0]
+        html = client.get(page).get_data(as_text=True)
+        for cursor in CURSOR_PATTERN.findall(html):
+            html = client.get(f'{path}?cursor={cursor}').get_data(as_text=True)
+            for prev_cursor in CURSOR_PATTERN.findall(html):
+                client.get(f'{path}?cursor={prev_cursor}')
+    
+    client.post(f'/prompts/{prompt_id}/favorite')
+    client.post('/prompts/create', data={
+        'title': '检查', 'content': '检查内容', 'description': '', 'tags': f'{tag},新标签', 'is_public': 'on'
+    })
+    client.post(f'/prompts/{prompt_id}/edit', data={
+        'title': '修改', 'content': '修改内容', 'description': '', 'tags': tag, 'is_public': 'on'
+    })
+    client.get(f'/delete-prompt/{prompt_id + 1}')
+    return statements
+
+
+def explain(db, sql):
+    """返回语句的查询计划（每个步骤一行）"""
+    rows = db.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    return [row[3] for row in rows]
+
+
+def full_scans(plan):
+    """找出计划中的全表扫描步骤（虚拟表带有 MATCH 等约束、json_each 遍历参数中的 ID 列表时不算扫描）"""
+    return [
+        step for step in plan
+        if step.startswith('SCAN ') and not step.startswith(('SCAN CONSTANT ROW', 'SCAN json_each '))
+        and not VIRTUAL_INDEX_PATTERN.search(step)
+    ]
+
+
+def allowed_reason(template):
+    """返回允许该语句全表扫描的原因，未登记时返回 None"""
+    for pattern, reason in ALLOWED_SCANS:
+        if re.search(pattern, template):
+            return reason
+    return None
+
+
+def collect_plans():
+    """在临时数据库上执行页面和写操作，返回 {语句模板: 查询计划}"""
+    tmp_dir = create_database(prompt_count=2000, tag_count=300)
+    app = create_bench_app(tmp_dir)
+    
+    db_path = app.config['DATABASE']
+    db = sqlite3.connect(db_path)
+    prompt_id, tag = db.execute(
+        'SELECT tp.prompt_id, t.name FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id LIMIT 1'
+    ).fetchone()
+    db.close()
+    
+    statements = collect_statements(app, prompt_id, tag, '写作')
+    
+    db = sqlite3.connect(db_path)
+    register_functions(db)
+    try:
+        return {template: explain(db, sql) for template, sql in sorted(statements.items())}
+    finally:
+        db.close()
+
+
+def scan_failures(plans):
+    """返回未登记的全表扫描"""
+    return [
+        f'全表扫描: {template}\n    ' + '\n    '.join(plan)
+        for template, plan in sorted(plans.items())
+        if full_scans(plan) and not allowed_reason(template)
+    ]
+
+
+def load_snapshot():
+    """读取快照文件（不存在时返回 None）"""
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    with open(SNAPSHOT_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def snapshot_failures(plans, snapshot):
+    """返回与快照不一致的语句（快照中有而本次未执行的语句不算失败）"""
+    failures = []
+    for template, plan in sorted(plans.items()):
+        if template not in snapshot:
+            failures.append(f'快照中没有该语句（新增语句请使用 --update）: {template}')
+        elif snapshot[template] != plan:
+            failures.append(
+                f'查询计划变化: {template}\n  快照:\n    ' + '\n    '.join(snapshot[template])
+                + '\n  当前:\n    ' + '\n    '.join(plan)
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--update', action='store_true', help='用当前查询计划覆盖快照文件')
+    parser.add_argument('--verbose', action='store_true', help='输出每条语句的查询计划')
+    args = parser.parse_args()
+    
+    plans = collect_plans()
+    if args.verbose:
+        for template, plan in plans.items():
+            print(template)
+            for step in plan:
+                print('    ' + step)
+    
+    failures = scan_failures(plans)
+    snapshot = load_snapshot()
+    if args.update:
+        with open(SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(plans, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'已更新快照: {len(plans)} 条语句')
+    elif snapshot is not None:
+        failures += snapshot_failures(plans, snapshot)
+        for template in snapshot.keys() - plans.keys():
+            print(f'提示: 快照中的语句本次未执行: {template}')
+    else:
+        failures.append(f'快照文件不存在，请先执行 --update 生成: {SNAPSHOT_FILE}')
+    
+    print(f'共检查 {len(plans)} 条语句')
+    if failures:
+        print('\n'.join(failures))
+        return False
+    print('✓ 查询计划检查通过')
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,98 @@
+"""
+基准测试公共工具：创建临时数据库并批量生成测试数据
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import init_db  # noqa: E402
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.database import register_functions  # noqa: E402
+from app.services.search_service import rebuild_search_index  # noqa: E402
+
+WORDS = [
+    '写作', '翻译', '代码', '营销', '学习', '英语', '数据', '分析', '绘画', '总结',
+    '润色', '小说', '邮件', '报告', '面试', '简历', '产品', '设计', '运营', '教程',
+    'python', 'sql', 'seo', 'gpt', 'prompt', 'review', 'story', 'email', 'code', 'data',
+]
+
+
+def make_config(tmp_dir, **overrides):
+    """生成指向临时数据库的配置类"""
+    attrs = {
+        'DATABASE': os.path.join(tmp_dir, 'instance', 'prompts.db'),
+        'UPLOAD_FOLDER': os.path.join(tmp_dir, 'avatars'),
+        'LOG_DIR': os.path.join(tmp_dir, 'logs'),
+        'TESTING': True,
+    }
+    attrs.update(overrides)
+    return type('BenchConfig', (Config,), attrs)
+
+
+def create_database(prompt_count=1000, tag_count=200, tags_per_prompt=3, seed=42):
+    """在临时目录中初始化数据库并生成测试数据，返回临时目录"""
+    tmp_dir = tempfile.mkdtemp(prefix='prompt-bench-')
+    cwd = os.getcwd()
+    os.chdir(tmp_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            init_db.init_db()
+    finally:
+        os.chdir(cwd)
+    
+    rng = random.Random(seed)
+    db = sqlite3.connect(os.path.join(tmp_dir, 'instance', 'prompts.db'))
+    register_functions(db)
+    tag_names = [f'{rng.choice(WORDS)}{i}' for i in range(tag_count)]
+    db.executemany('INSERT INTO tags (name) VALUES (?)', [(name,) for name in tag_names])
+    
+    def prompt_rows():
+        for i in range(prompt_count):
+            words = ' '.join(rng.choice(WORDS) for _ in range(40))
+            yield (
+                f'提示词 {i} {rng.choice(WORDS)}', words, f'描述 {rng.choice(WORDS)} {i}',
+                '1.0', 1, 1 if rng.random() < 0.8 else 0, rng.randint(0, 5000),
+                f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00'
+            )
+    
+    db.executemany(
+        'INSERT INTO prompts (title, content, description, version, user_id, is_public, view_count, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        prompt_rows()
+    )
+    
+    def link_rows():
+        for prompt_id in range(1, prompt_count + 1):
+            for tag_id in rng.sample(range(1, tag_count + 1), tags_per_prompt):
+                yield tag_id, prompt_id
+    
+    db.executemany('INSERT INTO tags_prompts (tag_id, prompt_id) VALUES (?, ?)', link_rows())
+    # 全文搜索索引由应用写入（触发器只记录待处理的 ID），这里一次建好，不用应用的基准测试也能直接查询
+    rebuild_search_index(db)
+    db.close()
+    return tmp_dir
+
+
+def create_bench_app(tmp_dir, **config_overrides):
+    """基于临时数据库创建应用"""
+    return create_app(make_config(tmp_dir, **config_overrides))
+
+
+def measure(func, duration=3.0):
+    """在给定时长内重复调用 func，返回 (次数, 每秒次数)"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        func()
+        count += 1
+    elapsed = time.perf_counter() - start
+    return count, count / elapsed
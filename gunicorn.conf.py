@@ -0,0 +1,9 @@
+"""
+Gunicorn 配置（在项目根目录启动时自动加载）
+"""
+
+
+def worker_exit(server, worker):
+    """工作进程退出（包括被回收）前写入缓冲的浏览计数"""
+    from app.services.view_counter import flush_all
+    flush_all()
@@ -4,6 +4,8 @@ import random
 import string
 import sys
 from werkzeug.security import generate_password_hash
+from app.config import Config
+from app.database.migrations import run_migrations
 
 def generate_random_code(length=8):
     """生成随机邀请码"""
@@ -40,101 +42,8 @@ def init_db():
         
         print("创建表...")
         
-        # 创建用户表
-        cursor.execute('''
-        CREATE TABLE users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_admin BOOLEAN DEFAULT 0,
-            is_banned BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # 创建邀请码表
-        cursor.execute('''
-        CREATE TABLE invite_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            code TEXT UNIQUE NOT NULL,
-            is_used BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            used_at TIMESTAMP,
-            creator_id INTEGER,
-            used_by INTEGER,
-            FOREIGN KEY (creator_id) REFERENCES users (id),
-            FOREIGN KEY (used_by) REFERENCES users (id)
-        )
-        ''')
-        
-        # 创建标签表
-        cursor.execute('''
-        CREATE TABLE tags (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # 创建提示词表
-        cursor.execute('''
-        CREATE TABLE prompts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            description TEXT,
-            version TEXT,
-            cover_image TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_id INTEGER NOT NULL,
-            is_public BOOLEAN DEFAULT 0,
-            view_count INTEGER DEFAULT 0,
-            share_count INTEGER DEFAULT 0,
-            _metadata TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        ''')
-        
-        # 创建标签-提示词关联表
-        cursor.execute('''
-        CREATE TABLE tags_prompts (
-            tag_id INTEGER NOT NULL,
-            prompt_id INTEGER NOT NULL,
-            PRIMARY KEY (tag_id, prompt_id),
-            FOREIGN KEY (tag_id) REFERENCES tags (id),
-            FOREIGN KEY (prompt_id) REFERENCES prompts (id)
-        )
-        ''')
-        
-        # 创建 AI 配置表
-        cursor.execute('''
-        CREATE TABLE ai_configs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL UNIQUE,
-            provider TEXT NOT NULL DEFAULT 'openai',
-            api_key TEXT NOT NULL,
-            base_url TEXT,
-            model TEXT DEFAULT 'gpt-3.5-turbo',
-            temperature REAL DEFAULT 0.7,
-            max_tokens INTEGER DEFAULT 500,
-            enabled BOOLEAN DEFAULT 1,
-            title_max_length INTEGER DEFAULT 30,
-            description_max_length INTEGER DEFAULT 100,
-            tag_count INTEGER DEFAULT 5,
-            tag_two_char_count INTEGER DEFAULT 0,
-            tag_four_char_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-        ''')
-        
-        # 创建索引
-        cursor.execute('''
-        CREATE INDEX idx_ai_configs_user_id ON ai_configs(user_id)
-        ''')
+        # 表结构由 migrations/ 目录中的迁移脚本统一维护
+        run_migrations(conn, Config.MIGRATIONS_DIR)
         
         print("创建管理员账号...")
         
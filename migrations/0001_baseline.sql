@@ -0,0 +1,94 @@
+-- 基础表结构（与原 init_db.py 一致，已有数据库执行时不会改变现有表）
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    is_admin BOOLEAN DEFAULT 0,
+    is_banned BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS invite_codes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE NOT NULL,
+    is_used BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    used_at TIMESTAMP,
+    creator_id INTEGER,
+    used_by INTEGER,
+    FOREIGN KEY (creator_id) REFERENCES users (id),
+    FOREIGN KEY (used_by) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    description TEXT,
+    version TEXT,
+    cover_image TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER NOT NULL,
+    is_public BOOLEAN DEFAULT 0,
+    view_count INTEGER DEFAULT 0,
+    share_count INTEGER DEFAULT 0,
+    _metadata TEXT,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS tags_prompts (
+    tag_id INTEGER NOT NULL,
+    prompt_id INTEGER NOT NULL,
+    PRIMARY KEY (tag_id, prompt_id),
+    FOREIGN KEY (tag_id) REFERENCES tags (id),
+    FOREIGN KEY (prompt_id) REFERENCES prompts (id)
+);
+
+CREATE TABLE IF NOT EXISTS ai_configs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE,
+    provider TEXT NOT NULL DEFAULT 'openai',
+    api_key TEXT NOT NULL,
+    base_url TEXT,
+    model TEXT DEFAULT 'gpt-3.5-turbo',
+    temperature REAL DEFAULT 0.7,
+    max_tokens INTEGER DEFAULT 500,
+    enabled BOOLEAN DEFAULT 1,
+    title_max_length INTEGER DEFAULT 30,
+    description_max_length INTEGER DEFAULT 100,
+    tag_count INTEGER DEFAULT 5,
+    tag_two_char_count INTEGER DEFAULT 0,
+    tag_four_char_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_configs_user_id ON ai_configs(user_id);
+
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    prompt_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (prompt_id) REFERENCES prompts (id),
+    UNIQUE(user_id, prompt_id)
+);
+
+-- 旧版首页会创建该表，保留以兼容已有数据库
+CREATE TABLE IF NOT EXISTS prompt_tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt_id INTEGER,
+    tag TEXT,
+    FOREIGN KEY (prompt_id) REFERENCES prompts (id) ON DELETE CASCADE
+);
@@ -0,0 +1,3 @@
+-- 用户头像字段（旧版本在请求中按需添加，已存在时迁移器会跳过该语句）
+
+ALTER TABLE users ADD COLUMN avatar_url TEXT;
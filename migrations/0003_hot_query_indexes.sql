@@ -0,0 +1,20 @@
+-- 热点查询索引
+-- tags_prompts(tag_id, prompt_id) 与 tags(name) 已分别由主键和 UNIQUE 约束建立索引，这里不再重复创建
+
+-- 公开提示词按热度排序（首页、get_public_prompts）
+CREATE INDEX IF NOT EXISTS idx_prompts_public_views ON prompts(is_public, view_count, created_at);
+
+-- 公开提示词按时间排序（所有提示词页面、搜索）
+CREATE INDEX IF NOT EXISTS idx_prompts_public_created ON prompts(is_public, created_at);
+
+-- 用户自己的提示词列表和统计
+CREATE INDEX IF NOT EXISTS idx_prompts_user_created ON prompts(user_id, created_at);
+
+-- 按提示词加载标签（覆盖索引，无需回表）
+CREATE INDEX IF NOT EXISTS idx_tags_prompts_prompt ON tags_prompts(prompt_id, tag_id);
+
+-- 个人资料页的收藏列表
+CREATE INDEX IF NOT EXISTS idx_favorites_user_created ON favorites(user_id, created_at);
+
+-- 删除提示词时清理收藏
+CREATE INDEX IF NOT EXISTS idx_favorites_prompt ON favorites(prompt_id);
@@ -0,0 +1,169 @@
+-- 统计计数表：由触发器在同一事务中维护，首页、个人资料页和列表页直接读取，不再聚合扫描
+-- 公开提示词的判断与列表查询一致（is_public = 1），使用 IS 保证 NULL 时结果为 0
+
+-- 全站计数：users / prompts / public_prompts / views
+CREATE TABLE IF NOT EXISTS stats_totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+-- 用户计数：创建的提示词数、公开提示词数、提示词总浏览数、收藏数
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    prompt_count INTEGER NOT NULL DEFAULT 0,
+    public_prompt_count INTEGER NOT NULL DEFAULT 0,
+    view_count INTEGER NOT NULL DEFAULT 0,
+    favorite_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- 标签计数：关联的提示词数、关联的公开提示词数
+CREATE TABLE IF NOT EXISTS tag_stats (
+    tag_id INTEGER PRIMARY KEY,
+    prompt_count INTEGER NOT NULL DEFAULT 0,
+    public_prompt_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- 热门标签按公开提示词数排序
+CREATE INDEX IF NOT EXISTS idx_tag_stats_public ON tag_stats(public_prompt_count);
+
+-- 根据现有数据初始化
+INSERT OR REPLACE INTO stats_totals (name, value) VALUES
+    ('users', (SELECT COUNT(*) FROM users)),
+    ('prompts', (SELECT COUNT(*) FROM prompts)),
+    ('public_prompts', (SELECT COUNT(*) FROM prompts WHERE is_public = 1)),
+    ('views', (SELECT COALESCE(SUM(view_count), 0) FROM prompts));
+
+INSERT OR REPLACE INTO user_stats (user_id, prompt_count, public_prompt_count, view_count, favorite_count)
+SELECT u.id,
+       (SELECT COUNT(*) FROM prompts p WHERE p.user_id = u.id),
+       (SELECT COUNT(*) FROM prompts p WHERE p.user_id = u.id AND p.is_public = 1),
+       (SELECT COALESCE(SUM(p.view_count), 0) FROM prompts p WHERE p.user_id = u.id),
+       (SELECT COUNT(*) FROM favorites f WHERE f.user_id = u.id)
+FROM users u;
+
+INSERT OR REPLACE INTO tag_stats (tag_id, prompt_count, public_prompt_count)
+SELECT t.id,
+       (SELECT COUNT(*) FROM tags_prompts tp JOIN prompts p ON p.id = tp.prompt_id WHERE tp.tag_id = t.id),
+       (SELECT COUNT(*) FROM tags_prompts tp JOIN prompts p ON p.id = tp.prompt_id WHERE tp.tag_id = t.id AND p.is_public = 1)
+FROM tags t;
+
+-- 用户
+CREATE TRIGGER IF NOT EXISTS trg_stats_users_insert AFTER INSERT ON users
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'users';
+    INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_users_delete AFTER DELETE ON users
+BEGIN
+    UPDATE stats_totals SET value = value - 1 WHERE name = 'users';
+    DELETE FROM user_stats WHERE user_id = OLD.id;
+END;
+
+-- 标签
+CREATE TRIGGER IF NOT EXISTS trg_stats_tags_insert AFTER INSERT ON tags
+BEGIN
+    INSERT OR IGNORE INTO tag_stats (tag_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_tags_delete AFTER DELETE ON tags
+BEGIN
+    DELETE FROM tag_stats WHERE tag_id = OLD.id;
+END;
+
+-- 提示词
+CREATE TRIGGER IF NOT EXISTS trg_stats_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'prompts';
+    UPDATE stats_totals SET value = value + (NEW.is_public IS 1) WHERE name = 'public_prompts';
+    UPDATE stats_totals SET value = value + COALESCE(NEW.view_count, 0) WHERE name = 'views';
+    INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+    UPDATE user_stats SET
+        prompt_count = prompt_count + 1,
+        public_prompt_count = public_prompt_count + (NEW.is_public IS 1),
+        view_count = view_count + COALESCE(NEW.view_count, 0)
+    WHERE user_id = NEW.user_id;
+END;
+
+-- 标签关联可能在删除提示词之前或之后删除：提示词删除时扣减仍然存在的关联，
+-- 关联删除时只在提示词仍然存在时扣减，两种顺序都只扣减一次
+CREATE TRIGGER IF NOT EXISTS trg_stats_prompts_delete AFTER DELETE ON prompts
+BEGIN
+    UPDATE stats_totals SET value = value - 1 WHERE name = 'prompts';
+    UPDATE stats_totals SET value = value - (OLD.is_public IS 1) WHERE name = 'public_prompts';
+    UPDATE stats_totals SET value = value - COALESCE(OLD.view_count, 0) WHERE name = 'views';
+    UPDATE user_stats SET
+        prompt_count = prompt_count - 1,
+        public_prompt_count = public_prompt_count - (OLD.is_public IS 1),
+        view_count = view_count - COALESCE(OLD.view_count, 0)
+    WHERE user_id = OLD.user_id;
+    UPDATE tag_stats SET
+        prompt_count = prompt_count - 1,
+        public_prompt_count = public_prompt_count - (OLD.is_public IS 1)
+    WHERE tag_id IN (SELECT tag_id FROM tags_prompts WHERE prompt_id = OLD.id);
+END;
+
+-- 浏览数变化（浏览计数批量写入）只更新浏览数
+CREATE TRIGGER IF NOT EXISTS trg_stats_prompts_views AFTER UPDATE OF view_count ON prompts
+WHEN NEW.is_public IS OLD.is_public AND NEW.user_id IS OLD.user_id
+BEGIN
+    UPDATE stats_totals SET value = value + COALESCE(NEW.view_count, 0) - COALESCE(OLD.view_count, 0)
+    WHERE name = 'views';
+    UPDATE user_stats SET view_count = view_count + COALESCE(NEW.view_count, 0) - COALESCE(OLD.view_count, 0)
+    WHERE user_id = NEW.user_id;
+END;
+
+-- 公开状态或所属用户变化时，按删除旧行、插入新行的方式调整计数
+CREATE TRIGGER IF NOT EXISTS trg_stats_prompts_update AFTER UPDATE OF is_public, view_count, user_id ON prompts
+WHEN NEW.is_public IS NOT OLD.is_public OR NEW.user_id IS NOT OLD.user_id
+BEGIN
+    UPDATE stats_totals SET value = value + (NEW.is_public IS 1) - (OLD.is_public IS 1)
+    WHERE name = 'public_prompts';
+    UPDATE stats_totals SET value = value + COALESCE(NEW.view_count, 0) - COALESCE(OLD.view_count, 0)
+    WHERE name = 'views';
+    UPDATE user_stats SET
+        prompt_count = prompt_count - 1,
+        public_prompt_count = public_prompt_count - (OLD.is_public IS 1),
+        view_count = view_count - COALESCE(OLD.view_count, 0)
+    WHERE user_id = OLD.user_id;
+    INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+    UPDATE user_stats SET
+        prompt_count = prompt_count + 1,
+        public_prompt_count = public_prompt_count + (NEW.is_public IS 1),
+        view_count = view_count + COALESCE(NEW.view_count, 0)
+    WHERE user_id = NEW.user_id;
+    UPDATE tag_stats SET public_prompt_count = public_prompt_count + (NEW.is_public IS 1) - (OLD.is_public IS 1)
+    WHERE tag_id IN (SELECT tag_id FROM tags_prompts WHERE prompt_id = NEW.id);
+END;
+
+-- 标签关联
+CREATE TRIGGER IF NOT EXISTS trg_stats_tags_prompts_insert AFTER INSERT ON tags_prompts
+WHEN EXISTS (SELECT 1 FROM prompts WHERE id = NEW.prompt_id)
+BEGIN
+    INSERT OR IGNORE INTO tag_stats (tag_id) VALUES (NEW.tag_id);
+    UPDATE tag_stats SET
+        prompt_count = prompt_count + 1,
+        public_prompt_count = public_prompt_count + (SELECT is_public IS 1 FROM prompts WHERE id = NEW.prompt_id)
+    WHERE tag_id = NEW.tag_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_tags_prompts_delete AFTER DELETE ON tags_prompts
+WHEN EXISTS (SELECT 1 FROM prompts WHERE id = OLD.prompt_id)
+BEGIN
+    UPDATE tag_stats SET
+        prompt_count = prompt_count - 1,
+        public_prompt_count = public_prompt_count - (SELECT is_public IS 1 FROM prompts WHERE id = OLD.prompt_id)
+    WHERE tag_id = OLD.tag_id;
+END;
+
+-- 收藏
+CREATE TRIGGER IF NOT EXISTS trg_stats_favorites_insert AFTER INSERT ON favorites
+BEGIN
+    INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+    UPDATE user_stats SET favorite_count = favorite_count + 1 WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_favorites_delete AFTER DELETE ON favorites
+BEGIN
+    UPDATE user_stats SET favorite_count = favorite_count - 1 WHERE user_id = OLD.user_id;
+END;
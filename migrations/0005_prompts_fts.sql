@@ -0,0 +1,4 @@
+-- 全文搜索索引（已合并到 0006）
+-- 原脚本创建 trigram 分词的 prompts_fts（需要 SQLite 3.34+），紧接着就被 0006 删除并改用 unicode61 重建；
+-- 在较旧的 SQLite 上 trigram 会让迁移停在这里，因此不再创建任何对象。
+-- 已执行过原脚本的数据库见 app/database/migrations.py 中的 SUPERSEDED_CHECKSUMS
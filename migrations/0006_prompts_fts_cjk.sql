@@ -0,0 +1,71 @@
+-- 全文搜索改用 CJK 双字切分：写入索引的是 search_tokens() 的分词结果（见 app/utils/text.py），
+-- 由 unicode61 按空格切分；1～2 个字的中文关键词也能走索引，不再回退到 LIKE 扫描
+-- search_tokens() 是应用注册的自定义函数，写入提示词的连接都需要先注册（app.database.register_functions）
+DROP TRIGGER IF EXISTS trg_fts_prompts_insert;
+DROP TRIGGER IF EXISTS trg_fts_prompts_update;
+DROP TRIGGER IF EXISTS trg_fts_prompts_delete;
+DROP TRIGGER IF EXISTS trg_fts_tags_prompts_insert;
+DROP TRIGGER IF EXISTS trg_fts_tags_prompts_delete;
+DROP TRIGGER IF EXISTS trg_fts_tags_update;
+DROP TABLE IF EXISTS prompts_fts;
+
+CREATE VIRTUAL TABLE prompts_fts USING fts5(
+    title, description, content, tags,
+    tokenize = 'unicode61'
+);
+
+-- 根据现有数据初始化
+INSERT INTO prompts_fts (rowid, title, description, content, tags)
+SELECT p.id, search_tokens(p.title), search_tokens(p.description), search_tokens(p.content),
+       search_tokens((SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id
+                      WHERE tp.prompt_id = p.id))
+FROM prompts p;
+
+-- 提示词
+CREATE TRIGGER trg_fts_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    INSERT INTO prompts_fts (rowid, title, description, content, tags)
+    VALUES (NEW.id, search_tokens(NEW.title), search_tokens(NEW.description), search_tokens(NEW.content), '');
+END;
+
+CREATE TRIGGER trg_fts_prompts_update AFTER UPDATE OF title, description, content ON prompts
+BEGIN
+    UPDATE prompts_fts SET
+        title = search_tokens(NEW.title),
+        description = search_tokens(NEW.description),
+        content = search_tokens(NEW.content)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER trg_fts_prompts_delete AFTER DELETE ON prompts
+BEGIN
+    DELETE FROM prompts_fts WHERE rowid = OLD.id;
+END;
+
+-- 标签关联变化时重新拼接该提示词的标签名
+CREATE TRIGGER trg_fts_tags_prompts_insert AFTER INSERT ON tags_prompts
+BEGIN
+    UPDATE prompts_fts SET tags = search_tokens((
+        SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id
+        WHERE tp.prompt_id = NEW.prompt_id
+    ))
+    WHERE rowid = NEW.prompt_id;
+END;
+
+CREATE TRIGGER trg_fts_tags_prompts_delete AFTER DELETE ON tags_prompts
+BEGIN
+    UPDATE prompts_fts SET tags = search_tokens((
+        SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id
+        WHERE tp.prompt_id = OLD.prompt_id
+    ))
+    WHERE rowid = OLD.prompt_id;
+END;
+
+CREATE TRIGGER trg_fts_tags_update AFTER UPDATE OF name ON tags
+BEGIN
+    UPDATE prompts_fts SET tags = search_tokens((
+        SELECT group_concat(t.name, ' ') FROM tags_prompts tp JOIN tags t ON t.id = tp.tag_id
+        WHERE tp.prompt_id = prompts_fts.rowid
+    ))
+    WHERE rowid IN (SELECT prompt_id FROM tags_prompts WHERE tag_id = NEW.id);
+END;
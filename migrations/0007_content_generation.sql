@@ -0,0 +1,34 @@
+-- 内容版本号：提示词的可搜索内容、公开状态、归属或标签关联变化时加 1，
+-- 各工作进程的搜索/列表结果缓存以此判断是否失效（浏览数变化不影响版本号）
+INSERT OR IGNORE INTO stats_totals (name, value) VALUES ('content_generation', 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_prompts_update
+AFTER UPDATE OF title, description, content, is_public, user_id, created_at ON prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_prompts_delete AFTER DELETE ON prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_tags_prompts_insert AFTER INSERT ON tags_prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_tags_prompts_delete AFTER DELETE ON tags_prompts
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generation_tags_update AFTER UPDATE OF name ON tags
+BEGIN
+    UPDATE stats_totals SET value = value + 1 WHERE name = 'content_generation';
+END;
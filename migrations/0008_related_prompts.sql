@@ -0,0 +1,21 @@
+-- 相关提示词：每个提示词预先计算的最相似的公开提示词（标签与文本相似度加权），
+-- 由 app/services/related_service.py 在提示词或标签变化后增量更新，查看页按主键前缀一次读取
+-- 已有数据库升级后执行 flask --app run rebuild-related-prompts 生成
+CREATE TABLE IF NOT EXISTS related_prompts (
+    prompt_id INTEGER NOT NULL,
+    related_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (prompt_id, related_id)
+) WITHOUT ROWID;
+
+-- 提示词变化时查找把它列为相关的提示词
+CREATE INDEX IF NOT EXISTS idx_related_prompts_related ON related_prompts(related_id);
+
+-- 删除提示词时删除它自己的列表；其他列表中指向它的行由增量更新移除并补足
+CREATE TRIGGER IF NOT EXISTS trg_related_prompts_delete AFTER DELETE ON prompts
+BEGIN
+    DELETE FROM related_prompts WHERE prompt_id = OLD.id;
+END;
+
+-- 全文索引的词表（每个词出现在多少个提示词中），计算相关提示词时挑选区分度高的词作为候选查询
+CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts_vocab USING fts5vocab(prompts_fts, 'row');
@@ -0,0 +1,33 @@
+-- 近似重复检测：MinHash 签名与 LSH 分段键（由 app/services/duplicate_service.py 在提示词写入后维护），
+-- 以及管理员批量任务（flask --app run find-duplicates）得到的重复簇
+-- 已有数据库的签名由批量任务补齐
+CREATE TABLE IF NOT EXISTS prompt_minhash (
+    prompt_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+
+-- 每个提示词的每段签名一个键（段号 << 32 | 该段的哈希），相同的键即为候选
+CREATE TABLE IF NOT EXISTS prompt_lsh (
+    band_key INTEGER NOT NULL,
+    prompt_id INTEGER NOT NULL,
+    PRIMARY KEY (band_key, prompt_id)
+) WITHOUT ROWID;
+
+-- 更新签名时删除提示词原来的键
+CREATE INDEX IF NOT EXISTS idx_prompt_lsh_prompt ON prompt_lsh(prompt_id);
+
+-- 重复簇：cluster_id 为簇中最早的提示词，similarity 为与它的估计相似度
+CREATE TABLE IF NOT EXISTS duplicate_clusters (
+    prompt_id INTEGER PRIMARY KEY,
+    cluster_id INTEGER NOT NULL,
+    similarity REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_duplicate_clusters_cluster ON duplicate_clusters(cluster_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_prompt_minhash_delete AFTER DELETE ON prompts
+BEGIN
+    DELETE FROM prompt_minhash WHERE prompt_id = OLD.id;
+    DELETE FROM prompt_lsh WHERE prompt_id = OLD.id;
+    DELETE FROM duplicate_clusters WHERE prompt_id = OLD.id;
+END;
@@ -0,0 +1,25 @@
+-- 时间衰减的热度分数（对数形式，见 app/utils/trending.py）
+-- 创建和收藏由触发器累加，浏览在浏览计数批量写入时累加；分数只随事件增加，不需要定期重写
+-- trending_add() 是应用注册的自定义函数，写入提示词和收藏的连接都需要先注册（app.database.register_functions）
+ALTER TABLE prompts ADD COLUMN trending_score REAL NOT NULL DEFAULT 0;
+
+-- 已有提示词：创建事件，历史浏览按创建时间计，收藏按最近一次收藏的时间计
+UPDATE prompts SET trending_score = trending_add(
+    trending_add(trending_add(NULL, 'create', 1, created_at), 'view', view_count, created_at),
+    'favorite',
+    (SELECT COUNT(*) FROM favorites f WHERE f.prompt_id = prompts.id),
+    (SELECT MAX(f.created_at) FROM favorites f WHERE f.prompt_id = prompts.id)
+);
+
+-- 首页和热门列表按热度读取前几条（索引范围扫描）
+CREATE INDEX IF NOT EXISTS idx_prompts_public_trending ON prompts(is_public, trending_score);
+
+CREATE TRIGGER IF NOT EXISTS trg_trending_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    UPDATE prompts SET trending_score = trending_add(NULL, 'create', 1, NEW.created_at) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_trending_favorites_insert AFTER INSERT ON favorites
+BEGIN
+    UPDATE prompts SET trending_score = trending_add(trending_score, 'favorite', 1, NULL) WHERE id = NEW.prompt_id;
+END;
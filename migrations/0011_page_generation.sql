@@ -0,0 +1,53 @@
+-- 页面版本号：提示词页面和列表页显示的任何内容变化时加 1，并记录变化时间（Unix 秒），
+-- 用于计算 ETag / Last-Modified（见 app/utils/conditional.py）。
+-- 除内容版本号覆盖的变化外，还包括浏览数写入、收藏、相关提示词更新和作者信息变化
+INSERT OR IGNORE INTO stats_totals (name, value) VALUES
+    ('page_generation', 0),
+    ('page_modified_at', CAST(strftime('%s', 'now') AS INTEGER));
+
+-- 内容版本号或全站浏览数变化（提示词、标签关联、浏览计数批量写入）
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_totals AFTER UPDATE OF value ON stats_totals
+WHEN NEW.name IN ('content_generation', 'views')
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+-- 收藏状态显示在查看页上，收藏也会改变热度排序
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_favorites_insert AFTER INSERT ON favorites
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_favorites_delete AFTER DELETE ON favorites
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+-- 相关提示词在提示词写入提交之后才更新
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_related_insert AFTER INSERT ON related_prompts
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_related_delete AFTER DELETE ON related_prompts
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+-- 作者的用户名和头像显示在卡片和查看页上
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_users_update AFTER UPDATE OF username, avatar_url ON users
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
@@ -0,0 +1,19 @@
+-- 浏览数写入不再改变页面版本号：每次批量写入浏览数都会让全站页面的验证器失效，
+-- 页面上的浏览数可以落后（ETag 是弱验证器，见 app/utils/conditional.py）
+DROP TRIGGER IF EXISTS trg_page_generation_totals;
+
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_totals AFTER UPDATE OF value ON stats_totals
+WHEN NEW.name = 'content_generation'
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
+
+-- 编辑提示词时更新 updated_at（只修改版本号等不影响内容版本号的字段时，查看页也会变化）
+CREATE TRIGGER IF NOT EXISTS trg_page_generation_prompts_updated AFTER UPDATE OF updated_at ON prompts
+BEGIN
+    UPDATE stats_totals SET value = CASE name WHEN 'page_generation' THEN value + 1
+        ELSE CAST(strftime('%s', 'now') AS INTEGER) END
+    WHERE name IN ('page_generation', 'page_modified_at');
+END;
@@ -0,0 +1,47 @@
+-- 全文搜索索引改由应用写入：0006 的触发器调用 search_tokens() 自定义函数，
+-- 没有注册函数的连接（sqlite3 命令行、外部脚本）写入提示词或标签时会报 no such function。
+-- 触发器只把受影响的提示词 ID 记入 search_pending，由应用在写入提交后分词并更新 prompts_fts
+-- （见 app/services/search_service.py 中的 sync_search_index，应用启动时也会处理外部写入留下的记录）
+DROP TRIGGER IF EXISTS trg_fts_prompts_insert;
+DROP TRIGGER IF EXISTS trg_fts_prompts_update;
+DROP TRIGGER IF EXISTS trg_fts_prompts_delete;
+DROP TRIGGER IF EXISTS trg_fts_tags_prompts_insert;
+DROP TRIGGER IF EXISTS trg_fts_tags_prompts_delete;
+DROP TRIGGER IF EXISTS trg_fts_tags_update;
+
+CREATE TABLE IF NOT EXISTS search_pending (
+    prompt_id INTEGER PRIMARY KEY
+);
+
+-- 提示词
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_prompts_update AFTER UPDATE OF title, description, content ON prompts
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_prompts_delete AFTER DELETE ON prompts
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id) VALUES (OLD.id);
+END;
+
+-- 标签关联和标签名
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_tags_prompts_insert AFTER INSERT ON tags_prompts
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id) VALUES (NEW.prompt_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_tags_prompts_delete AFTER DELETE ON tags_prompts
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id) VALUES (OLD.prompt_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_pending_tags_update AFTER UPDATE OF name ON tags
+BEGIN
+    INSERT OR IGNORE INTO search_pending (prompt_id)
+    SELECT prompt_id FROM tags_prompts WHERE tag_id = NEW.id;
+END;
@@ -0,0 +1,29 @@
+-- 热度分数的触发器不再调用 trending_add() 自定义函数：没有注册函数的连接（sqlite3 命令行、外部脚本）
+-- 创建提示词或收藏时会报 no such function
+DROP TRIGGER IF EXISTS trg_trending_prompts_insert;
+DROP TRIGGER IF EXISTS trg_trending_favorites_insert;
+
+-- 创建事件是新提示词的第一个事件，分数 = ln(权重) + (创建时间 - 基准时间) / τ，直接用 SQL 计算
+-- （常量与 app/utils/trending.py 一致：ln 3，基准时间 2024-01-01，τ = 3 天 / ln 2）
+CREATE TRIGGER IF NOT EXISTS trg_trending_prompts_insert AFTER INSERT ON prompts
+BEGIN
+    UPDATE prompts SET trending_score = 1.0986122886681098
+        + (COALESCE(CAST(strftime('%s', NEW.created_at) AS REAL), CAST(strftime('%s', 'now') AS REAL)) - 1704067200)
+        / 373946.55459841934
+    WHERE id = NEW.id;
+END;
+
+-- 收藏需要 log-sum-exp 累加到已有分数上，触发器只记录事件，由应用累加
+-- （见 app/utils/trending.py 中的 apply_trending_events：收藏的写事务提交前、浏览计数批量写入时和应用启动时处理）
+CREATE TABLE IF NOT EXISTS trending_events (
+    id INTEGER PRIMARY KEY,
+    prompt_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_trending_events_favorites_insert AFTER INSERT ON favorites
+BEGIN
+    INSERT INTO trending_events (prompt_id, kind, created_at)
+    VALUES (NEW.prompt_id, 'favorite', COALESCE(NEW.created_at, CURRENT_TIMESTAMP));
+END;
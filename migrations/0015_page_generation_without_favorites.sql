@@ -0,0 +1,5 @@
+-- 收藏不再改变页面版本号：每次收藏都会让全站页面的验证器失效。
+-- 收藏状态只显示在该提示词的查看页上，由查看页的验证器包含当前用户的收藏状态；
+-- 热度排序的列表按时间分段验证（见 app/utils/conditional.py）
+DROP TRIGGER IF EXISTS trg_page_generation_favorites_insert;
+DROP TRIGGER IF EXISTS trg_page_generation_favorites_delete;
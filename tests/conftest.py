@@ -0,0 +1,37 @@
+"""
+测试公共夹具
+
+应用和数据库使用基准测试的工具（benchmarks/common.py）在临时目录中创建
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'benchmarks'))
+
+from common import create_bench_app, create_database  # noqa: E402
+
+
+@pytest.fixture
+def make_app():
+    """创建基于临时数据库的应用：make_app(prompt_count=50, **配置)，测试结束后删除临时目录"""
+    tmp_dirs = []
+    
+    def factory(prompt_count=50, tag_count=20, **config):
+        tmp_dir = create_database(prompt_count=prompt_count, tag_count=tag_count)
+        tmp_dirs.append(tmp_dir)
+        return create_bench_app(tmp_dir, **config)
+    
+    yield factory
+    for tmp_dir in tmp_dirs:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def app(make_app):
+    """包含 50 条提示词的应用"""
+    return make_app()
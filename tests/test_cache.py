@@ -0,0 +1,72 @@
+"""
+进程内 LRU + TTL 缓存：按条目数和总大小淘汰最久未使用的条目，过期条目读取时视为未命中
+"""
+import types
+
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cached_none_is_a_hit():
+    cache = LRUCache()
+    cache.set('a', None)
+    assert cache.get('a', 'default') is None
+    assert cache.get('b', 'default') == 'default'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_entries_expire(clock):
+    cache = LRUCache(ttl=10)
+    cache.set('a', 1)
+    clock[0] += 9
+    assert cache.get('a') == 1
+    clock[0] += 1
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0
+
+
+def test_max_bytes():
+    cache = LRUCache(max_entries=10, ttl=0, max_bytes=10)
+    cache.set('a', '一二')      # 6 字节
+    cache.set('b', 'abcd')
+    assert cache.stats()['bytes'] == 10
+    cache.set('c', 'x')
+    assert cache.get('a') is None and cache.get('b') == 'abcd'
+    assert cache.stats()['bytes'] == 5
+    # 覆盖写入时扣除旧条目的大小；超过上限的单个条目不缓存
+    cache.set('b', 'ab')
+    cache.set('d', 'x' * 11)
+    assert cache.stats()['bytes'] == 3 and cache.get('d') is None
+
+
+def test_custom_sizeof_and_disabled_cache():
+    cache = LRUCache(ttl=0, max_bytes=3, sizeof=len)
+    cache.set('a', [1, 2])
+    cache.set('b', [3, 4])
+    assert cache.get('a') is None and cache.get('b') == [3, 4]
+    
+    disabled = LRUCache(max_entries=0)
+    disabled.set('a', 1)
+    assert disabled.get('a') is None
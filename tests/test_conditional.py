@@ -0,0 +1,119 @@
+"""
+条件请求：ETag 随页面版本号、收藏状态和浏览数排序的时间分段变化，匹配时返回 304
+"""
+import time
+import types
+
+from app.database import get_db, get_write_db
+from app.services.prompt_service import toggle_favorite
+from app.utils import conditional as conditional_module
+
+
+def _public_prompts(app, count=2):
+    with app.app_context():
+        rows = get_db().execute(
+            'SELECT id, user_id FROM prompts WHERE is_public = 1 ORDER BY id LIMIT ?', (count,)
+        ).fetchall()
+    return [(row['id'], row['user_id']) for row in rows]
+
+
+def _backdate_pages(app, seconds=60):
+    """把最后变化时间提前，使 Last-Modified 可以发送（变化所在的秒过去之后才发送）"""
+    with app.app_context():
+        db = get_write_db()
+        db.execute("UPDATE stats_totals SET value = value - ? WHERE name = 'page_modified_at'", (seconds,))
+        db.commit()
+
+
+def _etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag}).status_code
+
+
+def test_matching_etag_returns_304(app):
+    (prompt_id, _), = _public_prompts(app, 1)
+    _backdate_pages(app)
+    with app.test_client() as client:
+        for url in (f'/prompts/{prompt_id}', '/prompts/all', '/search?q=写作'):
+            response = client.get(url)
+            assert response.headers['ETag'].startswith('W/')
+            assert response.headers['Last-Modified']
+            
+            not_modified = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+            assert not_modified.status_code == 304 and not_modified.data == b''
+            assert client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+
+
+def test_content_write_changes_etag(app):
+    (prompt_id, _), (other_id, _) = _public_prompts(app)
+    with app.test_client() as client:
+        etag = _etag(client, f'/prompts/{prompt_id}')
+        with app.app_context():
+            db = get_write_db()
+            db.execute("UPDATE prompts SET title = 'changed' WHERE id = ?", (other_id,))
+            db.commit()
+        assert _revalidate(client, f'/prompts/{prompt_id}', etag) == 200
+
+
+def test_favorite_changes_only_its_page(app):
+    (prompt_id, user_id), (other_id, _) = _public_prompts(app)
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['username'] = 'user'
+        urls = (f'/prompts/{prompt_id}', f'/prompts/{other_id}', '/prompts/all')
+        etags = [_etag(client, url) for url in urls]
+        
+        with app.app_context():
+            assert toggle_favorite(user_id, prompt_id) is True
+        assert [_revalidate(client, url, etag) for url, etag in zip(urls, etags)] == [200, 304, 304]
+        
+        # 取消收藏后回到原来的页面
+        with app.app_context():
+            assert toggle_favorite(user_id, prompt_id) is False
+        assert _revalidate(client, urls[0], etags[0]) == 304
+    
+    # 未登录的查看页不显示收藏状态
+    with app.test_client() as client:
+        etag = _etag(client, urls[0])
+        with app.app_context():
+            toggle_favorite(user_id, prompt_id)
+        assert _revalidate(client, urls[0], etag) == 304
+
+
+def test_view_orderings_expire_by_interval(make_app, monkeypatch):
+    app = make_app(VIEW_COUNT_FLUSH_INTERVAL=10)
+    _backdate_pages(app)
+    start = (int(time.time()) // 10 + 1) * 10
+    now = [start + 5.0]
+    monkeypatch.setattr(conditional_module, 'time', types.SimpleNamespace(time=lambda: now[0]))
+    with app.test_client() as client:
+        etags = {sort: _etag(client, f'/prompts/all?sort={sort}') for sort in ('latest', 'popular', 'trending')}
+        
+        now[0] += 4   # 同一段内
+        assert all(_revalidate(client, f'/prompts/all?sort={sort}', etag) == 304 for sort, etag in etags.items())
+        
+        now[0] += 2   # 进入下一段
+        assert _revalidate(client, '/prompts/all?sort=latest', etags['latest']) == 304
+        assert _revalidate(client, '/prompts/all?sort=popular', etags['popular']) == 200
+        assert _revalidate(client, '/prompts/all?sort=trending', etags['trending']) == 200
+        
+        # Last-Modified 不早于段的开始
+        response = client.get('/prompts/all?sort=popular')
+        assert response.last_modified.timestamp() == start + 10
+
+
+def test_flashes_skip_conditional_handling(app):
+    (prompt_id, _), = _public_prompts(app, 1)
+    with app.test_client() as client:
+        etag = _etag(client, f'/prompts/{prompt_id}')
+        with client.session_transaction() as session:
+            session['_flashes'] = [('success', '已保存')]
+        response = client.get(f'/prompts/{prompt_id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
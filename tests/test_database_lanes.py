@@ -0,0 +1,60 @@
+"""
+读写通道：读连接只读，每个进程只有一个写连接，请求结束时归还
+"""
+import sqlite3
+
+import pytest
+
+from app.database import get_db, get_write_db, get_pool, get_write_pool
+
+
+def test_read_lane_is_read_only(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM prompts').fetchone()[0] == 50
+        with pytest.raises(sqlite3.OperationalError):
+            db.execute("UPDATE prompts SET title = 'x' WHERE id = 1")
+
+
+def test_write_lane_commits_are_visible_to_readers(app):
+    with app.app_context():
+        write_db = get_write_db()
+        write_db.execute("UPDATE prompts SET title = '已修改' WHERE id = 1")
+        write_db.commit()
+    with app.app_context():
+        assert get_db().execute('SELECT title FROM prompts WHERE id = 1').fetchone()[0] == '已修改'
+
+
+def test_connections_are_shared_within_a_context_and_returned(app):
+    with app.app_context():
+        assert get_db() is get_db()
+        assert get_write_db() is get_write_db()
+        assert get_db().raw is not get_write_db().raw
+        assert get_pool().stats()['in_use'] == 1
+        assert get_write_pool().stats()['in_use'] == 1
+    assert get_pool(app).stats()['in_use'] == 0
+    assert get_write_pool(app).stats()['in_use'] == 0
+
+
+def test_single_writer_per_process(app):
+    assert get_write_pool(app).max_size == 1
+
+
+def test_uncommitted_write_is_rolled_back_at_teardown(app):
+    with app.app_context():
+        get_write_db().execute("UPDATE prompts SET title = '未提交' WHERE id = 2")
+    with app.app_context():
+        assert get_db().execute('SELECT title FROM prompts WHERE id = 2').fetchone()[0] != '未提交'
+
+
+def test_error_discards_connections(app):
+    with app.app_context():
+        get_write_db()
+    created = get_write_pool(app).stats()['created']
+    context = app.app_context()
+    context.push()
+    get_write_db()
+    context.pop(RuntimeError('boom'))
+    with app.app_context():
+        get_write_db()
+    assert get_write_pool(app).stats()['created'] == created + 1
@@ -0,0 +1,75 @@
+"""
+近似重复检测：MinHash 签名估计 Jaccard 系数，LSH 键只用于挑选候选
+"""
+import pytest
+
+from app.database import get_db, get_write_db
+from app.services.prompt_service import create_prompt
+from app.services.duplicate_service import (
+    LSH_BANDS, NUM_PERMUTATIONS, SHINGLE_SIZE, _DisjointSet, band_keys, cluster_duplicates,
+    compute_signature, estimate_similarity, find_duplicates, get_duplicate_clusters
+)
+
+WORDS = [f'word{i}' for i in range(300)]
+
+
+def _shingles(words):
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_signature():
+    signature = compute_signature('标题', ' '.join(WORDS[:50]))
+    assert len(signature) == NUM_PERMUTATIONS
+    assert compute_signature('标题', ' '.join(WORDS[:50])) == signature
+    assert compute_signature('', '!!!') is None
+    # 不足 SHINGLE_SIZE 个词时整体作为一个片段
+    assert compute_signature('', 'a b') is not None
+
+
+@pytest.mark.parametrize('shared', [50, 150, 190])
+def test_similarity_estimates_jaccard(shared):
+    a = WORDS[:200]
+    b = WORDS[:shared] + WORDS[200:200 + 200 - shared]
+    estimate = estimate_similarity(compute_signature('', ' '.join(a)), compute_signature('', ' '.join(b)))
+    assert abs(estimate - _jaccard(_shingles(a), _shingles(b))) < 0.2
+
+
+def test_band_keys():
+    signature = compute_signature('', ' '.join(WORDS[:50]))
+    keys = band_keys(signature)
+    assert len(keys) == LSH_BANDS and [key >> 32 for key in keys] == list(range(LSH_BANDS))
+    # 只有第一段不同时其余键相同
+    changed = (signature[0] + 1,) + signature[1:]
+    assert [a == b for a, b in zip(keys, band_keys(changed))] == [False] + [True] * (LSH_BANDS - 1)
+
+
+def test_disjoint_set():
+    groups = _DisjointSet()
+    groups.union(5, 3)
+    groups.union(9, 7)
+    groups.union(7, 5)
+    groups.union(20, 21)
+    assert {root: sorted(members) for root, members in groups.groups().items()} == {3: [3, 5, 7, 9], 20: [20, 21]}
+
+
+def test_find_and_cluster_duplicates(app):
+    text = ' '.join(WORDS[:120])
+    with app.app_context():
+        original = create_prompt(1, '重复检测', text, '', '1.0', 1, [])
+        copy = create_prompt(1, '重复检测', text + ' word299', '', '1.0', 1, [])
+        private = create_prompt(1, '重复检测', text, '', '1.0', 0, [])
+        create_prompt(1, '无关', ' '.join(WORDS[150:270]), '', '1.0', 1, [])
+        
+        db = get_db()
+        assert [duplicate['id'] for duplicate in find_duplicates(db, original)] == [copy]
+        # 私有提示词只对作者可见
+        assert sorted(duplicate['id'] for duplicate in find_duplicates(db, original, user_id=1)) == [copy, private]
+        
+        assert cluster_duplicates(get_write_db()) == (1, 3)
+        clusters = get_duplicate_clusters(db)
+        assert clusters[0]['cluster_id'] == original
+        assert sorted(prompt['id'] for prompt in clusters[0]['prompts']) == [original, copy, private]
@@ -0,0 +1,51 @@
+"""
+提示词卡片片段缓存：显示内容决定缓存键，浏览数在组装时填入缓存片段的切口
+"""
+import pytest
+
+from app.services.fragment_cache import VIEWS_SLOT, get_fragment_cache, prompt_card
+
+
+def _prompt(**fields):
+    prompt = {
+        'id': 1, 'title': '写作助手', 'description': '描述', 'is_public': 1, 'username': 'admin',
+        'created_at': '2024-05-01', 'updated_at': '2024-05-01 12:00:00', 'tags': [{'name': '写作'}], 'view_count': 7,
+    }
+    prompt.update(fields)
+    return prompt
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        get_fragment_cache().clear()
+        yield get_fragment_cache()
+
+
+def test_view_count_is_filled_into_cached_card(ctx):
+    first = prompt_card('public', _prompt())
+    assert '7 次浏览' in first and str(VIEWS_SLOT) not in first
+    
+    second = prompt_card('public', _prompt(view_count=12))
+    assert '12 次浏览' in second
+    assert second.replace('12 次浏览', '7 次浏览') == first
+    stats = ctx.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_displayed_fields_change_the_key(ctx):
+    prompt_card('public', _prompt())
+    assert '新标题' in prompt_card('public', _prompt(title='新标题'))
+    assert '新标签' in prompt_card('public', _prompt(tags=[{'name': '新标签'}]))
+    assert prompt_card('owner', _prompt())
+    assert ctx.stats()['entries'] == 4
+
+
+def test_user_content_cannot_create_a_slot(ctx):
+    html = prompt_card('public', _prompt(title='<!--views-->', description=str(VIEWS_SLOT)))
+    assert html.count('7') == 1 and '&lt;!--views--&gt;' in html
+
+
+def test_cards_without_views(ctx):
+    html = prompt_card('favorite', _prompt())
+    assert '写作助手' in html and '次浏览' not in html
@@ -0,0 +1,112 @@
+"""
+版本迁移：按编号执行一次，记录校验和，已执行的脚本不允许修改
+"""
+import sqlite3
+
+import pytest
+
+from app.database.migrations import (
+    MigrationError, SUPERSEDED_CHECKSUMS, load_migrations, run_migrations, split_statements,
+    get_applied_migrations
+)
+
+
+def _write(directory, filename, sql):
+    (directory / filename).write_text(sql, encoding='utf-8')
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+def test_split_statements_keeps_trigger_bodies_together():
+    sql = '''
+-- 注释
+CREATE TABLE t (x);
+
+CREATE TRIGGER trg AFTER INSERT ON t
+BEGIN
+    UPDATE t SET x = x + 1;
+    UPDATE t SET x = x - 1;
+END;
+'''
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[1].startswith('CREATE TRIGGER') and statements[1].endswith('END;')
+
+
+def test_split_statements_rejects_incomplete_statement():
+    with pytest.raises(MigrationError):
+        split_statements('CREATE TABLE t (x);\nSELECT 1')
+
+
+def test_migrations_run_in_order_and_only_once(tmp_path, db):
+    _write(tmp_path, '0002_add_row.sql', "INSERT INTO t VALUES ('second');")
+    _write(tmp_path, '0001_create.sql', 'CREATE TABLE t (x TEXT);')
+    _write(tmp_path, 'notes.txt', 'ignored')
+    
+    applied = run_migrations(db, str(tmp_path))
+    assert [m.version for m in applied] == [1, 2]
+    assert run_migrations(db, str(tmp_path)) == []
+    assert db.execute('SELECT x FROM t').fetchall() == [('second',)]
+    assert sorted(get_applied_migrations(db)) == [1, 2]
+
+
+def test_modified_migration_is_rejected(tmp_path, db):
+    _write(tmp_path, '0001_create.sql', 'CREATE TABLE t (x TEXT);')
+    run_migrations(db, str(tmp_path))
+    _write(tmp_path, '0001_create.sql', 'CREATE TABLE t (x TEXT, y TEXT);')
+    with pytest.raises(MigrationError, match='校验和'):
+        run_migrations(db, str(tmp_path))
+
+
+def test_failed_migration_is_rolled_back(tmp_path, db):
+    _write(tmp_path, '0001_create.sql', 'CREATE TABLE t (x TEXT);')
+    _write(tmp_path, '0002_broken.sql', "INSERT INTO t VALUES ('a');\nINSERT INTO missing VALUES (1);")
+    with pytest.raises(MigrationError):
+        run_migrations(db, str(tmp_path))
+    assert db.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    assert sorted(get_applied_migrations(db)) == [1]
+
+
+def test_duplicate_versions_are_rejected(tmp_path):
+    _write(tmp_path, '0001_a.sql', 'SELECT 1;')
+    _write(tmp_path, '0001_b.sql', 'SELECT 2;')
+    with pytest.raises(MigrationError, match='重复'):
+        load_migrations(str(tmp_path))
+
+
+def test_checksum_ignores_line_endings(tmp_path):
+    _write(tmp_path, '0001_a.sql', 'SELECT 1;\n')
+    unix = load_migrations(str(tmp_path))[0].checksum
+    (tmp_path / '0001_a.sql').write_bytes(b'SELECT 1;\r\n')
+    assert load_migrations(str(tmp_path))[0].checksum == unix
+
+
+def test_project_migrations_are_all_applied(app):
+    db = sqlite3.connect(app.config['DATABASE'])
+    try:
+        versions = [m.version for m in load_migrations(app.config['MIGRATIONS_DIR'])]
+        assert sorted(get_applied_migrations(db)) == versions
+        assert run_migrations(db, app.config['MIGRATIONS_DIR']) == []
+    finally:
+        db.close()
+
+
+def test_superseded_checksum_is_accepted(app):
+    db = sqlite3.connect(app.config['DATABASE'])
+    try:
+        old = SUPERSEDED_CHECKSUMS[5][0]
+        db.execute('UPDATE schema_version SET checksum = ? WHERE version = 5', (old,))
+        db.commit()
+        assert run_migrations(db, app.config['MIGRATIONS_DIR']) == []
+        
+        db.execute("UPDATE schema_version SET checksum = 'x' WHERE version = 5")
+        db.commit()
+        with pytest.raises(MigrationError, match='校验和'):
+            run_migrations(db, app.config['MIGRATIONS_DIR'])
+    finally:
+        db.close()
@@ -0,0 +1,48 @@
+"""
+游标编码与解析
+"""
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.pagination import encode_cursor, decode_cursor  # noqa: E402
+
+
+def _raw_cursor(payload):
+    """按 encode_cursor 的格式编码任意 JSON（模拟客户端伪造的游标）"""
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_round_trip():
+    cursor = encode_cursor('next', ['2024-01-02 12:00:00', 42])
+    assert decode_cursor(cursor, 2) == ('next', ['2024-01-02 12:00:00', 42])
+
+
+def test_round_trip_float_and_null():
+    cursor = encode_cursor('prev', [1.5, None, 7])
+    assert decode_cursor(cursor, 3) == ('prev', [1.5, None, 7])
+
+
+@pytest.mark.parametrize('cursor', [None, '', '!!!', _raw_cursor(['next']), _raw_cursor(['sideways', [1, 2]])])
+def test_invalid_cursor(cursor):
+    assert decode_cursor(cursor, 2) is None
+
+
+def test_wrong_key_length():
+    assert decode_cursor(encode_cursor('next', [1, 2, 3]), 2) is None
+
+
+@pytest.mark.parametrize('values', [
+    [{'a': 1}, 1],
+    [[1, 2], 1],
+    [True, 1],
+    ['2024-01-01', False],
+])
+def test_non_scalar_values_rejected(values):
+    assert decode_cursor(_raw_cursor(['next', values]), 2) is None
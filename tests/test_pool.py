@@ -0,0 +1,92 @@
+"""
+SQLite 连接池
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.database.pool import ConnectionPool, PoolTimeoutError
+
+
+def _pool(**kwargs):
+    return ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False), **kwargs)
+
+
+def test_released_connection_is_reused():
+    pool = _pool(max_size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    stats = pool.stats()
+    assert stats['created'] == 1 and stats['reused'] == 1 and stats['in_use'] == 1
+
+
+def test_release_rolls_back_open_transaction():
+    pool = _pool(max_size=1)
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (x)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    assert conn.in_transaction
+    pool.release(conn)
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = _pool(max_size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiting_thread_gets_released_connection():
+    pool = _pool(max_size=1, timeout=5)
+    conn = pool.acquire()
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    thread.start()
+    pool.release(conn)
+    thread.join(5)
+    assert acquired == [conn]
+
+
+def test_discarded_connection_frees_a_slot():
+    pool = _pool(max_size=1, timeout=0.05)
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    assert pool.acquire() is not conn
+    assert pool.stats()['size'] == 1
+
+
+def test_idle_connections_are_evicted():
+    pool = _pool(max_size=2, max_idle=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is not conn
+    assert pool.stats()['evicted_idle'] == 1
+
+
+def test_unhealthy_connection_is_replaced():
+    pool = _pool(max_size=2, health_check_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    assert pool.acquire() is not conn
+    assert pool.stats()['evicted_unhealthy'] == 1
+
+
+def test_failed_connect_does_not_leak_a_slot():
+    def connect():
+        raise sqlite3.OperationalError('unable to open database file')
+    
+    pool = ConnectionPool(connect, max_size=1, timeout=0.05)
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            pool.acquire()
+    assert pool.stats()['size'] == 0
@@ -0,0 +1,34 @@
+"""
+查询计划回归：常见页面和写操作执行的语句不能出现未登记的全表扫描，计划与快照一致
+
+快照为 benchmarks/query_plans.json，计划变化确认无误后执行 python benchmarks/check_query_plans.py --update
+"""
+import pytest
+
+import check_query_plans
+
+
+@pytest.fixture(scope='module')
+def plans():
+    return check_query_plans.collect_plans()
+
+
+def test_snapshot_has_no_unexpected_scans():
+    snapshot = check_query_plans.load_snapshot()
+    assert snapshot, '快照文件不存在'
+    assert check_query_plans.scan_failures(snapshot) == []
+
+
+def test_no_unexpected_scans(plans):
+    assert check_query_plans.scan_failures(plans) == []
+
+
+def test_plans_match_snapshot(plans):
+    assert check_query_plans.snapshot_failures(plans, check_query_plans.load_snapshot()) == []
+
+
+def test_full_scans_detection():
+    assert check_query_plans.full_scans(['SCAN prompts', 'SEARCH tags USING INDEX x (name=?)']) == ['SCAN prompts']
+    assert check_query_plans.full_scans(['SCAN json_each VIRTUAL TABLE INDEX 1:', 'SCAN CONSTANT ROW']) == []
+    assert check_query_plans.allowed_reason('SELECT name, value FROM stats_totals')
+    assert check_query_plans.allowed_reason('SELECT * FROM prompts') is None
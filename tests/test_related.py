@@ -0,0 +1,69 @@
+"""
+相关提示词：相似度对称，列表只包含公开提示词，写入后由后台线程更新
+"""
+import time
+
+from app.database import get_db
+from app.services.prompt_service import create_prompt, update_prompt
+from app.services.related_service import (
+    Features, RelatedPromptsQueue, similarity, compute_related, get_related_prompts, get_related_queue
+)
+
+
+def _features(tag_ids, tokens, is_public=True):
+    return Features(is_public, '', frozenset(tag_ids), frozenset(), frozenset(tokens))
+
+
+def _wait_idle(queue, synced, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = queue.stats()
+        if stats['pending'] == 0 and stats['synced'] >= synced:
+            return stats
+        time.sleep(0.02)
+    raise AssertionError(f'队列没有处理完: {queue.stats()}')
+
+
+def test_similarity():
+    a = _features({1, 2}, {'写作', '助手'})
+    b = _features({2, 3}, {'写作'})
+    assert similarity(a, b, (0.6, 0.4)) == similarity(b, a, (0.6, 0.4)) == 0.6 / 3 + 0.4 / 2
+    assert similarity(a, a, (0.6, 0.4)) == 1.0
+    assert similarity(a, _features(set(), set()), (0.6, 0.4)) == 0.0
+
+
+def _create(app, *args):
+    # 每次写入使用单独的应用上下文，结束时归还写连接（后台线程也需要它）
+    with app.app_context():
+        return create_prompt(1, *args)
+
+
+def test_lists_are_updated_in_background(app):
+    queue = get_related_queue(app)
+    synced = queue.stats()['synced']
+    first = _create(app, '独角兽绘本 睡前故事', '给孩子讲独角兽的故事', '', '1.0', 1, ['独角兽', '童话'])
+    second = _create(app, '独角兽绘本 续集', '独角兽的故事继续', '', '1.0', 1, ['独角兽', '童话'])
+    private = _create(app, '独角兽绘本 草稿', '独角兽的故事草稿', '', '1.0', 0, ['独角兽', '童话'])
+    _wait_idle(queue, synced + 3)
+    
+    with app.app_context():
+        db = get_db()
+        assert [prompt['id'] for prompt in get_related_prompts(db, first)][:1] == [second]
+        assert [prompt['id'] for prompt in get_related_prompts(db, second)][:1] == [first]
+        assert private not in [related_id for related_id, _ in compute_related(db, first)]
+    
+    # 修改后不再相关的提示词从对方的列表中移除
+    with app.app_context():
+        update_prompt(second, 1, '季度财务报表', '营收 成本 利润', '', '1.0', 1, ['财务'])
+    _wait_idle(queue, synced + 4)
+    with app.app_context():
+        assert second not in [prompt['id'] for prompt in get_related_prompts(get_db(), first)]
+
+
+def test_queue_deduplicates(app):
+    queue = RelatedPromptsQueue(app)
+    for _ in range(3):
+        queue.add(1)
+    with app.app_context():
+        queue.drain()
+    assert _wait_idle(queue, 1)['synced'] == 1
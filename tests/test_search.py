@@ -0,0 +1,94 @@
+"""
+全文搜索：FTS5 索引与提示词、标签同步，关键词转为短语查询
+"""
+import sqlite3
+
+import pytest
+
+from app.database import get_db, get_write_db
+from app.services.prompt_service import create_prompt, update_prompt, delete_prompt
+from app.services.search_service import build_match_query, search_prompts, sync_search_index
+
+
+def _ids(query, **kwargs):
+    return [prompt['id'] for prompt in search_prompts(query, **kwargs)['prompts']]
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+
+
+def test_build_match_query():
+    assert build_match_query('Python 写作') == '"python" * "写作"'
+    assert build_match_query('帮我写作文') == '"帮我 我写 写作 作文"'
+    assert build_match_query('  ') is None
+    # 引号和 FTS5 运算符不会进入 MATCH 表达式
+    assert build_match_query('"a" OR b*') == '"a" * "or" * "b" *'
+    assert build_match_query('!!! ...') is None
+
+
+def test_index_uses_unicode61(app):
+    db = sqlite3.connect(app.config['DATABASE'])
+    try:
+        sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'prompts_fts'").fetchone()[0]
+    finally:
+        db.close()
+    assert 'unicode61' in sql and 'trigram' not in sql
+
+
+def test_search_follows_writes(ctx):
+    prompt_id = create_prompt(1, '独角兽绘本', '给孩子讲一个关于勇气的故事', '睡前故事', '1.0', 1, ['童话'])
+    assert _ids('独角兽') == [prompt_id]
+    assert _ids('勇气') == [prompt_id]
+    assert _ids('童话') == [prompt_id]
+    
+    update_prompt(prompt_id, 1, '小恐龙绘本', '给孩子讲一个关于友谊的故事', '', '1.0', 1, ['寓言'])
+    assert _ids('独角兽') == [] and _ids('童话') == []
+    assert _ids('小恐龙 友谊') == [prompt_id]
+    assert _ids('寓言') == [prompt_id]
+    
+    delete_prompt(prompt_id, 1)
+    assert _ids('小恐龙') == []
+
+
+def test_private_prompts_are_only_visible_to_their_owner(ctx):
+    prompt_id = create_prompt(1, '私密清单', '只给自己看的备忘', '', '1.0', 0, [])
+    assert _ids('私密清单') == []
+    assert _ids('私密清单', user_id=1) == [prompt_id]
+
+
+def test_single_character_and_english_prefix_match(ctx):
+    prompt_id = create_prompt(1, 'Kubernetes 部署', '滚动更新', '', '1.0', 1, [])
+    assert prompt_id in _ids('kuber')
+    assert prompt_id in _ids('署')
+    with_snippet = search_prompts('滚动')['prompts']
+    assert with_snippet[0]['id'] == prompt_id and '<mark>滚动</mark>' in with_snippet[0]['snippet']
+
+
+def test_rebuild_matches_incremental_index(ctx):
+    from app.services.search_service import rebuild_search_index
+    
+    db = get_db()
+    before = db.execute('SELECT rowid, title, tags FROM prompts_fts ORDER BY rowid').fetchall()
+    rebuild_search_index(get_write_db())
+    after = db.execute('SELECT rowid, title, tags FROM prompts_fts ORDER BY rowid').fetchall()
+    assert [tuple(row) for row in after] == [tuple(row) for row in before]
+
+
+def test_external_writes_are_indexed_by_the_application(ctx, app):
+    # 没有注册自定义函数的连接也能写入，触发器只记录待更新的提示词
+    db = sqlite3.connect(app.config['DATABASE'])
+    try:
+        db.execute("UPDATE prompts SET title = '外部脚本写入' WHERE id = 1")
+        db.execute("UPDATE tags SET name = '外部标签' WHERE id = (SELECT tag_id FROM tags_prompts WHERE prompt_id = 2 LIMIT 1)")
+        db.commit()
+    finally:
+        db.close()
+    
+    assert _ids('外部脚本') == []
+    assert sync_search_index(get_write_db()) > 1
+    assert _ids('外部脚本') == [1]
+    assert 2 in _ids('外部标签')
+    assert sync_search_index(get_write_db()) == 0
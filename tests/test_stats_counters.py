@@ -0,0 +1,97 @@
+"""
+触发器维护的计数：任意写入顺序之后，计数表与从原始表统计的结果一致
+"""
+import sqlite3
+
+import pytest
+
+from app.database import register_functions
+
+TOTALS = ('users', 'prompts', 'public_prompts', 'views')
+
+
+def _expected(db):
+    totals = {
+        'users': db.execute('SELECT COUNT(*) FROM users').fetchone()[0],
+        'prompts': db.execute('SELECT COUNT(*) FROM prompts').fetchone()[0],
+        'public_prompts': db.execute('SELECT COUNT(*) FROM prompts WHERE is_public = 1').fetchone()[0],
+        'views': db.execute('SELECT COALESCE(SUM(view_count), 0) FROM prompts').fetchone()[0],
+    }
+    users = db.execute(
+        'SELECT u.id, (SELECT COUNT(*) FROM prompts p WHERE p.user_id = u.id), '
+        '(SELECT COUNT(*) FROM prompts p WHERE p.user_id = u.id AND p.is_public = 1), '
+        '(SELECT COALESCE(SUM(view_count), 0) FROM prompts p WHERE p.user_id = u.id), '
+        '(SELECT COUNT(*) FROM favorites f WHERE f.user_id = u.id) FROM users u ORDER BY u.id'
+    ).fetchall()
+    tags = db.execute(
+        'SELECT t.id, (SELECT COUNT(*) FROM tags_prompts tp WHERE tp.tag_id = t.id), '
+        '(SELECT COUNT(*) FROM tags_prompts tp JOIN prompts p ON p.id = tp.prompt_id '
+        'WHERE tp.tag_id = t.id AND p.is_public = 1) FROM tags t ORDER BY t.id'
+    ).fetchall()
+    return totals, users, tags
+
+
+def _counters(db):
+    totals = {
+        name: value for name, value in db.execute('SELECT name, value FROM stats_totals') if name in TOTALS
+    }
+    users = db.execute(
+        'SELECT user_id, prompt_count, public_prompt_count, view_count, favorite_count FROM user_stats '
+        'WHERE user_id IN (SELECT id FROM users) ORDER BY user_id'
+    ).fetchall()
+    tags = db.execute(
+        'SELECT tag_id, prompt_count, public_prompt_count FROM tag_stats '
+        'WHERE tag_id IN (SELECT id FROM tags) ORDER BY tag_id'
+    ).fetchall()
+    return totals, users, tags
+
+
+@pytest.fixture
+def db(app):
+    conn = sqlite3.connect(app.config['DATABASE'])
+    register_functions(conn)
+    yield conn
+    conn.close()
+
+
+def test_counters_match_after_initial_load(db):
+    assert _counters(db) == _expected(db)
+
+
+def test_counters_follow_writes(db):
+    db.execute("INSERT INTO users (username, email, password_hash) VALUES ('u2', 'u2@example.com', 'x')")
+    user_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+    db.execute(
+        "INSERT INTO prompts (title, content, user_id, is_public, view_count) VALUES ('a', 'a', ?, 0, 7)", (user_id,)
+    )
+    prompt_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+    db.execute('INSERT INTO tags_prompts (tag_id, prompt_id) VALUES (1, ?), (2, ?)', (prompt_id, prompt_id))
+    db.commit()
+    assert _counters(db) == _expected(db)
+    
+    db.execute('UPDATE prompts SET is_public = 1, view_count = view_count + 5 WHERE id = ?', (prompt_id,))
+    db.execute('INSERT INTO favorites (user_id, prompt_id) VALUES (?, 1), (?, ?)', (user_id, user_id, prompt_id))
+    db.execute('DELETE FROM tags_prompts WHERE prompt_id = ? AND tag_id = 1', (prompt_id,))
+    db.commit()
+    assert _counters(db) == _expected(db)
+    
+    db.execute('UPDATE prompts SET user_id = 1 WHERE id = ?', (prompt_id,))
+    db.execute('UPDATE prompts SET is_public = 0 WHERE id = 3')
+    db.commit()
+    assert _counters(db) == _expected(db)
+    
+    db.execute('DELETE FROM tags_prompts WHERE prompt_id = ?', (prompt_id,))
+    db.execute('DELETE FROM favorites WHERE prompt_id = ?', (prompt_id,))
+    db.execute('DELETE FROM prompts WHERE id = ?', (prompt_id,))
+    db.execute('DELETE FROM favorites WHERE user_id = ?', (user_id,))
+    db.execute('DELETE FROM users WHERE id = ?', (user_id,))
+    db.commit()
+    assert _counters(db) == _expected(db)
+
+
+def test_rolled_back_writes_leave_counters_unchanged(db):
+    before = _counters(db)
+    db.execute("INSERT INTO prompts (title, content, user_id, is_public) VALUES ('b', 'b', 1, 1)")
+    db.execute('UPDATE prompts SET view_count = view_count + 100 WHERE id = 1')
+    db.rollback()
+    assert _counters(db) == before
@@ -0,0 +1,104 @@
+"""
+标签模糊匹配：模糊键相同时改写为已有标签，个别字符不同时只给出建议，排除条件从不改写
+"""
+import sqlite3
+
+import pytest
+
+from app.database import get_db
+from app.services.tag_index import TagPrefixIndex, edit_distance, resolve_tag_filter
+from app.services.tag_postings import make_tag_filter
+
+TAGS = [('Python3', 30), ('python2', 5), ('GPT-4', 20), ('gpt3', 10), ('写作助手', 8), ('data_analysis', 3)]
+
+
+@pytest.fixture
+def index():
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.executescript('''
+        CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+        CREATE TABLE tag_stats (tag_id INTEGER PRIMARY KEY, prompt_count INTEGER);
+        CREATE TABLE stats_totals (name TEXT PRIMARY KEY, value INTEGER);
+    ''')
+    for tag_id, (name, count) in enumerate(TAGS, 1):
+        db.execute('INSERT INTO tags (id, name) VALUES (?, ?)', (tag_id, name))
+        db.execute('INSERT INTO tag_stats VALUES (?, ?)', (tag_id, count))
+    index = TagPrefixIndex()
+    index.load(db)
+    db.close()
+    return index
+
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('python', 'python', 0), ('python', 'pyhton', 1), ('python', 'pythn', 1),
+    ('python', 'jython', 1), ('gpt4', 'gpt3', 1), ('ab', 'ba', 1), ('abc', 'xyc', 2),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 2) == distance
+    assert edit_distance(b, a, 2) == distance
+
+
+def test_edit_distance_limit():
+    assert edit_distance('abcdef', 'uvwxyz', 2) == 3
+    assert edit_distance('a', 'abcdef', 2) == 3
+
+
+def test_complete(index):
+    assert index.complete('py') == [('Python3', 30), ('python2', 5)]
+    assert index.complete('写') == [('写作助手', 8)]
+    assert index.complete('') == []
+
+
+def test_resolve_only_folds_case_width_and_separators(index):
+    assert index.resolve('python3') == 'Python3'
+    assert index.resolve('ＧＰＴ４') == 'GPT-4'
+    assert index.resolve('data analysis') == 'data_analysis'
+    # 只差一个字符的是不同的标签
+    assert index.resolve('gpt5') is None
+    assert index.resolve('python4') is None
+    assert index.resolve('!!!') is None
+
+
+def test_suggest(index):
+    assert index.suggest('python4') == ['Python3', 'python2']
+    assert index.suggest('pyhton3') == ['Python3']
+    assert index.suggest('gpt5') == ['GPT-4', 'gpt3']
+    # 模糊键相同的标签由 resolve 处理，不作为建议
+    assert index.suggest('gpt4') == ['gpt3']
+    assert index.suggest('完全无关') == []
+
+
+def _tag_names(db, limit=2):
+    return [row[0] for row in db.execute('SELECT name FROM tags ORDER BY id LIMIT ?', (limit,))]
+
+
+def test_resolve_tag_filter(app):
+    with app.app_context():
+        db = get_db()
+        first, second = _tag_names(db)
+        tag_filter = make_tag_filter([first.upper() + ' '], [f'x{second}'], [second.upper()])
+        resolved, corrections, suggestions = resolve_tag_filter(db, tag_filter)
+        
+        assert corrections == [(first.upper(), first)]
+        assert resolved.all_of == (first,)
+        # 排除条件和只有建议的标签保持原样
+        assert resolved.none_of == (second.upper(),) and resolved.any_of == (f'x{second}',)
+        assert (f'x{second}', [second]) in suggestions
+        
+        unchanged = make_tag_filter([first], [second])
+        assert resolve_tag_filter(db, unchanged) == (unchanged, [], [])
+
+
+def test_suggestions_are_links(app):
+    with app.test_client() as client:
+        with app.app_context():
+            first, second = _tag_names(get_db())
+        response = client.get('/prompts/all', query_string={'tag': [first, f'x{second}']})
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert f'没有找到标签“x{second}”' in html
+        
+        response = client.get('/prompts/all', query_string={'tag': first.upper(), 'page': 2})
+        assert response.status_code == 302
+        assert response.headers['Location'] == f'/prompts/all?tag={first}'
@@ -0,0 +1,83 @@
+"""
+多标签筛选的倒排索引：组合条件的结果与逐个提示词判断一致，本进程写入后增量更新
+"""
+import random
+
+import pytest
+
+from app.database import get_db
+from app.services.prompt_service import create_prompt, update_prompt, delete_prompt
+from app.services.tag_postings import make_tag_filter, get_tag_postings, PROBE_RATIO
+
+
+def _expected(db, tag_filter):
+    names = {}
+    for prompt_id, name in db.execute(
+        'SELECT p.id, t.name FROM prompts p LEFT JOIN tags_prompts tp ON tp.prompt_id = p.id '
+        'LEFT JOIN tags t ON t.id = tp.tag_id WHERE p.is_public = 1'
+    ):
+        names.setdefault(prompt_id, set())
+        if name is not None:
+            names[prompt_id].add(name)
+    return sorted(prompt_id for prompt_id, tags in names.items() if tag_filter.matches(tags))
+
+
+@pytest.fixture
+def ctx(make_app):
+    app = make_app(prompt_count=300, tag_count=10)
+    with app.app_context():
+        yield get_db()
+
+
+def test_make_tag_filter():
+    tag_filter = make_tag_filter(['ａ', 'b', 'a', ''], ['b', 'c', 'd'], ['d'])
+    assert tag_filter == (('a', 'b'), ('c',), ('d',))
+    assert not make_tag_filter()
+    assert make_tag_filter(['a']).single_tag == 'a'
+    assert make_tag_filter(['a'], none_of=['b']).single_tag is None
+
+
+def test_match_agrees_with_brute_force(ctx):
+    tags = [row[0] for row in ctx.execute('SELECT name FROM tags')]
+    index = get_tag_postings(ctx)
+    rng = random.Random(7)
+    for _ in range(200):
+        tag_filter = make_tag_filter(
+            rng.sample(tags, rng.randint(0, 2)), rng.sample(tags, rng.randint(0, 3)), rng.sample(tags, rng.randint(0, 2))
+        )
+        assert index.match(tag_filter) == _expected(ctx, tag_filter), tag_filter
+    assert index.match(make_tag_filter(['不存在的标签'])) == []
+
+
+def test_probe_intersection(ctx, monkeypatch):
+    # 候选集合远小于倒排列表时逐个二分查找，结果与集合交集相同
+    tags = [row[0] for row in ctx.execute('SELECT name FROM tags')]
+    index = get_tag_postings(ctx)
+    for ratio in (PROBE_RATIO, 0):
+        monkeypatch.setattr('app.services.tag_postings.PROBE_RATIO', ratio)
+        tag_filter = make_tag_filter(tags[:3])
+        assert index.match(tag_filter) == _expected(ctx, tag_filter)
+
+
+def test_incremental_sync(ctx):
+    index = get_tag_postings(ctx)
+    public_id = create_prompt(1, '公开', '内容', '', '1.0', 1, ['新标签', '共同'])
+    private_id = create_prompt(1, '私有', '内容', '', '1.0', 0, ['新标签'])
+    assert index.match(make_tag_filter(['新标签'])) == [public_id]
+    
+    update_prompt(public_id, 1, '公开', '内容', '', '1.0', 1, ['共同'])
+    assert index.match(make_tag_filter(['新标签'])) == []
+    assert index.match(make_tag_filter(['共同'])) == [public_id]
+    
+    update_prompt(private_id, 1, '私有', '内容', '', '1.0', 1, ['共同'])
+    assert index.match(make_tag_filter(any_of=['共同', '新标签'])) == [public_id, private_id]
+    
+    delete_prompt(public_id, 1)
+    tag_filter = make_tag_filter(none_of=['共同'])
+    assert index.match(make_tag_filter(['共同'])) == [private_id]
+    assert index.match(tag_filter) == _expected(ctx, tag_filter)
+    
+    # 整体重建的结果与增量更新一致
+    before = index.match(tag_filter)
+    index.load(ctx)
+    assert index.match(tag_filter) == before
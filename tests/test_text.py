@@ -0,0 +1,55 @@
+"""
+文本规范化、搜索分词和摘要：索引端和查询端的切分规则一致，中文子串可以组成短语匹配
+"""
+from app.utils.text import normalize_text, segment_text, segment_query, make_snippet
+
+
+def test_normalize_text():
+    assert normalize_text('ＧＰＴ－４  写作\n') == 'GPT-4 写作'
+    assert normalize_text(None) == ''
+
+
+def test_segment_text():
+    assert segment_text('帮我写作') == '帮我 我写 写作 作'
+    assert segment_text('Python 写作助手') == 'python 写作 作助 助手 手'
+    assert segment_text('ＧＰＴ４翻译') == 'gpt4 翻译 译'
+    assert segment_text('!!!') == ''
+    assert segment_text(None) == ''
+
+
+def test_segment_query():
+    assert segment_query('写作') == (['写作'], False)
+    assert segment_query('写') == (['写'], True)
+    assert segment_query('pyth') == (['pyth'], True)
+    # 最后一个中文片段不补末尾单字，之前的片段与索引端一致
+    assert segment_query('写作abc翻译') == (['写作', '作', 'abc', '翻译'], False)
+
+
+def test_query_tokens_form_a_phrase_in_indexed_text():
+    indexed = segment_text('请帮我写作一篇文章').split()
+    for term in ['写作', '我写作一', '帮我写作一篇文章']:
+        tokens, _ = segment_query(term)
+        # 查询的词在索引中连续出现（短语匹配）
+        assert any(indexed[i:i + len(tokens)] == tokens for i in range(len(indexed)))
+
+
+def test_make_snippet_highlights_terms():
+    assert make_snippet('用 Python 写作', 'python 写作') == '用 <mark>Python</mark> <mark>写作</mark>'
+    assert make_snippet('没有关键词', 'python') is None
+    assert make_snippet('', 'python') is None
+    assert make_snippet('python', '!!!') is None
+
+
+def test_make_snippet_escapes_html():
+    snippet = make_snippet('<b>加粗</b> 与 <script>', '加粗 script')
+    assert snippet == '&lt;b&gt;<mark>加粗</mark>&lt;/b&gt; 与 &lt;<mark>script</mark>&gt;'
+
+
+def test_make_snippet_window():
+    text = '甲' * 100 + '关键词' + '乙' * 100
+    snippet = make_snippet(text, '关键词', length=40)
+    assert snippet.startswith('…') and snippet.endswith('…')
+    body = snippet.strip('…').replace('<mark>', '').replace('</mark>', '')
+    assert len(body) == 40 and body.index('关键词') == 10
+    # 靠近末尾时窗口不超出文本
+    assert make_snippet('乙' * 100 + '关键词', '关键词', length=40).endswith('<mark>关键词</mark>')
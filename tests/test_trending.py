@@ -0,0 +1,79 @@
+"""
+热度分数：对数形式的时间衰减累加，触发器不依赖自定义函数
+"""
+import math
+import sqlite3
+
+import pytest
+
+from app.database import get_write_db
+from app.services.prompt_service import toggle_favorite
+from app.utils.trending import HALF_LIFE_SECONDS, TRENDING_WEIGHTS, apply_trending_events, trending_add
+
+AT = '2024-05-01 12:00:00'
+LATER = '2024-05-04 12:00:00'   # 一个半衰期之后
+
+
+def _score(db, prompt_id):
+    return db.execute('SELECT trending_score FROM prompts WHERE id = ?', (prompt_id,)).fetchone()[0]
+
+
+def test_trending_add():
+    view = trending_add(None, 'view', 1, AT)
+    # 累加等价于权重相加后取对数，与顺序无关
+    both = trending_add(trending_add(None, 'view', 1, AT), 'favorite', 1, AT)
+    assert both == pytest.approx(view + math.log(1 + TRENDING_WEIGHTS['favorite']))
+    assert trending_add(trending_add(None, 'favorite', 1, AT), 'view', 1, AT) == pytest.approx(both)
+    assert trending_add(None, 'view', 3, AT) == pytest.approx(view + math.log(3))
+    # 晚一个半衰期的事件权重翻倍
+    assert HALF_LIFE_SECONDS == 3 * 24 * 3600
+    assert trending_add(None, 'view', 1, LATER) == pytest.approx(view + math.log(2))
+    assert trending_add(view, 'view', 0, AT) == view
+    assert trending_add(None, 'unknown', 1, AT) is None
+
+
+def test_scores_do_not_overflow():
+    score = None
+    for _ in range(1000):
+        score = trending_add(score, 'favorite', 1000, '2090-01-01 00:00:00')
+    assert math.isfinite(score)
+
+
+def test_external_writes_need_no_functions(app):
+    # 没有注册自定义函数的连接也能创建提示词和收藏
+    db = sqlite3.connect(app.config['DATABASE'])
+    try:
+        db.execute(
+            "INSERT INTO prompts (title, content, user_id, is_public, created_at) VALUES ('外部', '内容', 1, 1, ?)", (AT,)
+        )
+        prompt_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+        created = _score(db, prompt_id)
+        assert created == pytest.approx(trending_add(None, 'create', 1, AT))
+        
+        db.execute("INSERT INTO favorites (user_id, prompt_id, created_at) VALUES (1, ?, ?)", (prompt_id, LATER))
+        db.commit()
+        assert _score(db, prompt_id) == created
+        
+        with app.app_context():
+            write_db = get_write_db()
+            assert apply_trending_events(write_db) == 1
+            write_db.commit()
+            assert apply_trending_events(write_db) == 0
+        # 事件时间取写入收藏的时间
+        at = db.execute('SELECT created_at FROM favorites WHERE prompt_id = ?', (prompt_id,)).fetchone()[0]
+        assert _score(db, prompt_id) == pytest.approx(trending_add(created, 'favorite', 1, at))
+    finally:
+        db.close()
+
+
+def test_favorite_is_applied_immediately(app):
+    with app.app_context():
+        db = get_write_db()
+        before = _score(db, 1)
+        assert toggle_favorite(1, 1) is True
+        after = _score(db, 1)
+        assert after > before
+        # 取消收藏不降低分数（分数只随事件增加）
+        assert toggle_favorite(1, 1) is False
+        assert _score(db, 1) == after
+        assert db.execute('SELECT COUNT(*) FROM trending_events').fetchone()[0] == 0
@@ -0,0 +1,68 @@
+"""
+浏览计数写缓冲：浏览先在内存中累加，批量写入数据库，写入失败时保留在缓冲中
+"""
+import sqlite3
+import time
+
+from app.database import get_db
+from app.database.pool import ConnectionPool
+from app.services.view_counter import ViewCounter, add_pending_views, get_view_counter
+
+
+def _view_count(app, prompt_id):
+    with app.app_context():
+        return get_db().execute('SELECT view_count FROM prompts WHERE id = ?', (prompt_id,)).fetchone()[0]
+
+
+def test_views_are_buffered_then_flushed_in_one_batch(make_app):
+    app = make_app(VIEW_COUNT_FLUSH_INTERVAL=3600, VIEW_COUNT_FLUSH_THRESHOLD=10 ** 6)
+    counter = get_view_counter(app)
+    before = _view_count(app, 1), _view_count(app, 2)
+    for _ in range(3):
+        counter.increment(1)
+    counter.increment(2, count=5)
+    
+    assert _view_count(app, 1) == before[0]
+    assert counter.pending(1) == 3 and counter.pending_total() == 8
+    with app.app_context():
+        prompt = {'id': 1, 'view_count': before[0]}
+        add_pending_views([prompt])
+        assert prompt['view_count'] == before[0] + 3
+    
+    assert counter.flush() == 8
+    assert (_view_count(app, 1), _view_count(app, 2)) == (before[0] + 3, before[1] + 5)
+    assert counter.pending_total() == 0
+    assert counter.stats()['flushes'] == 1
+    assert counter.flush() == 0
+
+
+def test_threshold_wakes_the_flush_thread(make_app):
+    app = make_app(VIEW_COUNT_FLUSH_INTERVAL=3600, VIEW_COUNT_FLUSH_THRESHOLD=3)
+    counter = get_view_counter(app)
+    before = _view_count(app, 1)
+    for _ in range(3):
+        counter.increment(1)
+    deadline = time.monotonic() + 5
+    while counter.pending_total() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _view_count(app, 1) == before + 3
+
+
+def test_failed_write_keeps_views_pending():
+    def connect():
+        raise sqlite3.OperationalError('database is locked')
+    
+    counter = ViewCounter(ConnectionPool(connect, max_size=1), flush_interval=3600, flush_threshold=10 ** 6)
+    counter.increment(7, count=2)
+    assert counter.flush() == 0
+    assert counter.pending(7) == 2
+    assert counter.stats()['failures'] == 1
+
+
+def test_stop_writes_remaining_views(make_app):
+    app = make_app(VIEW_COUNT_FLUSH_INTERVAL=3600, VIEW_COUNT_FLUSH_THRESHOLD=10 ** 6)
+    counter = get_view_counter(app)
+    before = _view_count(app, 3)
+    counter.increment(3)
+    counter.stop()
+    assert _view_count(app, 3) == before + 1